@@ -5,9 +5,9 @@
 # SHIFT is functional: press SHIFT then a trig key to insert inverse trig.
 
 import streamlit as st
-import math
 import re
-from math import factorial
+
+import calc_core
 
 # ---------------- Page config ----------------
 st.set_page_config(page_title="fx-991 Inspired Calculator", page_icon="🧮", layout="wide")
@@ -117,72 +117,18 @@ body { background: var(--bg); color: #eaf0f7; }
 </style>
 """, unsafe_allow_html=True)
 
-# ---------------- Safe math environment and wrappers ----------------
-
-# Trig wrappers: when in DEG mode convert degrees -> radians for sin/cos/tan,
-# and inverse trig returns degrees if DEG mode.
-def sin_wr(x):
-    x = float(x)
-    return math.sin(math.radians(x)) if st.session_state.angle_mode == "DEG" else math.sin(x)
-
-def cos_wr(x):
-    x = float(x)
-    return math.cos(math.radians(x)) if st.session_state.angle_mode == "DEG" else math.cos(x)
-
-def tan_wr(x):
-    x = float(x)
-    return math.tan(math.radians(x)) if st.session_state.angle_mode == "DEG" else math.tan(x)
-
-def asin_wr(x):
-    res = math.asin(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-def acos_wr(x):
-    res = math.acos(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-def atan_wr(x):
-    res = math.atan(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-SAFE = {
-    "pi": math.pi,
-    "e": math.e,
-    "sin": sin_wr,
-    "cos": cos_wr,
-    "tan": tan_wr,
-    "asin": asin_wr,
-    "acos": acos_wr,
-    "atan": atan_wr,
-    "sinh": math.sinh,
-    "cosh": math.cosh,
-    "tanh": math.tanh,
-    "log": math.log,      # natural log
-    "ln": math.log,
-    "log10": math.log10,
-    "sqrt": math.sqrt,
-    "abs": abs,
-    "pow": pow,
-    "factorial": factorial,
-    "exp": math.exp,
-    "rad": math.radians,
-    "deg": math.degrees,
-}
+# ---------------- Safe math environment ----------------
+
+# DEG/RAD function tables live in calc_core.tables and are built once at import;
+# each evaluation picks the table for the current angle mode.
+def safe_eval(expr: str):
+    # parsed once per normalized expression (calc_core); only whitelisted names are reachable
+    return calc_core.safe_eval(expr, calc_core.function_table(calc.angle_mode), calc.env)
 
 # ---------------- Session state ----------------
-if "expr" not in st.session_state:
-    st.session_state.expr = ""
-if "last" not in st.session_state:
-    st.session_state.last = ""
-if "memory" not in st.session_state:
-    st.session_state.memory = 0.0
-if "angle_mode" not in st.session_state:
-    st.session_state.angle_mode = "DEG"  # DEG or RAD
-if "shift" not in st.session_state:
-    st.session_state.shift = False  # SHIFT functional toggle
-if "keyboard_input" not in st.session_state:
-    st.session_state.keyboard_input = ""
-if "eval_on_enter" not in st.session_state:
-    st.session_state.eval_on_enter = True
+# one compact object per session (calc_core.state): native results, bounded history
+if "calc" not in st.session_state:
+    st.session_state.calc = calc_core.CalcState()
+calc = st.session_state.calc
 
 # -----
@@ -1,6 +1,12 @@
 import streamlit as st
+import io
 import math
 
+import calc_core
+from calc_core.keypad import Key
+from calc_core.table import FIELDS, MAX_EXPORT_ROWS, ValueTable
+from fx_keypad import fx_keypad, layout
+
 st.set_page_config(page_title="fx-991 Style Scientific Calculator", page_icon="🧮", layout="wide")
 st.markdown("""
 <style>
@@ -49,133 +55,180 @@ SAFE_NAMES = {
     'radians': math.radians,
 }
 
-# initialize session state
-if 'display' not in st.session_state:
-    st.session_state.display = ''
-if 'angle_mode' not in st.session_state:
-    st.session_state.angle_mode = 'DEG'  # DEG or RAD
-if 'memory' not in st.session_state:
-    st.session_state.memory = 0.0
+# initialize session state: one compact object (display text, native last answer, memory, angle)
+if 'calc' not in st.session_state:
+    st.session_state.calc = calc_core.CalcState()
+calc = st.session_state.calc
+
+def evaluate_display():
+    try:
+        # '^' and '!' are understood by the parser directly
+        # handle degrees: if angle mode is DEG, wrap trig inputs
+        # Simple approach: let user use deg() wrapper; provide quick conversion buttons below
+        result = calc_core.safe_eval(calc.expr, SAFE_NAMES, calc.env)
+        calc.set_result(result)
+        st.success(f"= {calc.last_text}")
+    except Exception:
+        st.error('Error: invalid expression')
+
+def keypad_event(event):
+    # client keypad: the browser only reports the expression on '=' and 'AC'
+    calc.expr = event['expr']
+    if event['event'] == 'eq':
+        st.session_state.eval_requested = True
+    elif event['event'] == 'ac':
+        calc.clear()
+    calc.keypad_version += 1
+
+MODES = ('COMP', 'TABLE')
+
+def next_mode():
+    calc.mode = MODES[(MODES.index(calc.mode) + 1) % len(MODES)]
+
+@st.fragment
+def table_mode():
+    # f(x)/g(x) compiled once; rows are generated per page, never materialized
+    st.subheader('TABLE mode')
+    c = st.columns([3, 3, 1, 1, 1])
+    f_expr = c[0].text_input('f(x) =', value=calc.expr if 'x' in calc.expr else 'x**2', key='table_f')
+    g_expr = c[1].text_input('g(x) = (optional)', value='', key='table_g')
+    start = c[2].number_input('Start', value=1.0, key='table_start')
+    end = c[3].number_input('End', value=5.0, key='table_end')
+    step = c[4].number_input('Step', value=1.0, key='table_step')
+    try:
+        table = ValueTable(f_expr, SAFE_NAMES, start, end, step, g_expr)
+    except Exception as exc:
+        st.error(f'Error: {exc}' if isinstance(exc, calc_core.CalcError) else 'Error: invalid function')
+        return
+    p = st.columns([1, 1, 4])
+    size = p[0].selectbox('Rows per page', (25, 50, 100, 500), index=1, key='table_size')
+    number = p[1].number_input(f'Page (of {table.pages(size)})', min_value=1, max_value=table.pages(size), value=1, key='table_page')
+    fields = FIELDS if g_expr.strip() else FIELDS[:2]
+    st.dataframe([dict(zip(fields, row)) for row in table.page(number - 1, size)], use_container_width=True)
+    st.caption(f'{len(table):,} rows')
+    if len(table) > MAX_EXPORT_ROWS:
+        st.caption(f'Export is limited to {MAX_EXPORT_ROWS:,} rows: narrow the range or raise the step')
+    else:
+        # built only when clicked, on Streamlit's download thread rather than the script thread
+        st.download_button('Export CSV', lambda: export_csv(table), 'table.csv', 'text/csv',
+                           key='table_export', on_click='ignore')
+
+def export_csv(table) -> str:
+    out = io.StringIO(newline='')
+    table.write_csv(out)
+    return out.getvalue()
+
+if st.session_state.pop('eval_requested', False):
+    evaluate_display()
 
 # --- UI Top area (Display + Mode row) ---
 st.markdown("# fx-991 inspired — Streamlit Scientific Calculator")
 cols = st.columns([3, 1, 1])
 with cols[0]:
     st.markdown("#### Display")
-    display_str = st.text_input("", value=st.session_state.display, key='display_input', label_visibility='collapsed')
+    display_str = st.text_input("", value=calc.expr, key='display_input', label_visibility='collapsed')
 with cols[1]:
-    if st.button('MODE'):
-        # toggle a simple mode placeholder (in real fx this opens a menu)
-        st.info('Mode: COMP (calculator in computational mode)')
+    st.button('MODE', on_click=next_mode)
+    st.caption(f'Mode: {calc.mode}')
 with cols[2]:
     if st.button('SHIFT'):
         st.info('Shift pressed — alternate functions available on some buttons')
 
-# Keep session_state.display in sync with text input
-st.session_state.display = display_str
+# Keep calc.expr in sync with text input
+calc.expr = display_str
 
 st.markdown('---')
 
+if calc.mode == 'TABLE':
+    table_mode()
+    st.markdown('---')
+
 # --- Buttons layout inspired by fx-991MS ---
 # We'll create left main area (buttons) and a slim right column for AC / DEL / = / Ans
 left, right = st.columns([8, 2])
 
 with right:
     if st.button('AC'):
-        st.session_state.display = ''
+        calc.expr = ''
     if st.button('DEL'):
-        st.session_state.display = st.session_state.display[:-1]
+        calc.expr = calc.expr[:-1]
     if st.button('Ans'):
-        # append last answer if present
-        try:
-            last = st.session_state.get('last_answer', '')
-            st.session_state.display += str(last)
-        except Exception:
-            pass
+        # append last answer if present (by name, so huge results are not copied as text)
+        if calc.last is not None:
+            calc.expr += 'Ans'
     if st.button('='):
-        expr = st.session_state.display
-        try:
-            # replace factorial shorthand '!' if user typed it
-            expr = expr.replace('^', '**')
-            # handle degrees: if angle mode is DEG, wrap trig inputs
-            # Simple approach: let user use deg() wrapper; provide quick conversion buttons below
-            result = eval(expr, {'__builtins__': None}, SAFE_NAMES)
-            st.session_state.last_answer = result
-            st.success(f"= {result}")
-            st.session_state.display = str(result)
-        except Exception as e:
-            st.error('Error: invalid expression')
+        evaluate_display()
 
 with left:
     st.subheader('Function rows — scientific zone')
     # row 1
     r1 = st.columns(6)
     if r1[0].button('sin('):
-        st.session_state.display += 'sin('
+        calc.expr += 'sin('
     if r1[1].button('cos('):
-        st.session_state.display += 'cos('
+        calc.expr += 'cos('
     if r1[2].button('tan('):
-        st.session_state.display += 'tan('
+        calc.expr += 'tan('
     if r1[3].button('^'):  # power
-        st.session_state.display += '**'
+        calc.expr += '**'
     if r1[4].button('('):
-        st.session_state.display += '('
+        calc.expr += '('
     if r1[5].button(')'):
-        st.session_state.display += ')'
+        calc.expr += ')'
 
     # row 2
     r2 = st.columns(6)
     if r2[0].button('asin('):
-        st.session_state.display += 'asin('
+        calc.expr += 'asin('
     if r2[1].button('acos('):
-        st.session_state.display += 'acos('
+        calc.expr += 'acos('
     if r2[2].button('atan('):
-        st.session_state.display += 'atan('
+        calc.expr += 'atan('
     if r2[3].button('sqrt('):
-        st.session_state.display += 'sqrt('
+        calc.expr += 'sqrt('
     if r2[4].button('x^2'):
-        st.session_state.display += '**2'
+        calc.expr += '**2'
     if r2[5].button('x^3'):
-        st.session_state.display += '**3'
+        calc.expr += '**3'
 
     # row 3
     r3 = st.columns(6)
     if r3[0].button('ln('):
-        st.session_state.display += 'log('
+        calc.expr += 'log('
     if r3[1].button('log10('):
-        st.session_state.display += 'log10('
+        calc.expr += 'log10('
     if r3[2].button('e'):
-        st.session_state.display += 'e'
+        calc.expr += 'e'
     if r3[3].button('pi'):
-        st.session_state.display += 'pi'
+        calc.expr += 'pi'
     if r3[4].button('!'):
-        st.session_state.display += 'factorial('
+        calc.expr += 'factorial('
     if r3[5].button('Exp'):
-        st.session_state.display += 'exp('
+        calc.expr += 'exp('
 
     # row 4 — memory and angle
     r4 = st.columns(6)
     if r4[0].button('M+'):
         try:
-            st.session_state.memory += float(st.session_state.get('last_answer', 0) or 0)
+            calc.memory += float(calc.last or 0)
             st.success('Added to memory')
         except Exception:
             st.error('No numeric value to add')
     if r4[1].button('M-'):
         try:
-            st.session_state.memory -= float(st.session_state.get('last_answer', 0) or 0)
+            calc.memory -= float(calc.last or 0)
             st.success('Subtracted from memory')
         except Exception:
             st.error('No numeric value to subtract')
     if r4[2].button('MR'):
-        st.session_state.display += str(st.session_state.memory)
+        calc.expr += str(calc.memory)
     if r4[3].button('MC'):
-        st.session_state.memory = 0.0
+        calc.memory = 0.0
     if r4[4].button('DEG'):
-        st.session_state.angle_mode = 'DEG'
+        calc.angle_mode = 'DEG'
         st.info('Angle mode: DEG')
     if r4[5].button('RAD'):
-        st.session_state.angle_mode = 'RAD'
+        calc.angle_mode = 'RAD'
         st.info('Angle mode: RAD')
 
     st.markdown('---')
@@ -188,14 +241,23 @@ with left:
         ['0', '.', 'Ans', '+']
     ]
 
-    for row in keypad:
-        cols_k = st.columns(len(row))
-        for i, key in enumerate(row):
-            if cols_k[i].button(key):
-                if key == 'Ans':
-                    st.session_state.display += str(st.session_state.get('last_answer', ''))
-                else:
-                    st.session_state.display += key
+    if st.toggle('Client-side keypad', value=True, key='client_keypad'):
+        # digits are typed in the browser; the server only reruns on '='
+        rows = [[Key(k, f'kp_{k}', 'ans' if k == 'Ans' else 'append', k) for k in row] for row in keypad]
+        rows.append([Key('DEL', 'kp_del', 'del'), Key('AC', 'kp_ac', 'ac', style='ac'), Key('=', 'kp_eq', 'eq', style='eq')])
+        fx_keypad(layout(rows), expr=calc.expr, result=calc.last_text,
+                  last='Ans' if calc.last is not None else '', version=calc.keypad_version,
+                  preview_ms=0, on_event=keypad_event)
+    else:
+        for row in keypad:
+            cols_k = st.columns(len(row))
+            for i, key in enumerate(row):
+                if cols_k[i].button(key):
+                    if key == 'Ans':
+                        if calc.last is not None:
+                            calc.expr += 'Ans'
+                    else:
+                        calc.expr += key
 
 # --- Footer / usage hints ---
 st.markdown('---')
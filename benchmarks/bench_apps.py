@@ -0,0 +1,233 @@
+"""Headless benchmark for the calculator apps.
+
+Drives every app script with ``streamlit.testing.v1.AppTest`` through a
+scripted button sequence and records, per script, the wall time of each
+rerun and the peak Python memory of the session. It also times the shared
+engine directly on representative expressions. Results are compared with
+``baseline.json`` and the run exits non-zero when a budget is exceeded.
+
+    python benchmarks/bench_apps.py                    # check against the baseline
+    python benchmarks/bench_apps.py --update-baseline  # record new budgets
+
+A script that raises, does not compile, or lacks a button its scenario
+clicks is recorded as failed instead of aborting the run; errors already
+present when the baseline was recorded are listed there as known.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import calc_core  # noqa: E402
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+# Steps: ("key", widget key) clicks a keyed button, ("label", text) clicks the
+# first button with that label, ("number", index, value) sets a number_input,
+# ("toggle", widget key, value) sets a toggle. The scientific apps default to
+# the client-side keypad, which AppTest cannot click, so it is switched off.
+SCENARIOS = {
+    "Calculator.py": [
+        ("number", 0, 12.5), ("number", 1, 4), ("label", "Calculate"),
+    ],
+    "Scientific Calculator .py": [
+        ("toggle", "client_keypad", False),
+        ("label", "7"), ("label", "+"), ("label", "8"), ("label", "*"),
+        ("label", "sin("), ("label", "3"), ("label", "0"), ("label", ")"),
+        ("label", "="), ("label", "M+"), ("label", "MR"), ("label", "AC"),
+    ],
+    # this script is truncated in the tree: only the first render is measured
+    "SCIENTIFIC CALCULATOR .py": [],
+    "scientific calculator  .py": [
+        ("toggle", "client_keypad", False),
+        ("key", "k7"), ("key", "kadd"), ("key", "k8"), ("key", "kmul"),
+        ("key", "shift_btn"), ("key", "sin_btn"), ("key", "k0"), ("key", "kdot"),
+        ("key", "k5"), ("key", "rpar_btn"), ("key", "eq_btn"),
+        ("key", "mplus"), ("key", "mrec"), ("key", "ac_btn"),
+    ],
+    # this script does not compile in the tree: recorded as a known failure
+    "scientific calculator.py": [],
+}
+
+ENGINE_EXPRESSIONS = [
+    "1+2*3",
+    "sin(30)^2+cos(30)^2",
+    "sqrt(2)*ln(10)/log10(1000)",
+    "sin(pi/6)*sin(pi/6)+cos(pi/6)*cos(pi/6)",
+    "12!/(3!*9!)+2^64",
+    "exp(1)^pi-pi^exp(1)",
+]
+
+
+def _click(at, step):
+    """Apply one step; raises LookupError when its widget is not on the page."""
+    kind = step[0]
+    if kind == "key":
+        at.button(key=step[1]).click()
+    elif kind == "label":
+        button = next((b for b in at.button if b.label == step[1]), None)
+        if button is None:
+            raise LookupError(f"no button labelled {step[1]!r}")
+        button.click()
+    elif kind == "number":
+        at.number_input[step[1]].set_value(step[2])
+    elif kind == "toggle":
+        at.toggle(key=step[1]).set_value(step[2])
+    else:
+        raise ValueError(f"unknown step {step!r}")
+
+
+def _script_errors(at) -> list:
+    return [str(e.message) for e in at.exception]
+
+
+def bench_script(name: str, steps: list) -> dict:
+    """Time the first run and each step's rerun.
+
+    A script exception (including a SyntaxError) or a step whose widget is
+    missing ends the scenario and is recorded in ``exceptions``; the other
+    scripts are still measured.
+    """
+    path = os.path.join(ROOT, name)
+    timings, errors = [], []
+    try:
+        # AppTest renders an empty page for a script that does not compile
+        with open(path, encoding="utf-8") as fh:
+            compile(fh.read(), path, "exec")
+    except SyntaxError as exc:
+        errors.append(f"SyntaxError: {exc.msg} (line {exc.lineno})")
+    tracemalloc.start()
+    at = AppTest.from_file(path, default_timeout=60)
+    t0 = time.perf_counter()
+    try:
+        at.run()
+    except Exception as exc:  # AppTest re-raises some failures instead of recording them
+        errors.append(f"{type(exc).__name__}: {exc}")
+    timings.append(time.perf_counter() - t0)
+    errors += _script_errors(at)
+    for step in steps:
+        if errors:
+            break
+        try:
+            _click(at, step)
+        except (LookupError, KeyError) as exc:
+            errors.append(f"step {step!r}: {exc}")
+            break
+        t0 = time.perf_counter()
+        try:
+            at.run()
+        except Exception as exc:
+            errors.append(f"step {step!r}: {type(exc).__name__}: {exc}")
+        timings.append(time.perf_counter() - t0)
+        errors += _script_errors(at)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "reruns": len(timings),
+        "first_run_ms": timings[0] * 1e3,
+        "rerun_ms_median": statistics.median(timings[1:] or timings) * 1e3,
+        "rerun_ms_max": max(timings[1:] or timings) * 1e3,
+        "peak_kb": peak / 1024,
+        "exceptions": errors,
+    }
+
+
+def bench_engine(repeat: int = 2000) -> dict:
+    out = {}
+    for angle in ("DEG", "RAD"):
+        table = calc_core.function_table(angle)
+        for expr in ENGINE_EXPRESSIONS:
+            calc_core.safe_eval(expr, table)  # warm the parse cache
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                calc_core.safe_eval(expr, table)
+            out[f"{angle} {expr}"] = (time.perf_counter() - t0) / repeat * 1e6
+    return {"eval_us_median": statistics.median(out.values()), "eval_us_max": max(out.values()),
+            "per_expression_us": out}
+
+
+# metric name -> where it lives in the report; budgets exist for these only
+BUDGETED = ("first_run_ms", "rerun_ms_median", "rerun_ms_max", "peak_kb")
+ENGINE_BUDGETED = ("eval_us_median", "eval_us_max")
+
+
+def _first_line(message: str) -> str:
+    return message.strip().splitlines()[0] if message.strip() else ""
+
+
+def check(report: dict, baseline: dict, tolerance: float) -> list:
+    failures = []
+    for name, metrics in report["scripts"].items():
+        # scripts that are already broken in the tree keep their recorded errors
+        known = set(baseline.get("scripts", {}).get(name, {}).get("known_exceptions", ()))
+        for message in metrics["exceptions"]:
+            if _first_line(message) not in known:
+                failures.append(f"{name}: raised {_first_line(message)}")
+        for metric in BUDGETED:
+            budget = baseline.get("scripts", {}).get(name, {}).get(metric)
+            if budget is not None and metrics[metric] > budget * (1 + tolerance):
+                failures.append(f"{name}: {metric} {metrics[metric]:.1f} > budget {budget:.1f}")
+    for metric in ENGINE_BUDGETED:
+        budget = baseline.get("engine", {}).get(metric)
+        value = report["engine"][metric]
+        if budget is not None and value > budget * (1 + tolerance):
+            failures.append(f"engine: {metric} {value:.1f} > budget {budget:.1f}")
+    return failures
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--update-baseline", action="store_true", help="write the measured values as budgets")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed slack over a budget (default 25%%)")
+    ap.add_argument("--only", action="append", help="benchmark only this script (repeatable)")
+    ap.add_argument("--rounds", type=int, default=3, help="runs per script (default 3)")
+    args = ap.parse_args(argv)
+
+    # checks use the median round; a new baseline records the slowest, so one
+    # noisy rerun neither fails the gate nor sets a budget nothing can meet
+    pick = max if args.update_baseline else statistics.median
+    scenarios = {k: v for k, v in SCENARIOS.items() if not args.only or k in args.only}
+    scripts = {}
+    for name, steps in scenarios.items():
+        rounds = [bench_script(name, steps) for _ in range(max(args.rounds, 1))]
+        scripts[name] = {**rounds[0], **{m: pick(r[m] for r in rounds) for m in BUDGETED},
+                         "exceptions": sorted({e for r in rounds for e in r["exceptions"]})}
+    engine_rounds = [bench_engine() for _ in range(max(args.rounds, 1))]
+    engine = {**engine_rounds[0], **{m: pick(r[m] for r in engine_rounds) for m in ENGINE_BUDGETED}}
+    report = {"scripts": scripts, "engine": engine}
+    print(json.dumps(report, indent=2))
+
+    if args.update_baseline:
+        baseline = {
+            "scripts": {
+                name: {**{m: round(r[m], 1) for m in BUDGETED},
+                       "known_exceptions": [_first_line(e) for e in r["exceptions"]]}
+                for name, r in report["scripts"].items()
+            },
+            "engine": {m: round(report["engine"][m], 2) for m in ENGINE_BUDGETED},
+        }
+        with open(BASELINE, "w", encoding="utf-8") as fh:
+            json.dump(baseline, fh, indent=2)
+            fh.write("\n")
+        print(f"baseline written to {BASELINE}", file=sys.stderr)
+        return 0
+
+    with open(BASELINE, encoding="utf-8") as fh:
+        baseline = json.load(fh)
+    failures = check(report, baseline, args.tolerance)
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
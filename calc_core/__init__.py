@@ -0,0 +1,62 @@
+"""Headless math core shared by the Streamlit calculator apps."""
+
+from .cache import LRUCache, TTLCache
+from .engine import (
+    COMPILE_CACHE,
+    OPTIMIZED_CACHE,
+    ResultCache,
+    compile_expression,
+    compile_optimized,
+    normalize,
+    safe_eval,
+)
+from .cmplx import COMPLEX_TABLES, complex_table, format_complex
+from .errors import BudgetError, CalcError, ParseError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator, MemoEvaluator, SpecialForm, evaluate
+from .nodes import to_source
+from .optimize import explain, optimize
+from .parser import parse, tokenize
+from .precise import FACTORIALS, PreciseEvaluator, precise_eval
+from .preview import IncrementalPreview
+from .state import CalcState, History, format_result
+from .tables import DEG, RAD, TABLES, function_table
+
+__all__ = [
+    "COMPILE_CACHE",
+    "COMPLEX_TABLES",
+    "DEFAULT_BUDGET",
+    "DEG",
+    "FACTORIALS",
+    "Budget",
+    "BudgetError",
+    "CalcError",
+    "CalcState",
+    "Evaluator",
+    "History",
+    "IncrementalPreview",
+    "LRUCache",
+    "MemoEvaluator",
+    "OPTIMIZED_CACHE",
+    "ParseError",
+    "PreciseEvaluator",
+    "RAD",
+    "ResultCache",
+    "SpecialForm",
+    "TABLES",
+    "TTLCache",
+    "compile_expression",
+    "compile_optimized",
+    "complex_table",
+    "evaluate",
+    "explain",
+    "format_complex",
+    "format_result",
+    "function_table",
+    "normalize",
+    "optimize",
+    "parse",
+    "precise_eval",
+    "safe_eval",
+    "to_source",
+    "tokenize",
+]
@@ -0,0 +1,277 @@
+"""BASE-N mode: integers in hex, dec, oct and bin with fixed word widths.
+
+Everything stays in Python ints: literals in the current radix are rewritten to
+``0x``/``0o``/``0b`` literals and parsed with the normal parser, every result
+is masked to the word width (two's complement when signed), and ``**`` uses
+modular ``pow``, so no value ever passes through a float. Power-of-two radices
+format in linear time with ``format``; decimal text of very large values is
+built divide-and-conquer on ``decimal`` (as CPython's ``_pylong`` does), which
+is subquadratic and not bound by ``sys.int_max_str_digits``.
+"""
+
+import operator
+import re
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Decimal, Inexact, localcontext
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional
+
+from .engine import compile_expression
+from .errors import BudgetError, CalcError, ParseError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .nodes import Factorial, Num, Unary
+
+RADICES = (16, 10, 8, 2)
+RADIX_NAMES = MappingProxyType({16: "HEX", 10: "DEC", 8: "OCT", 2: "BIN"})
+WIDTHS = (8, 16, 32, 64)
+
+_PREFIX = {16: "0x", 8: "0o", 2: "0b"}
+_SPEC = {16: "X", 8: "o", 2: "b"}
+_DIGITS = {16: re.compile(r"[0-9A-Fa-f]+"), 8: re.compile(r"[0-7]+"), 2: re.compile(r"[01]+")}
+_PREFIXED = re.compile(r"0(?:[xX][0-9a-fA-F]+|[oO][0-7]+|[bB][01]+)")
+# a whole word that is not a function name (calls keep their names, e.g. and( )
+_WORD = re.compile(r"\b\w+\b(?!\s*\()")
+
+# below this many bits str()/int() are fast and within the int<->str digit limit
+_SMALL_BITS = 4096
+_SMALL_DIGITS = 1000
+
+
+class Word(NamedTuple):
+    """Word width in bits (None: unbounded) and signedness."""
+
+    bits: Optional[int] = 32
+    signed: bool = True
+
+    def wrap(self, n: int) -> int:
+        """``n`` reduced to the word: masked, then sign-extended if signed."""
+        bits = self.bits
+        if bits is None:
+            return n
+        n &= (1 << bits) - 1
+        if self.signed and n >> (bits - 1):
+            n -= 1 << bits
+        return n
+
+
+UNBOUNDED = Word(None, True)
+
+
+# ---------------- radix text ----------------
+def _decimal_text(n: int) -> str:
+    """``str(n)`` for non-negative ``n`` of any size."""
+    if n.bit_length() <= _SMALL_BITS:
+        return str(n)
+    powers = {}
+
+    def inner(n, w):
+        # split at 2**w2 and join the halves with one big Decimal multiply
+        if w <= _SMALL_BITS:
+            return Decimal(n)
+        w2 = w >> 1
+        hi = n >> w2
+        lo = n - (hi << w2)
+        if w2 not in powers:
+            powers[w2] = Decimal(2) ** w2
+        return inner(lo, w2) + inner(hi, w - w2) * powers[w2]
+
+    with localcontext() as ctx:
+        ctx.prec, ctx.Emax, ctx.Emin = MAX_PREC, MAX_EMAX, MIN_EMIN
+        ctx.traps[Inexact] = True
+        return str(inner(n, n.bit_length()))
+
+
+def _decimal_int(digits: str) -> int:
+    """``int(digits)`` for a decimal digit string of any length."""
+    if len(digits) <= _SMALL_DIGITS:
+        return int(digits)
+    half = len(digits) // 2
+    return _decimal_int(digits[:half]) * 10 ** (len(digits) - half) + _decimal_int(digits[half:])
+
+
+def format_radix(n: int, radix: int = 10, word: Word = UNBOUNDED) -> str:
+    """``n`` in ``radix``; HEX/OCT/BIN show the two's complement bits of a sized word."""
+    if radix == 10:
+        return "-" + _decimal_text(-n) if n < 0 else _decimal_text(n)
+    if word.bits is not None:
+        n &= (1 << word.bits) - 1
+    text = format(abs(n), _SPEC[radix])
+    return "-" + text if n < 0 else text
+
+
+def parse_int(text: str, radix: int = 10) -> int:
+    """An integer typed in ``radix`` (or with a 0x/0o/0b prefix); ``_`` and spaces are ignored."""
+    text = "".join(text.split()).replace("_", "")
+    sign = 1
+    if text[:1] in ("-", "+"):
+        sign, text = (-1 if text[0] == "-" else 1), text[1:]
+    if _PREFIXED.fullmatch(text):
+        return sign * int(text, 0)
+    if radix == 10 and text.isdigit() and text.isascii():
+        return sign * _decimal_int(text)
+    if radix != 10 and _DIGITS[radix].fullmatch(text):
+        return sign * int(text, radix)  # power-of-two bases: linear, no digit limit
+    raise CalcError(f"{text!r} is not a {RADIX_NAMES[radix]} number")
+
+
+def convert_many(values: Iterable[str], radix: int = 16, word: Word = UNBOUNDED,
+                 targets=RADICES) -> dict:
+    """Columns for a conversion table: the input, one per target radix, and errors."""
+    columns = {"input": [], **{RADIX_NAMES[r]: [] for r in targets}, "error": []}
+    outputs = [(columns[RADIX_NAMES[r]], r) for r in targets]
+    for text in values:
+        text = text.strip()
+        if not text:
+            continue
+        columns["input"].append(text)
+        try:
+            n = word.wrap(parse_int(text, radix))
+        except CalcError as exc:
+            for column, _ in outputs:
+                column.append("")
+            columns["error"].append(str(exc))
+            continue
+        for column, r in outputs:
+            column.append(format_radix(n, r, word))
+        columns["error"].append("")
+    return columns
+
+
+def radix_source(expr: str, radix: int) -> str:
+    """Rewrite bare literals in ``radix`` (``FF``, ``1010``) to prefixed ones the parser reads."""
+    if radix == 10:
+        return expr
+    digits, prefix = _DIGITS[radix], _PREFIX[radix]
+
+    def literal(m):
+        word = m.group()
+        if _PREFIXED.fullmatch(word):
+            return word  # an explicit 0x / 0o / 0b literal wins
+        if digits.fullmatch(word):
+            return prefix + word
+        if word[0].isdigit():
+            raise ParseError(f"{word!r} is not a {RADIX_NAMES[radix]} number")
+        return word  # a name such as Ans
+
+    return _WORD.sub(literal, expr)
+
+
+# ---------------- evaluation ----------------
+def _trunc_div(a: int, b: int) -> int:
+    q = abs(a) // abs(b)  # integer division truncates toward zero, as on the fx-991
+    return -q if (a < 0) != (b < 0) else q
+
+
+_INT_ARITH = {
+    "+": operator.add,
+    "-": operator.sub,
+    "/": _trunc_div,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+
+
+def _shift_count(n: int) -> int:
+    if n < 0:
+        raise CalcError("shift count must not be negative")
+    if n > DEFAULT_BUDGET.max_int_bits:
+        raise BudgetError("shift too large")
+    return n
+
+
+def _word_table(word: Word) -> Mapping:
+    wrap = word.wrap
+
+    def and_(a, b):
+        return wrap(a & b)
+
+    def or_(a, b):
+        return wrap(a | b)
+
+    def xor(a, b):
+        return wrap(a ^ b)
+
+    def not_(a):
+        return wrap(~a)
+
+    def neg(a):
+        return wrap(-a)
+
+    def shl(a, n=1):
+        return wrap(a << _shift_count(n))
+
+    def shr(a, n=1):
+        # arithmetic for signed words, logical for unsigned (values are already >= 0)
+        return wrap(a >> _shift_count(n))
+
+    return MappingProxyType({"and": and_, "or": or_, "xor": xor, "not": not_, "neg": neg,
+                             "shl": shl, "shr": shr})
+
+
+# built once per word: the BASE-N operators bound to its width and sign
+WORD_TABLES = MappingProxyType({
+    word: _word_table(word)
+    for word in [Word(bits, signed) for bits in WIDTHS for signed in (True, False)] + [UNBOUNDED]
+})
+
+
+class BaseNEvaluator(Evaluator):
+    """Integer-only evaluator whose every result is reduced to ``word``."""
+
+    def __init__(self, word: Word = Word(), budget: Budget = DEFAULT_BUDGET):
+        try:
+            names = WORD_TABLES[word]
+        except KeyError:
+            raise ValueError(f"unsupported word {word!r}") from None
+        super().__init__(names, budget)
+        self.word = word
+
+    def integer(self, value) -> int:
+        if type(value) is int:
+            return self.word.wrap(value)
+        if isinstance(value, float) and value.is_integer():
+            return self.word.wrap(int(value))
+        if isinstance(value, Decimal) and value.is_finite() and value == value.to_integral_value():
+            return self.word.wrap(int(value))
+        raise CalcError("BASE-N works on integers only")
+
+    def check(self, value):
+        return super().check(self.word.wrap(value))
+
+    def _num(self, node: Num):
+        return self.integer(node.value)
+
+    def lookup(self, name: str):
+        value = super().lookup(name)
+        return value if callable(value) else self.integer(value)
+
+    def _unary(self, node: Unary):
+        value = self.visit(node.operand)
+        return self.check(-value) if node.op == "-" else value
+
+    def arith(self, op: str, left, right):
+        if op == "**":
+            return self.power(left, right)
+        if op == "*":
+            return self.check(self.multiply(left, right))
+        if op == "/":
+            self.check_division("//", left, right)  # truncating, so as costly as //
+        elif op in ("//", "%"):
+            self.check_division(op, left, right)
+        return self.check(_INT_ARITH[op](left, right))
+
+    def power(self, base, exp):
+        if exp < 0:
+            raise CalcError("BASE-N powers must not be negative")
+        if self.word.bits is None:
+            return self.check(super().power(base, exp))
+        # only the low bits survive the mask, so reduce as we go
+        return self.check(pow(base, exp, 1 << self.word.bits))
+
+    def _factorial_node(self, node: Factorial):
+        raise CalcError("factorial is not available in BASE-N")
+
+
+def basen_eval(expr: str, radix: int = 10, word: Word = Word(), env: Optional[Mapping] = None,
+               budget: Budget = DEFAULT_BUDGET) -> int:
+    """Evaluate ``expr`` typed in ``radix`` as integers of ``word``."""
+    return BaseNEvaluator(word, budget).evaluate(compile_expression(radix_source(expr, radix)), env)
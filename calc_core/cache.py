@@ -0,0 +1,118 @@
+"""Bounded caches shared by the calculator apps."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded mapping that evicts the least recently used entry.
+
+    Lives at module level so it survives Streamlit script reruns; a lock keeps
+    it consistent when several sessions evaluate at the same time.
+    """
+
+    __slots__ = ("maxsize", "hits", "misses", "evictions", "_data", "_lock")
+
+    def __init__(self, maxsize: int = 512):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries also expire ``ttl`` seconds after they were stored."""
+
+    __slots__ = ("ttl", "expired", "_clock")
+
+    def __init__(self, maxsize: int = 512, ttl: float = 600.0, clock=time.monotonic):
+        if ttl <= 0:
+            raise ValueError("ttl must be positive")
+        super().__init__(maxsize)
+        self.ttl = ttl
+        self.expired = 0
+        self._clock = clock
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                expires, value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            if expires <= self._clock():
+                del self._data[key]
+                self.expired += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            now = self._clock()
+            self._data[key] = (now + self.ttl, value)
+            self._data.move_to_end(key)
+            # the least recently used entry is the likeliest to be stale: drop it early
+            oldest = next(iter(self._data.values()))
+            if oldest[0] <= now:
+                self._data.popitem(last=False)
+                self.expired += 1
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = self.expired = 0
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats.update(ttl=self.ttl, expired=self.expired)
+        return stats
@@ -0,0 +1,194 @@
+"""∫dx and d/dx: ``integrate(f, a, b)`` and ``diff(f, x0)`` in expressions.
+
+Both are special forms -- their first argument is an expression in ``x``,
+passed to them unevaluated. Integrands are compiled once to NumPy calls
+(``calc_core.vector``) and integrated with adaptive Gauss–Kronrod G7-K15:
+every refinement round evaluates the 15 nodes of all panels being split in a
+single vectorized call. Derivatives use dual numbers (exact up to rounding)
+and fall back to Ridders' extrapolation of central differences when the dual
+evaluation fails; where neither works (``abs`` at 0, ``factorial``, which is
+only defined on integers) ``diff`` raises ``CalcError``.
+"""
+
+import math
+from types import MappingProxyType
+from typing import Mapping, NamedTuple
+
+import numpy as np
+
+from .compiler import guarded_compiler
+from .errors import CalcError
+from .evaluator import SpecialForm
+from .nodes import Node, free_names, to_source
+from .solve import Dual, dual_table
+from .tables import function_table
+from .vector import VECTOR_TABLES, compile_node
+
+# Kronrod nodes on [0, 1] (QUADPACK qk15) and the matching weights
+_XK = (0.991455371120812639206854697526329, 0.949107912342758524526189684047851,
+       0.864864423359769072789712788640926, 0.741531185599394439863864773280788,
+       0.586087235467691130294144845693013, 0.405845151377397166906606412076961,
+       0.207784955007898467600689403773245, 0.0)
+_WK = (0.022935322010529224963732008058970, 0.063092092629978553290700663189204,
+       0.104790010322250183839876322541518, 0.140653259715525918745189590510238,
+       0.169004726639267902826583426598550, 0.190350578064785409913256402421014,
+       0.204432940075298892414161999234649, 0.209482141084727828012999174891714)
+# Gauss weights for the odd Kronrod nodes (x1, x3, x5) and the centre
+_WG = (0.129484966168869693270611432679082, 0.279705391489276667901467771423780,
+       0.381830050505118944950369775488975, 0.417959183673469387755102040816327)
+
+NODES = np.array([-x for x in _XK[:-1]] + [0.0] + list(reversed(_XK[:-1])))
+KRONROD = np.array(list(_WK[:-1]) + [_WK[-1]] + list(reversed(_WK[:-1])))
+GAUSS = np.zeros(15)
+GAUSS[[1, 3, 5, 9, 11, 13]] = (_WG[0], _WG[1], _WG[2], _WG[2], _WG[1], _WG[0])
+GAUSS[7] = _WG[3]
+
+MAX_PANELS = 4000
+
+DUAL_TABLES = {mode: dual_table(function_table(mode)) for mode in ("DEG", "RAD")}
+
+
+class Quadrature(NamedTuple):
+    value: float
+    error: float
+    panels: int
+
+
+def gauss_kronrod(fn, a: float, b: float, tol: float = 1e-10,
+                  max_panels: int = MAX_PANELS) -> Quadrature:
+    """Adaptive G7-K15 quadrature of the vectorized ``fn`` over ``[a, b]``.
+
+    Panels whose Gauss/Kronrod disagreement exceeds their share of the
+    tolerance are bisected, all of them evaluated in one batch per round.
+    """
+    if a == b:
+        return Quadrature(0.0, 0.0, 0)
+    if not (math.isfinite(a) and math.isfinite(b)):
+        raise CalcError("integration limits must be finite")
+    sign = 1.0
+    if b < a:
+        a, b, sign = b, a, -1.0
+    lo = np.array([a])
+    hi = np.array([b])
+    done_value = done_error = 0.0
+    panels = 0
+    exhausted = False
+    while lo.size:
+        half = 0.5 * (hi - lo)
+        x = (lo + half)[:, None] + half[:, None] * NODES
+        with np.errstate(all="ignore"):
+            fx = np.asarray(fn(x.ravel()), dtype=float).reshape(x.shape)
+        if not np.all(np.isfinite(fx)):
+            raise CalcError("integrand is not finite on the interval")
+        kronrod = half * (fx @ KRONROD)
+        error = np.abs(kronrod - half * (fx @ GAUSS))
+        panels += lo.size
+        total = done_value + kronrod.sum()
+        budget = max(tol, tol * abs(total))
+        # a panel is accepted when its error is within its length's share of the budget
+        accept = error <= budget * (hi - lo) / (b - a)
+        if panels + 2 * int((~accept).sum()) > max_panels:
+            accept[:] = exhausted = True  # out of panels: take what we have
+        done_value += kronrod[accept].sum()
+        done_error += error[accept].sum()
+        lo, hi = lo[~accept], hi[~accept]
+        mid = 0.5 * (lo + hi)
+        lo, hi = np.concatenate([lo, mid]), np.concatenate([mid, hi])
+    if exhausted and done_error > 1e-6 * max(abs(done_value), 1.0):
+        raise CalcError("integral does not converge (singular or oscillating integrand?)")
+    return Quadrature(float(sign * done_value), float(done_error), panels)
+
+
+def ridders(fn, x: float, h: float = None, steps: int = 10) -> float:
+    """Derivative by Ridders' extrapolation of shrinking central differences."""
+    h = h or 0.1 * max(abs(x), 1.0)
+    shrink, shrink2 = 1.4, 1.4 * 1.4
+    table = [[(fn(x + h) - fn(x - h)) / (2.0 * h)]]
+    best, best_err = table[0][0], math.inf
+    for i in range(1, steps):
+        h /= shrink
+        row = [(fn(x + h) - fn(x - h)) / (2.0 * h)]
+        factor = shrink2
+        for j in range(1, i + 1):
+            row.append((row[j - 1] * factor - table[i - 1][j - 1]) / (factor - 1.0))
+            factor *= shrink2
+            err = max(abs(row[j] - row[j - 1]), abs(row[j] - table[i - 1][j - 1]))
+            if err <= best_err:
+                best, best_err = row[j], err
+        table.append(row)
+        if abs(row[i] - table[i - 1][i - 1]) >= 2.0 * best_err:
+            break  # higher orders are getting worse: stop
+    return best
+
+
+def _has_corner(fn, x: float) -> bool:
+    """Whether the one-sided slopes of ``fn`` at ``x`` disagree."""
+    h = 1e-6 * max(abs(x), 1.0)
+    fx = fn(x)
+    right, left = (fn(x + h) - fx) / h, (fx - fn(x - h)) / h
+    return abs(right - left) > 1e-3 * (1.0 + abs(right) + abs(left))
+
+
+def _bindings(body: Node, evaluator, names: Mapping) -> tuple:
+    """Names the body reads besides ``x`` (e.g. ``Ans``) and their current values."""
+    outer = tuple(name for name in free_names(body, names) if name != "x")
+    return outer, tuple(evaluator.lookup(name) for name in outer)
+
+
+def _integrate(angle_mode: str, evaluator, args) -> float:
+    if len(args) != 3:
+        raise CalcError("use integrate(f(x), a, b)")
+    body, a, b = args
+    a, b = float(evaluator.visit(a)), float(evaluator.visit(b))
+    outer, values = _bindings(body, evaluator, VECTOR_TABLES[angle_mode])
+    fn = compile_node(body, ("x",) + outer, angle_mode)
+    return gauss_kronrod(lambda x: fn(x, *values), a, b).value
+
+
+def _diff(angle_mode: str, evaluator, args) -> float:
+    if len(args) != 2:
+        raise CalcError("use diff(f(x), x0)")
+    body, x0 = args
+    x0 = float(evaluator.visit(x0))
+    outer, values = _bindings(body, evaluator, function_table(angle_mode))
+    compiled = guarded_compiler(DUAL_TABLES[angle_mode], ("x",) + outer, evaluator).compile(body)
+    undefined = CalcError(f"d/dx is not defined for {to_source(body)} at x = {x0:g}")
+    try:
+        y = compiled((Dual(x0, 1.0),) + values)
+        if not isinstance(y, Dual):
+            return 0.0  # f does not depend on x
+        if math.isfinite(y.b):
+            return y.b
+        if math.isnan(y.b) and _has_corner(lambda x: compiled((x,) + values), x0):
+            raise undefined  # e.g. abs at 0; abs(x)^2 is smooth there and goes on to Ridders
+    except CalcError:
+        raise
+    except (ArithmeticError, ValueError, TypeError):
+        pass  # no dual rule applies here; try finite differences
+    try:
+        return ridders(lambda x: compiled((x,) + values), x0)
+    except CalcError:
+        raise
+    except (ArithmeticError, ValueError, TypeError):
+        # f is not defined around x0 (x! off the integers, sqrt at 0, ...)
+        raise undefined from None
+
+
+def _calculus_table(angle_mode: str) -> Mapping:
+    return MappingProxyType({
+        **function_table(angle_mode),
+        "integrate": SpecialForm(lambda ev, args: _integrate(angle_mode, ev, args), "integrate"),
+        "diff": SpecialForm(lambda ev, args: _diff(angle_mode, ev, args), "diff"),
+    })
+
+
+# built once, so caches keyed on the table's identity keep working
+CALCULUS_TABLES = MappingProxyType({mode: _calculus_table(mode) for mode in ("DEG", "RAD")})
+
+
+def calculus_table(angle_mode: str) -> Mapping:
+    """``function_table(angle_mode)`` plus ``integrate`` and ``diff``."""
+    try:
+        return CALCULUS_TABLES[angle_mode]
+    except KeyError:
+        raise ValueError(f"unknown angle mode {angle_mode!r}") from None
@@ -0,0 +1,213 @@
+"""Headless bulk evaluator.
+
+Reads expressions (or variable bindings for one fixed expression) from a file
+or stdin and writes one result row per input row as it goes, so memory use
+stays flat no matter how long the stream is. A bad row is reported in the
+``error`` column and the stream carries on.
+
+Examples::
+
+    python -m calc_core formulas.txt -o results.csv
+    python -m calc_core --input-format csv --expr "sin(x)^2 + ln(x)" xs.csv
+    cat jobs.jsonl | python -m calc_core --input-format jsonl --output-format jsonl
+    python -m calc_core --workers 8 formulas.txt -o results.csv
+"""
+
+import argparse
+import csv
+import json
+import sys
+from concurrent.futures import TimeoutError
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Tuple
+
+from .engine import compile_expression
+from .errors import CalcError
+from .evaluator import Evaluator
+from .pool import PooledEvaluator
+from .tables import function_table
+
+FIELDS = ("row", "expr", "result", "error")
+
+
+class RecordError(CalcError):
+    """An input row that could not be read (bad JSON, a non-numeric cell, ...)."""
+
+
+def _number(text):
+    if not isinstance(text, str):
+        return text
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _csv_variables(row: dict) -> dict:
+    variables = {}
+    for k, v in row.items():
+        if v in (None, ""):
+            continue
+        try:
+            variables[k] = _number(v)
+        except (TypeError, ValueError):
+            raise RecordError(f"column {k!r}: {v!r} is not a number") from None
+    return variables
+
+
+def read_records(stream, fmt: str) -> Iterator[Tuple[Optional[str], dict]]:
+    """Yield ``(expr, variables)`` pairs; ``expr`` is None when the row only binds variables.
+
+    A row that cannot be read yields a :class:`RecordError` in place of the
+    variables, so it becomes an error row and the stream carries on.
+    """
+    if fmt == "lines":
+        for line in stream:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line, {}
+    elif fmt == "jsonl":
+        for line in stream:
+            if not line.strip():
+                continue
+            try:
+                obj = json.loads(line)
+            except ValueError as exc:
+                yield line.strip(), RecordError(f"invalid JSON: {exc}")
+                continue
+            if isinstance(obj, str):
+                yield obj, {}
+            elif not isinstance(obj, dict):
+                yield line.strip(), RecordError("row is not a string or an object")
+            elif "expr" in obj:
+                yield obj["expr"], obj.get("vars", {})
+            else:
+                yield None, obj
+    elif fmt == "csv":
+        for row in csv.DictReader(stream):
+            expr = row.pop("expr", None)
+            try:
+                yield expr, _csv_variables(row)
+            except RecordError as exc:
+                yield expr, exc
+    else:
+        raise ValueError(f"unknown input format {fmt!r}")
+
+
+def _check_result(result):
+    if isinstance(result, complex) or not isinstance(result, (int, float)):
+        raise ValueError("result is not a real number")
+    return result
+
+
+def evaluate_stream(records: Iterable, angle_mode: str = "DEG",
+                    expr: Optional[str] = None) -> Iterator[dict]:
+    """Evaluate each record, yielding one result dict per row."""
+    evaluator = Evaluator(function_table(angle_mode))
+    fixed = compile_expression(expr) if expr else None
+    for n, (text, variables) in enumerate(records, 1):
+        text = text or expr
+        result, error = None, ""
+        try:
+            if isinstance(variables, RecordError):
+                raise variables
+            if text is None:
+                raise ValueError("row has no expression")
+            node = fixed if text is expr else compile_expression(text)
+            result = _check_result(evaluator.evaluate(node, variables))
+        except Exception as exc:
+            result, error = None, str(exc) or type(exc).__name__
+        yield {"row": n, "expr": text, "result": result, "error": error}
+
+
+def evaluate_stream_pooled(records: Iterable, angle_mode: str = "DEG",
+                           expr: Optional[str] = None, workers: int = 2,
+                           block: int = 20_000, timeout: float = 600.0) -> Iterator[dict]:
+    """Like :func:`evaluate_stream` but fans each block of rows out to worker processes."""
+    pool = PooledEvaluator(max_workers=workers, timeout=timeout)
+    records = iter(records)
+    n = 0
+    try:
+        while True:
+            chunk = [(text or expr or "", variables) for text, variables in islice(records, block)]
+            if not chunk:
+                return
+            # unreadable rows stay here; only the rest go to the workers
+            items = [item for item in chunk if not isinstance(item[1], RecordError)]
+            try:
+                results = iter(pool.evaluate_many(items, angle_mode) if items else ())
+            except TimeoutError:
+                # only this block is lost; the pool restarts and the stream carries on
+                results = iter([(None, f"block of {len(items)} rows timed out after {timeout:g}s")] * len(items))
+            for text, variables in chunk:
+                n += 1
+                if isinstance(variables, RecordError):
+                    yield {"row": n, "expr": text, "result": None, "error": str(variables)}
+                    continue
+                result, error = next(results)
+                if error is None:
+                    try:
+                        result, error = _check_result(result), ""
+                    except ValueError as exc:
+                        result, error = None, str(exc)
+                yield {"row": n, "expr": text, "result": result, "error": error}
+    finally:
+        pool.shutdown()
+
+
+def write_results(rows: Iterable[dict], out, fmt: str, flush_every: int = 1000) -> Tuple[int, int]:
+    """Write rows incrementally; returns ``(rows, errors)``."""
+    count = errors = 0
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(FIELDS)
+        emit = lambda r: writer.writerow([r[f] if r[f] is not None else "" for f in FIELDS])
+    elif fmt == "jsonl":
+        emit = lambda r: out.write(json.dumps(r) + "\n")
+    else:
+        raise ValueError(f"unknown output format {fmt!r}")
+    for row in rows:
+        try:
+            emit(row)
+        except ValueError as exc:  # e.g. an int too long to convert to text
+            row.update(result=None, error=str(exc))
+            emit(row)
+        count += 1
+        errors += bool(row["error"])
+        if count % flush_every == 0:
+            out.flush()
+    out.flush()
+    return count, errors
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m calc_core", description=__doc__.splitlines()[0])
+    ap.add_argument("input", nargs="?", default="-", help="input file (default: stdin)")
+    ap.add_argument("-o", "--output", default="-", help="output file (default: stdout)")
+    ap.add_argument("--input-format", choices=("lines", "jsonl", "csv"), default="lines")
+    ap.add_argument("--output-format", choices=("csv", "jsonl"), default="csv")
+    ap.add_argument("--expr", help="evaluate this expression for every row of variable bindings")
+    ap.add_argument("--angle", choices=("DEG", "RAD"), default="DEG")
+    ap.add_argument("--workers", type=int, default=1, help="evaluate on this many processes")
+    args = ap.parse_args(argv)
+
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    try:
+        records = read_records(src, args.input_format)
+        if args.workers > 1:
+            rows = evaluate_stream_pooled(records, args.angle, args.expr, args.workers)
+        else:
+            rows = evaluate_stream(records, args.angle, args.expr)
+        count, errors = write_results(rows, dst, args.output_format)
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    print(f"{count} rows, {errors} errors", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""CMPLX mode: complex arithmetic through ``cmath`` function tables.
+
+Like ``calc_core.tables``, the complex tables are built once at import and
+frozen, one per angle mode. The calculator mode picks COMP's ``math`` table or
+the ``cmath`` one before an evaluation starts, so no function checks the type
+of its argument per call and real-mode evaluation runs exactly as before.
+"""
+
+import cmath
+import math
+from math import factorial
+from types import MappingProxyType
+
+_D2R = math.pi / 180.0
+# parts smaller than this fraction of |z| are rounding noise (e.g. the 1e-16 in e^(iπ))
+_NOISE = 1e-14
+
+
+# Trig in DEG mode: arguments are scaled to radians, inverse trig returns degrees.
+def csin_deg(z):
+    return cmath.sin(z * _D2R)
+
+
+def ccos_deg(z):
+    return cmath.cos(z * _D2R)
+
+
+def ctan_deg(z):
+    return cmath.tan(z * _D2R)
+
+
+def casin_deg(z):
+    return cmath.asin(z) / _D2R
+
+
+def cacos_deg(z):
+    return cmath.acos(z) / _D2R
+
+
+def catan_deg(z):
+    return cmath.atan(z) / _D2R
+
+
+def arg_deg(z):
+    return math.degrees(cmath.phase(z))
+
+
+def rect(r, theta):
+    """``r∠θ`` (θ in radians) as a complex number."""
+    return cmath.rect(r, theta)
+
+
+def rect_deg(r, theta):
+    """``r∠θ`` (θ in degrees) as a complex number."""
+    return cmath.rect(r, math.radians(theta))
+
+
+def conj(z):
+    return complex(z).conjugate()
+
+
+def re(z):
+    return complex(z).real
+
+
+def im(z):
+    return complex(z).imag
+
+
+# names that do not depend on the angle mode
+CBASE = {
+    "pi": math.pi,
+    "e": math.e,
+    "i": 1j,
+    "sinh": cmath.sinh,
+    "cosh": cmath.cosh,
+    "tanh": cmath.tanh,
+    "log": cmath.log,     # natural
+    "ln": cmath.log,
+    "log10": cmath.log10,
+    "sqrt": cmath.sqrt,
+    "abs": abs,
+    "pow": pow,
+    "factorial": factorial,
+    "exp": cmath.exp,
+    "rad": math.radians,
+    "deg": math.degrees,
+    "conj": conj,
+    "re": re,
+    "im": im,
+}
+
+CDEG = MappingProxyType({
+    **CBASE,
+    "sin": csin_deg,
+    "cos": ccos_deg,
+    "tan": ctan_deg,
+    "asin": casin_deg,
+    "acos": cacos_deg,
+    "atan": catan_deg,
+    "arg": arg_deg,
+    "rect": rect_deg,
+})
+
+CRAD = MappingProxyType({
+    **CBASE,
+    "sin": cmath.sin,
+    "cos": cmath.cos,
+    "tan": cmath.tan,
+    "asin": cmath.asin,
+    "acos": cmath.acos,
+    "atan": cmath.atan,
+    "arg": cmath.phase,
+    "rect": rect,
+})
+
+COMPLEX_TABLES = MappingProxyType({"DEG": CDEG, "RAD": CRAD})
+
+
+def complex_table(angle_mode: str):
+    """Return the frozen CMPLX name table for ``"DEG"`` or ``"RAD"``."""
+    try:
+        return COMPLEX_TABLES[angle_mode]
+    except KeyError:
+        raise ValueError(f"unknown angle mode {angle_mode!r}") from None
+
+
+def _num(x: float) -> str:
+    return f"{x + 0.0:.15g}"  # + 0.0 turns -0.0 into 0.0
+
+
+def format_complex(z, polar: bool = False, angle_mode: str = "RAD") -> str:
+    """``a+bi`` text for ``z``, or ``r∠θ`` with θ in the given angle mode."""
+    z = complex(z)
+    if polar:
+        theta = cmath.phase(z)
+        return f"{_num(abs(z))}∠{_num(math.degrees(theta) if angle_mode == 'DEG' else theta)}"
+    a, b = z.real, z.imag
+    scale = abs(z)
+    if math.isfinite(scale):
+        a = 0.0 if abs(a) <= _NOISE * scale else a
+        b = 0.0 if abs(b) <= _NOISE * scale else b
+    if not b:
+        return _num(a)
+    imag = "i" if abs(b) == 1 else f"{_num(abs(b))}i"
+    if not a:
+        return f"-{imag}" if b < 0 else imag
+    return f"{_num(a)}{'-' if b < 0 else '+'}{imag}"
@@ -0,0 +1,87 @@
+"""Compile an AST once into nested closures.
+
+The closures take a single tuple holding the values of the free variables, so
+the same compiled function can be called many times (over scalars or NumPy
+arrays) without walking the tree again. Which callables implement the
+operators and functions is up to the caller.
+"""
+
+import operator
+from typing import Callable, Mapping, Sequence
+
+from .errors import CalcError
+from .evaluator import SpecialForm
+from .nodes import BinOp, Call, Factorial, Name, Node, Num, Unary
+
+SCALAR_OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+    "**": operator.pow,
+}
+
+
+class ClosureCompiler:
+    def __init__(self, names: Mapping, variables: Sequence[str],
+                 ops: Mapping = SCALAR_OPS, neg: Callable = operator.neg,
+                 factorial: Callable = None):
+        self.names = names
+        self.index = {name: i for i, name in enumerate(variables)}
+        self.ops = ops
+        self.neg = neg
+        self.factorial = factorial if factorial is not None else names.get("factorial")
+
+    def compile(self, node: Node) -> Callable:
+        kind = type(node)
+        if kind is Num:
+            value = node.value
+            return lambda v: value
+        if kind is Name:
+            if node.id in self.index:
+                i = self.index[node.id]
+                return lambda v: v[i]
+            if node.id not in self.names:
+                raise CalcError(f"unknown name {node.id!r}")
+            value = self.names[node.id]
+            return lambda v: value
+        if kind is Unary:
+            operand = self.compile(node.operand)
+            if node.op == "+":
+                return operand
+            neg = self.neg
+            return lambda v: neg(operand(v))
+        if kind is BinOp:
+            op = self.ops[node.op]
+            left = self.compile(node.left)
+            right = self.compile(node.right)
+            return lambda v: op(left(v), right(v))
+        if kind is Factorial:
+            operand = self.compile(node.operand)
+            fact = self.factorial
+            return lambda v: fact(operand(v))
+        if kind is Call:
+            fn = self.names.get(node.func)
+            if not callable(fn):
+                raise CalcError(f"unknown function {node.func!r}")
+            if isinstance(fn, SpecialForm):
+                raise CalcError(f"{node.func}() cannot be used here")
+            args = [self.compile(arg) for arg in node.args]
+            if len(args) == 1:
+                arg = args[0]
+                return lambda v: fn(arg(v))
+            return lambda v: fn(*[arg(v) for arg in args])
+        raise CalcError(f"cannot compile {kind.__name__}")
+
+
+def guarded_compiler(names: Mapping, variables: Sequence[str], evaluator) -> ClosureCompiler:
+    """Scalar compiler whose ``*``, ``**``, ``!``, ``pow`` and ``factorial`` go
+    through ``evaluator``'s budget checks, for closures called on user input."""
+    guarded = dict(names)
+    for name, fn in (("factorial", evaluator.factorial), ("pow", evaluator.power)):
+        if name in guarded:
+            guarded[name] = fn
+    ops = dict(SCALAR_OPS, **{"*": evaluator.multiply, "**": evaluator.power})
+    return ClosureCompiler(guarded, variables, ops=ops, factorial=evaluator.factorial)
@@ -0,0 +1,346 @@
+"""User definitions: variables (``A=3``) and functions (``f(x)=sin(x)^2+x``).
+
+Each definition is parsed once and kept in a dependency graph: ``uses`` holds
+the names a body reads or calls, ``users`` the reverse edges. User functions
+are inlined into the AST (parameters substituted by the argument subtrees), so
+every evaluator, the optimizer and the worker pool see a plain expression and
+need no notion of user functions. Expanded bodies and variable values are
+cached; a change invalidates only the changed name and its transitive
+dependents, and ``recalculate`` recomputes just those, in dependency order,
+like a spreadsheet.
+"""
+
+import operator
+import re
+from collections import ChainMap
+from typing import Callable, Iterable, Mapping, NamedTuple, Optional, Tuple
+
+from .engine import compile_expression, normalize
+from .errors import BudgetError, CalcError, ParseError
+from .nodes import BinOp, Call, Factorial, Name, Node, Unary, height, to_source, walk
+from .parser import MAX_HEIGHT
+
+# name, optional (parameter list), "=", body; "==" is not an assignment
+_DEFINITION = re.compile(r"\s*([^\W\d]\w*)\s*(?:\(([^()]*)\))?\s*=(?!=)(.*)", re.S)
+# inlining shares subtrees, but f(x)=g(x)*g(x) still doubles the tree per level
+MAX_EXPANDED_NODES = 100_000
+
+_UNSET = object()
+
+
+class Definition(NamedTuple):
+    name: str
+    params: Tuple[str, ...]  # () for a variable
+    body: Node               # right-hand side as parsed
+    source: str              # right-hand side as typed (normalized)
+
+    @property
+    def signature(self) -> str:
+        return f"{self.name}({', '.join(self.params)})" if self.params else self.name
+
+    def __str__(self):
+        return f"{self.signature} = {self.source}"
+
+
+def parse_definition(text: str) -> Optional[Definition]:
+    """The definition in ``text``, or None if it is a plain expression (no ``=``)."""
+    if "=" not in text:
+        return None
+    m = _DEFINITION.fullmatch(text)
+    if m is None:
+        raise ParseError("left of '=' must be a name or f(x, …)")
+    name, params, source = m.group(1), m.group(2), normalize(m.group(3))
+    if not source:
+        raise ParseError(f"nothing to assign to {name!r}")
+    if params is None:
+        params = ()
+    else:
+        params = tuple(p.strip() for p in params.split(","))
+        if not all(p.isidentifier() for p in params):
+            raise ParseError(f"parameters of {name!r} must be names")
+        if len(set(params)) != len(params):
+            raise ParseError(f"repeated parameter in {name!r}")
+    return Definition(name, params, compile_expression(source), source)
+
+
+def substitute(node: Node, bindings: Mapping[str, Node], memo: Optional[dict] = None) -> Node:
+    """``node`` with every ``Name`` in ``bindings`` replaced by its subtree (all at once).
+
+    Shared subtrees are rewritten once (``memo`` is keyed by identity), so the
+    cost follows the DAG, not the tree it stands for.
+    """
+    if memo is None:
+        memo = {}
+    done = memo.get(id(node))
+    if done is not None:
+        return done[1]
+    if isinstance(node, Name):
+        new = bindings.get(node.id, node)
+    elif isinstance(node, BinOp):
+        left, right = substitute(node.left, bindings, memo), substitute(node.right, bindings, memo)
+        new = node if left is node.left and right is node.right else BinOp(node.op, left, right)
+    elif isinstance(node, (Unary, Factorial)):
+        operand = substitute(node.operand, bindings, memo)
+        if operand is node.operand:
+            new = node
+        else:
+            new = Unary(node.op, operand) if isinstance(node, Unary) else Factorial(operand)
+    elif isinstance(node, Call):
+        args = tuple(substitute(arg, bindings, memo) for arg in node.args)
+        new = node if all(map(operator.is_, args, node.args)) else Call(node.func, args)
+    else:
+        new = node
+    memo[id(node)] = (node, new)  # keeps node alive so its id is not reused
+    return new
+
+
+def tree_size(node: Node) -> int:
+    """Node count of ``node`` as a tree, computed once per shared subtree."""
+    sizes = {}
+    stack = [(node, False)]
+    while stack:
+        sub, ready = stack.pop()
+        if ready:
+            sizes[id(sub)] = 1 + sum(sizes[id(child)] for child in _children(sub))
+        elif id(sub) not in sizes:
+            stack.append((sub, True))
+            stack.extend((child, False) for child in _children(sub))
+    return sizes[id(node)]
+
+
+def _children(node: Node) -> tuple:
+    if isinstance(node, BinOp):
+        return node.left, node.right
+    if isinstance(node, (Unary, Factorial)):
+        return (node.operand,)
+    if isinstance(node, Call):
+        return node.args
+    return ()
+
+
+def _bound(definition: Definition) -> Tuple[str, ...]:
+    # parameter names inside a cached body: "f.x" cannot be typed, so neither a
+    # caller's parameter nor a global can ever be captured by it
+    return tuple(f"{definition.name}.{p}" for p in definition.params)
+
+
+def _uses(definition: Definition) -> frozenset:
+    names = set()
+    for sub in walk(definition.body):
+        if isinstance(sub, Name):
+            names.add(sub.id)
+        elif isinstance(sub, Call):
+            names.add(sub.func)
+    return frozenset(names.difference(definition.params))
+
+
+class Definitions:
+    """A session's definitions with their dependency graph and cached values."""
+
+    def __init__(self, reserved: Iterable[str] = ()):
+        self.reserved = frozenset(reserved)  # built-in names that cannot be redefined
+        self.values = {}                     # variable -> current value
+        self.errors = {}                     # variable -> why its last evaluation failed
+        self._defs = {}
+        self._uses = {}                      # name -> names its body reads or calls
+        self._users = {}                     # name -> definitions that read or call it
+        self._expanded = {}                  # name -> body with user functions inlined
+        self._inputs = {}                    # outside name read by a definition -> value last seen
+        self._context = None
+
+    def __len__(self):
+        return len(self._defs)
+
+    def __contains__(self, name):
+        return name in self._defs
+
+    def get(self, name: str) -> Optional[Definition]:
+        return self._defs.get(name)
+
+    def items(self) -> list:
+        return sorted(self._defs.items())
+
+    # ---------------- graph ----------------
+    def define(self, definition: Definition) -> list:
+        """Add or replace a definition; returns the names it invalidated."""
+        name = definition.name
+        if name in self.reserved:
+            raise CalcError(f"{name!r} is a built-in name")
+        uses = _uses(definition)
+        if self._reaches(uses, name):
+            raise CalcError(f"circular definition of {name!r}")
+        self._unlink(name)
+        self._defs[name] = definition
+        self._uses[name] = uses
+        for used in uses:
+            self._users.setdefault(used, set()).add(name)
+        return self.invalidate(name)
+
+    def remove(self, name: str) -> list:
+        """Drop a definition; its dependents are invalidated (and now fail to resolve it)."""
+        if name not in self._defs:
+            return []
+        self._unlink(name)
+        del self._defs[name]
+        return self.invalidate(name)
+
+    def load(self, rows: Iterable[Tuple[str, str]]) -> list:
+        """Define ``(signature, source)`` pairs, e.g. saved formulas; returns those rejected."""
+        rejected = []
+        for signature, source in rows:
+            try:
+                self.define(parse_definition(f"{signature}={source}"))
+            except (CalcError, TypeError):
+                rejected.append(signature)
+        return rejected
+
+    def invalidate(self, name: str) -> list:
+        """Forget the cached body and value of ``name`` and of everything depending on it."""
+        dirty, stack, seen = [], [name], {name}
+        while stack:
+            current = stack.pop()
+            dirty.append(current)
+            self._expanded.pop(current, None)
+            self.values.pop(current, None)
+            self.errors.pop(current, None)
+            for user in self._users.get(current, ()):
+                if user not in seen:
+                    seen.add(user)
+                    stack.append(user)
+        return dirty
+
+    def dependents(self, name: str) -> list:
+        """Definitions that (directly or not) read or call ``name``."""
+        out, stack, seen = [], [name], {name}
+        while stack:
+            for user in self._users.get(stack.pop(), ()):
+                if user not in seen:
+                    seen.add(user)
+                    out.append(user)
+                    stack.append(user)
+        return out
+
+    def _unlink(self, name: str):
+        for used in self._uses.pop(name, ()):
+            self._users[used].discard(name)
+
+    def _reaches(self, start: Iterable[str], target: str) -> bool:
+        stack, seen = list(start), set()
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name not in seen:
+                seen.add(name)
+                stack.extend(self._uses.get(name, ()))
+        return False
+
+    # ---------------- expansion ----------------
+    def _body(self, name: str) -> Node:
+        """Body of ``name`` with user functions inlined and parameters renamed (see ``_bound``)."""
+        body = self._expanded.get(name)
+        if body is None:
+            definition = self._defs[name]
+            body = definition.body
+            if definition.params:
+                body = substitute(body, {p: Name(b) for p, b in zip(definition.params, _bound(definition))})
+            body = self._expanded[name] = self._inline(body, {})
+        return body
+
+    def _inline(self, node: Node, memo: dict) -> Node:
+        # memo is keyed by the (small) source subtree, so f(x)*f(x) inlines f once
+        # and both factors share the result
+        done = memo.get(node)
+        if done is not None:
+            return done
+        if isinstance(node, Call):
+            args = tuple(self._inline(arg, memo) for arg in node.args)
+            definition = self._defs.get(node.func)
+            if definition is not None and definition.params:
+                if len(args) != len(definition.params):
+                    raise CalcError(f"{definition.signature} takes {len(definition.params)} argument(s)")
+                new = substitute(self._body(node.func), dict(zip(_bound(definition), args)))
+            elif all(map(operator.is_, args, node.args)):
+                new = node
+            else:
+                new = Call(node.func, args)
+        elif isinstance(node, BinOp):
+            left, right = self._inline(node.left, memo), self._inline(node.right, memo)
+            new = node if left is node.left and right is node.right else BinOp(node.op, left, right)
+        elif isinstance(node, (Unary, Factorial)):
+            operand = self._inline(node.operand, memo)
+            if operand is node.operand:
+                new = node
+            else:
+                new = Unary(node.op, operand) if isinstance(node, Unary) else Factorial(operand)
+        else:
+            new = node
+        memo[node] = new
+        return new
+
+    def expand(self, node: Node) -> Node:
+        """``node`` with calls to user functions inlined."""
+        if not self._defs:
+            return node
+        try:
+            node = self._inline(node, {})
+        except RecursionError:
+            raise BudgetError("definitions nested too deeply") from None
+        if tree_size(node) > MAX_EXPANDED_NODES:
+            raise BudgetError("expanded expression too large")
+        if height(node) > MAX_HEIGHT:
+            raise BudgetError("definitions nested too deeply")
+        return node
+
+    def expand_source(self, expr: str) -> str:
+        """``expr`` with user functions inlined, as text (unchanged if it calls none)."""
+        if not self._defs:
+            return expr
+        node = compile_expression(expr)
+        if not any(isinstance(sub, Call) and sub.func in self._defs for sub in walk(node)):
+            return expr
+        return to_source(self.expand(node))
+
+    # ---------------- values ----------------
+    def recalculate(self, evaluate: Callable[[Node, Mapping], object],
+                    env: Optional[Mapping] = None, context=None) -> list:
+        """Evaluate every variable without a cached value, dependencies first.
+
+        ``evaluate(node, env)`` runs one expanded body. Names in ``env`` that
+        definitions read (stored registers, STAT results) are compared with
+        the previous call's and invalidate their dependents when they changed;
+        a changed ``context`` (e.g. mode and angle mode) recomputes everything.
+        Returns the names evaluated.
+        """
+        env = env or {}
+        if context != self._context:
+            self._context = context
+            self.values.clear()
+            self.errors.clear()
+        for name, seen in self._inputs.items():
+            if env.get(name, _UNSET) is not seen:
+                self.invalidate(name)
+        self._inputs = {name: env.get(name, _UNSET) for name in self._users if name not in self._defs}
+        scope = ChainMap(self.values, env)
+        done, seen = [], set()
+        for root in self._defs:
+            # iterative post-order walk: a name is computed after everything it uses
+            stack = [(root, False)]
+            while stack:
+                name, ready = stack.pop()
+                if ready:
+                    self._compute(name, evaluate, scope, done)
+                elif name not in seen and name in self._defs:
+                    seen.add(name)
+                    stack.append((name, True))
+                    stack.extend((used, False) for used in self._uses[name])
+        return done
+
+    def _compute(self, name, evaluate, scope, done):
+        if self._defs[name].params or name in self.values or name in self.errors:
+            return
+        try:
+            self.values[name] = evaluate(self.expand(self._defs[name].body), scope)
+        except (ArithmeticError, ValueError, TypeError) as exc:
+            self.errors[name] = str(exc) or type(exc).__name__
+        done.append(name)
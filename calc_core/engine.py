@@ -0,0 +1,85 @@
+"""Parse-once entry points used by the calculator apps."""
+
+from typing import Mapping, Optional
+
+from .cache import LRUCache, TTLCache
+from .evaluator import DEFAULT_BUDGET, Budget, evaluate
+from .nodes import Node, free_names
+from .optimize import evaluate_optimized, optimize
+from .parser import parse
+
+# parsed ASTs keyed by normalized expression text
+COMPILE_CACHE = LRUCache(maxsize=1024)
+# optimized ASTs keyed by (normalized text, id(names)); the entry keeps a
+# reference to the names table so the id cannot be reused while it is cached
+OPTIMIZED_CACHE = LRUCache(maxsize=1024)
+
+
+def normalize(expr: str) -> str:
+    # collapse runs of whitespace so "2 +  3" and "2 + 3" share one entry
+    return " ".join(expr.split())
+
+
+def compile_expression(expr: str) -> Node:
+    """Return the cached AST for ``expr``, parsing it on a miss."""
+    key = normalize(expr)
+    node = COMPILE_CACHE.get(key)
+    if node is None:
+        node = parse(key)
+        COMPILE_CACHE.put(key, node)
+    return node
+
+
+def compile_optimized(expr: str, names: Mapping) -> Node:
+    """Return the constant-folded, CSE'd AST of ``expr`` for the ``names`` table."""
+    key = (normalize(expr), id(names))
+    hit = OPTIMIZED_CACHE.get(key)
+    if hit is not None and hit[0] is names:
+        return hit[1]
+    node = optimize(compile_expression(expr), names)
+    OPTIMIZED_CACHE.put(key, (names, node))
+    return node
+
+
+def safe_eval(expr: str, names: Mapping, env: Optional[Mapping] = None,
+              budget: Budget = DEFAULT_BUDGET):
+    """Evaluate ``expr`` using only the whitelisted ``names`` (and ``env``)."""
+    if env and any(name in names for name in env):
+        # variables shadow table names, so folding against the table is not safe
+        return evaluate(compile_expression(expr), names, env, budget)
+    return evaluate_optimized(compile_optimized(expr, names), names, env, budget)
+
+
+class ResultCache(TTLCache):
+    """Evaluated results shared by every session of a server process.
+
+    Keys are ``(AST, calculator mode, angle mode, precision)``: the AST is hash-consed and
+    hashes in O(1), and spacing differences are already normalized away.
+    Expressions that read variables (``Ans`` and friends) are not cached, nor
+    are results too big to be worth keeping.
+    """
+
+    __slots__ = ("max_int_bits",)
+
+    def __init__(self, maxsize: int = 4096, ttl: float = 600.0, max_int_bits: int = 1 << 16):
+        super().__init__(maxsize, ttl)
+        self.max_int_bits = max_int_bits
+
+    def key(self, expr: str, names: Mapping, angle_mode: str, precision: int = 0,
+            mode: str = "COMP") -> Optional[tuple]:
+        """Cache key for ``expr``, or None if its value depends on more than the table."""
+        node = compile_expression(expr)
+        if free_names(node, names):
+            return None
+        return (node, mode, angle_mode, precision)
+
+    def put(self, key, value):
+        if isinstance(value, int) and value.bit_length() > self.max_int_bits:
+            return
+        super().put(key, value)
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,13 @@
+"""Exception types raised by the expression engine."""
+
+
+class CalcError(ValueError):
+    """Base class for every error the engine reports to the apps."""
+
+
+class ParseError(CalcError):
+    """The expression text is not valid calculator syntax."""
+
+
+class BudgetError(CalcError):
+    """Evaluating the expression would exceed a size or CPU budget."""
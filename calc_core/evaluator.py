@@ -0,0 +1,201 @@
+"""Tree-walking evaluator for parsed expressions.
+
+Only names found in the supplied whitelist (plus per-evaluation variables) can
+be read or called. Integer arithmetic is checked against a :class:`Budget`
+before it runs, so inputs like ``9^9^9`` or ``factorial(10^6)`` are rejected
+up front instead of pinning a CPU.
+"""
+
+import math
+import operator
+from dataclasses import dataclass
+from typing import Mapping, Optional
+
+from .errors import BudgetError, CalcError
+from .nodes import BinOp, Call, Factorial, Name, Node, Num, Unary
+
+
+@dataclass(frozen=True)
+class Budget:
+    max_int_bits: int = 1 << 22  # ~1.26 million decimal digits
+    max_exponent: int = 1_000_000
+    max_factorial: int = 100_000
+    # integer // and % take time ~ quotient bits × divisor bits; this allows
+    # about a tenth of a second
+    max_division_work: int = 1 << 35
+
+
+DEFAULT_BUDGET = Budget()
+
+_ARITH = {
+    "+": operator.add,
+    "-": operator.sub,
+    "/": operator.truediv,
+    "//": operator.floordiv,
+    "%": operator.mod,
+}
+
+
+def _is_int(x) -> bool:
+    return type(x) is int
+
+
+class SpecialForm:
+    """Table entry that receives its argument nodes unevaluated.
+
+    Used for operators such as ``integrate(f, a, b)`` whose first argument is
+    an expression in ``x`` rather than a value. Called as ``fn(evaluator, args)``.
+    """
+
+    __slots__ = ("fn", "__name__")
+
+    def __init__(self, fn, name: str = ""):
+        self.fn = fn
+        self.__name__ = name or getattr(fn, "__name__", "special")
+
+    def __call__(self, evaluator, args):
+        return self.fn(evaluator, args)
+
+
+class Evaluator:
+    def __init__(self, names: Mapping, budget: Budget = DEFAULT_BUDGET):
+        self.names = names
+        self.budget = budget
+        self.env = None
+        self._dispatch = {
+            Num: self._num,
+            Name: self._name,
+            Unary: self._unary,
+            BinOp: self._binop,
+            Call: self._call,
+            Factorial: self._factorial_node,
+        }
+        # whitelisted callables whose cost depends on argument size:
+        # function -> (arity the guard covers, guarded implementation)
+        self._guards = {math.factorial: (1, self.factorial), pow: (2, self.power)}
+
+    def evaluate(self, node: Node, env: Optional[Mapping] = None):
+        self.env = env
+        return self.visit(node)
+
+    def visit(self, node: Node):
+        return self._dispatch[type(node)](node)
+
+    # ---------------- node handlers ----------------
+    def _num(self, node: Num):
+        return node.value
+
+    def _name(self, node: Name):
+        return self.lookup(node.id)
+
+    def _unary(self, node: Unary):
+        value = self.visit(node.operand)
+        return -value if node.op == "-" else +value
+
+    def _binop(self, node: BinOp):
+        left = self.visit(node.left)
+        right = self.visit(node.right)
+        try:
+            return self.arith(node.op, left, right)
+        except ZeroDivisionError:
+            raise CalcError("division by zero") from None
+        except OverflowError:
+            raise CalcError("result out of range") from None
+
+    def arith(self, op: str, left, right):
+        if op == "**":
+            return self.power(left, right)
+        if op == "*":
+            return self.multiply(left, right)
+        if op in ("/", "//", "%"):
+            self.check_division(op, left, right)
+        return self.check(_ARITH[op](left, right))
+
+    def _call(self, node: Call):
+        fn = self.lookup(node.func)
+        if not callable(fn):
+            raise CalcError(f"{node.func!r} is not a function")
+        if isinstance(fn, SpecialForm):
+            return self.check(fn(self, node.args))
+        args = [self.visit(arg) for arg in node.args]
+        guard = self._guards.get(fn)
+        if guard is not None and len(args) == guard[0]:
+            return guard[1](*args)
+        return fn(*args)
+
+    def _factorial_node(self, node: Factorial):
+        return self.factorial(self.visit(node.operand))
+
+    # ---------------- helpers ----------------
+    def lookup(self, name: str):
+        if self.env is not None and name in self.env:
+            return self.env[name]
+        try:
+            return self.names[name]
+        except KeyError:
+            raise CalcError(f"unknown name {name!r}") from None
+
+    def check(self, value):
+        if _is_int(value) and value.bit_length() > self.budget.max_int_bits:
+            raise BudgetError("result too large")
+        return value
+
+    def multiply(self, a, b):
+        if _is_int(a) and _is_int(b):
+            if a.bit_length() + b.bit_length() > self.budget.max_int_bits + 1:
+                raise BudgetError("result too large")
+        return a * b
+
+    def check_division(self, op: str, a, b):
+        if not (_is_int(a) and _is_int(b)):
+            return
+        if max(a.bit_length(), b.bit_length()) > self.budget.max_int_bits:
+            raise BudgetError("operand too large")
+        if op != "/":  # int / int only keeps a float's worth of quotient bits
+            quotient = a.bit_length() - b.bit_length()
+            if quotient > 0 and quotient * b.bit_length() > self.budget.max_division_work:
+                raise BudgetError("division too large")
+
+    def power(self, base, exp):
+        if _is_int(exp) and abs(exp) > self.budget.max_exponent:
+            if not (isinstance(base, (int, float)) and abs(base) in (0, 1)):
+                raise BudgetError("exponent too large")
+        if _is_int(base) and _is_int(exp) and exp > 0 and abs(base) > 1:
+            if (base.bit_length() - 1) * exp > self.budget.max_int_bits:
+                raise BudgetError("result too large")
+        return pow(base, exp)
+
+    def factorial(self, n):
+        if isinstance(n, float) and n.is_integer():
+            n = int(n)
+        if _is_int(n) and n > self.budget.max_factorial:
+            raise BudgetError(f"factorial argument above {self.budget.max_factorial}")
+        return math.factorial(n)
+
+
+class MemoEvaluator(Evaluator):
+    """Evaluator that remembers the value of every compound subtree it visits.
+
+    With a fresh ``memo`` per evaluation, repeated subexpressions are computed
+    once; a memo kept across evaluations (see ``preview``) also works as long
+    as the names and variables do not change.
+    """
+
+    def __init__(self, names: Mapping, budget: Budget = DEFAULT_BUDGET,
+                 memo: Optional[dict] = None):
+        super().__init__(names, budget)
+        self.memo = {} if memo is None else memo
+
+    def visit(self, node: Node):
+        if type(node) is Num or type(node) is Name:
+            return self._dispatch[type(node)](node)
+        try:
+            return self.memo[node]
+        except KeyError:
+            value = self.memo[node] = self._dispatch[type(node)](node)
+            return value
+
+
+def evaluate(node: Node, names: Mapping, env: Optional[Mapping] = None,
+             budget: Budget = DEFAULT_BUDGET):
+    return Evaluator(names, budget).evaluate(node, env)
@@ -0,0 +1,166 @@
+"""Data-driven keypad layout for the fx-991 style apps.
+
+Each key is a row in a table (label, widget key, action, argument), so the
+apps render the keypad with a loop and dispatch presses through one function
+instead of an ``if st.button(...)`` block per key. Keys that only edit the
+expression are applied here; ``=``, ``AC`` and memory keys need the app's
+evaluator and are left to the caller.
+"""
+
+from typing import NamedTuple, Optional
+
+
+class Key(NamedTuple):
+    label: str
+    key: str            # Streamlit widget key
+    action: str         # see apply_key()
+    arg: Optional[str] = None
+    style: str = ""     # "", "alt", "ac" or "eq"
+
+
+# SHIFT turns a function key into its inverse
+SHIFT_ALT = {"sin(": "asin(", "cos(": "acos(", "tan(": "atan("}
+
+# scientific function rows (6 columns)
+SCI_ROWS = (
+    (
+        Key("sin", "sin_btn", "func", "sin("),
+        Key("cos", "cos_btn", "func", "cos("),
+        Key("tan", "tan_btn", "func", "tan("),
+        Key("SHIFT", "shift_btn", "shift", style="alt"),
+        Key("(", "lpar_btn", "append", "("),
+        Key(")", "rpar_btn", "append", ")"),
+    ),
+    (
+        Key("ln", "ln_btn", "append", "ln("),
+        Key("log", "log_btn", "append", "log10("),  # keep label 'log' for log10 as in many calculators
+        Key("sqrt", "sqrt_btn", "append", "sqrt("),
+        Key("x^2", "x2_btn", "append", "**2"),
+        Key("x^3", "x3_btn", "append", "**3"),
+        Key("x^y", "xy_btn", "append", "**"),
+    ),
+    (
+        Key("pi", "pi_btn", "append", "pi"),
+        Key("e", "e_btn", "append", "e"),
+        Key("!", "fact_btn", "append", "!"),
+        Key("Ans", "ans_btn", "ans"),
+        Key("^", "caret_btn", "append", "**"),
+        Key("Exp", "exp_btn", "append", "exp("),
+    ),
+)
+
+# numeric keypad & operators (4 columns)
+NUM_ROWS = (
+    (Key("7", "k7", "append", "7"), Key("8", "k8", "append", "8"),
+     Key("9", "k9", "append", "9"), Key("/", "kdiv", "append", "/")),
+    (Key("4", "k4", "append", "4"), Key("5", "k5", "append", "5"),
+     Key("6", "k6", "append", "6"), Key("*", "kmul", "append", "*")),
+    (Key("1", "k1", "append", "1"), Key("2", "k2", "append", "2"),
+     Key("3", "k3", "append", "3"), Key("-", "ksub", "append", "-")),
+    (Key("0", "k0", "append", "0"), Key(".", "kdot", "append", "."),
+     Key("+/-", "kneg", "neg"), Key("+", "kadd", "append", "+")),
+)
+
+# action row: DEL / AC / = / Mode, with relative column widths
+ACTION_ROW = (
+    Key("DEL", "del_btn", "del"),
+    Key("AC", "ac_btn", "ac", style="ac"),
+    Key("=", "eq_btn", "eq", style="eq"),
+    Key("Mode: DEG/RAD", "mode_btn", "mode", style="alt"),
+)
+ACTION_WIDTHS = (2, 2, 2, 4)
+
+MEMORY_KEYS = (
+    Key("M+", "mplus", "mplus"),
+    Key("M-", "mminus", "mminus"),
+    Key("MR", "mrec", "mrec"),
+    Key("MC", "mclear", "mclear"),
+)
+
+# calculus keys: ∫dx -> integrate(f(x), a, b), d/dx -> diff(f(x), x0)
+CALC_ROW = (
+    Key("∫dx", "int_btn", "append", "integrate("),
+    Key("d/dx", "diff_btn", "append", "diff("),
+    Key("x", "x_btn", "append", "x"),
+    Key(",", "comma_btn", "append", ","),
+)
+
+# CMPLX keys, shown in CMPLX mode: i, r∠θ -> rect(r, θ), arg, conj, Re, Im
+CMPLX_ROW = (
+    Key("i", "i_btn", "append", "i"),
+    Key("r∠θ", "rect_btn", "append", "rect("),
+    Key("arg", "arg_btn", "append", "arg("),
+    Key("conj", "conj_btn", "append", "conj("),
+    Key("Re", "re_btn", "append", "re("),
+    Key("Im", "im_btn", "append", "im("),
+)
+
+# BASE-N keys: radix switches, hex digits and the bitwise operators
+BASEN_ROWS = (
+    (
+        Key("HEX", "hex_btn", "hex", style="alt"),
+        Key("DEC", "dec_btn", "dec", style="alt"),
+        Key("OCT", "oct_btn", "oct", style="alt"),
+        Key("BIN", "bin_btn", "bin", style="alt"),
+        Key("(", "bn_lpar_btn", "append", "("),
+        Key(")", "bn_rpar_btn", "append", ")"),
+    ),
+    tuple(Key(d, f"hex{d}_btn", "append", d) for d in "ABCDEF"),
+    (
+        Key("and", "and_btn", "append", "and("),
+        Key("or", "or_btn", "append", "or("),
+        Key("xor", "xor_btn", "append", "xor("),
+        Key("not", "not_btn", "append", "not("),
+        Key("neg", "negw_btn", "append", "neg("),
+        Key(",", "bn_comma_btn", "append", ","),
+    ),
+    (
+        Key("shl", "shl_btn", "append", "shl("),
+        Key("shr", "shr_btn", "append", "shr("),
+        Key("Ans", "bn_ans_btn", "ans"),
+        Key("x^y", "bn_pow_btn", "append", "**"),
+        Key("÷", "bn_div_btn", "append", "/"),
+        Key("mod", "bn_mod_btn", "append", "%"),
+    ),
+)
+RADIX_KEYS = {"hex": 16, "dec": 10, "oct": 8, "bin": 2}
+
+def apply_key(state, key: Key) -> bool:
+    """Apply an editing key to ``state`` (needs ``expr``, ``last``, ``shift``, ``angle_mode``;
+    the BASE-N radix keys also need ``radix`` and ``format``).
+
+    Returns False if the key is not an editing key.
+    """
+    action = key.action
+    if action == "append":
+        state.expr = (state.expr or "") + key.arg
+    elif action == "func":
+        token = SHIFT_ALT.get(key.arg, key.arg) if state.shift else key.arg
+        state.expr = (state.expr or "") + token
+        state.shift = False
+    elif action == "shift":
+        state.shift = not state.shift
+    elif action == "ans":
+        # the last result is referenced by name so huge values never become text
+        if state.last is not None:
+            state.expr = (state.expr or "") + "Ans"
+    elif action == "neg":
+        # toggle sign for current expr or last
+        expr = state.expr or ("Ans" if state.last is not None else "")
+        state.expr = expr[1:] if expr.startswith("-") else "-" + expr
+    elif action == "del":
+        state.expr = (state.expr or "")[:-1]
+    elif action == "mode":
+        state.angle_mode = "RAD" if state.angle_mode == "DEG" else "DEG"
+    elif action in RADIX_KEYS:
+        # BASE-N: switch radix and show the last result in it
+        untouched = state.last is not None and state.expr == state.last_text
+        state.radix = RADIX_KEYS[action]
+        if state.last is not None:
+            text, exact = state.format(state.last)
+            state.last_text = text
+            if untouched:
+                state.expr = text if exact else "Ans"
+    else:
+        return False
+    return True
@@ -0,0 +1,184 @@
+"""MATRIX mode: named matrices MatA–MatD and NumPy-backed operations.
+
+Matrices live in a ``MatrixStore`` as contiguous float64 arrays, so a session
+holding four 300×300 matrices costs about 3 MB rather than nested lists of
+Python floats. Expressions are evaluated by ``MatrixEvaluator``, where ``*``
+between two matrices is the matrix product and ``**`` a matrix power; all the
+heavy lifting is one NumPy (BLAS/LAPACK) call per operation.
+
+Matrices and the matrix functions are only reachable through ``matrix_eval``:
+the COMP, CMPLX and BASE-N tables do not know them, since their evaluators
+would treat ``*`` elementwise.
+"""
+
+from typing import Mapping, Optional
+
+import numpy as np
+
+from .engine import compile_expression
+from .errors import BudgetError, CalcError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .tables import function_table
+
+MATRIX_NAMES = ("MatA", "MatB", "MatC", "MatD")
+MAX_DIM = 500
+
+
+def _matrix(x) -> np.ndarray:
+    a = np.asarray(x, dtype=float)
+    if a.ndim != 2:
+        raise CalcError("expected a matrix")
+    return a
+
+
+def _square(x) -> np.ndarray:
+    a = _matrix(x)
+    if a.shape[0] != a.shape[1]:
+        raise CalcError("expected a square matrix")
+    return a
+
+
+def _shape(a: np.ndarray) -> str:
+    return "×".join(map(str, a.shape))
+
+
+def det(x) -> float:
+    return float(np.linalg.det(_square(x)))
+
+
+def inv(x) -> np.ndarray:
+    try:
+        return np.linalg.inv(_square(x))
+    except np.linalg.LinAlgError:
+        raise CalcError("matrix is singular") from None
+
+
+def trn(x) -> np.ndarray:
+    return _matrix(x).T.copy()
+
+
+def _vector(x) -> np.ndarray:
+    v = np.asarray(x, dtype=float)
+    if v.ndim == 2 and 1 in v.shape:
+        v = v.ravel()  # a row or column matrix counts as a vector
+    if v.ndim != 1:
+        raise CalcError("expected a vector")
+    return v
+
+
+def dot(a, b) -> float:
+    a, b = _vector(a), _vector(b)
+    if a.shape != b.shape:
+        raise CalcError("vectors differ in length")
+    return float(np.dot(a, b))
+
+
+def cross(a, b) -> np.ndarray:
+    a, b = _vector(a), _vector(b)
+    if a.shape != (3,) or b.shape != (3,):
+        raise CalcError("cross product needs two 3-vectors")
+    return np.cross(a, b)
+
+
+def identity(n) -> np.ndarray:
+    n = int(n)
+    if not 0 < n <= MAX_DIM:
+        raise CalcError(f"size must be between 1 and {MAX_DIM}")
+    return np.eye(n)
+
+
+MATRIX_FUNCS = {
+    "det": det,
+    "inv": inv,
+    "trn": trn,
+    "dot": dot,
+    "cross": cross,
+    "identity": identity,
+}
+
+# built once per angle mode: the scalar table plus the matrix functions
+MATRIX_TABLES = {mode: {**function_table(mode), **MATRIX_FUNCS} for mode in ("DEG", "RAD")}
+
+
+class MatrixEvaluator(Evaluator):
+    """Evaluator where ``*`` and ``**`` follow matrix rules for 2-D operands and
+    ``+``/``-`` between matrices need equal shapes."""
+
+    def check(self, value):
+        if isinstance(value, np.ndarray) and value.size > MAX_DIM * MAX_DIM:
+            raise BudgetError("matrix too large")
+        return super().check(value)
+
+    def arith(self, op: str, left, right):
+        if op in ("+", "-") and isinstance(left, np.ndarray) and isinstance(right, np.ndarray):
+            if left.shape != right.shape:
+                # no broadcasting: a 3×1 plus a 1×3 is an error, not a 3×3
+                verb = "add" if op == "+" else "subtract"
+                raise CalcError(f"cannot {verb} {_shape(left)} and {_shape(right)} matrices")
+        return super().arith(op, left, right)
+
+    def multiply(self, a, b):
+        if isinstance(a, np.ndarray) and isinstance(b, np.ndarray) and a.ndim == b.ndim == 2:
+            if a.shape[1] != b.shape[0]:
+                raise CalcError(f"cannot multiply {a.shape[0]}×{a.shape[1]} by {b.shape[0]}×{b.shape[1]}")
+            return self.check(a @ b)
+        return self.check(super().multiply(a, b))
+
+    def power(self, base, exp):
+        if isinstance(base, np.ndarray):
+            if not (isinstance(exp, int) or float(exp).is_integer()):
+                raise CalcError("matrix powers must be integers")
+            exp = int(exp)
+            if abs(exp) > self.budget.max_exponent:
+                raise BudgetError("exponent too large")
+            return np.linalg.matrix_power(inv(base) if exp < 0 else _square(base), abs(exp))
+        return super().power(base, exp)
+
+    def _call(self, node):
+        try:
+            return super()._call(node)
+        except TypeError:
+            # scalar functions reject arrays (sin(MatA)), matrix functions a wrong argument count
+            raise CalcError(f"{node.func}() cannot take these arguments") from None
+
+
+def matrix_eval(expr: str, angle_mode: str = "DEG", env: Optional[Mapping] = None,
+                budget: Budget = DEFAULT_BUDGET):
+    """Evaluate ``expr`` with MatA–MatD (from ``env``) and the matrix functions."""
+    return MatrixEvaluator(MATRIX_TABLES[angle_mode], budget).evaluate(compile_expression(expr), env)
+
+
+class MatrixStore:
+    """The session's named matrices, stored as float64 arrays."""
+
+    __slots__ = ("_data",)
+
+    def __init__(self):
+        self._data = {}
+
+    def set(self, name: str, values) -> np.ndarray:
+        if name not in MATRIX_NAMES and name != "MatAns":
+            raise CalcError(f"unknown matrix {name!r}")
+        a = np.ascontiguousarray(values, dtype=float)
+        if a.ndim == 1:
+            a = a[None, :]
+        if a.ndim != 2 or not 0 < max(a.shape) <= MAX_DIM:
+            raise CalcError(f"matrices are limited to {MAX_DIM}×{MAX_DIM}")
+        self._data[name] = a
+        return a
+
+    def get(self, name: str) -> Optional[np.ndarray]:
+        return self._data.get(name)
+
+    def clear(self, name: str):
+        self._data.pop(name, None)
+
+    def env(self) -> dict:
+        """Variables for ``matrix_eval``; arrays are shared, not copied."""
+        return dict(self._data)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._data.values())
+
+    def __contains__(self, name):
+        return name in self._data
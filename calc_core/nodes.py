@@ -0,0 +1,159 @@
+"""Typed AST produced by the parser.
+
+Nodes are frozen so identical subtrees compare and hash equal; that makes them
+usable directly as cache keys. Each node also records its height, so the depth
+of a tree (which bounds the recursion of every visitor) is known in O(1).
+"""
+
+from dataclasses import dataclass, fields
+from typing import Tuple, Union
+
+
+def _post_init(self):
+    key = (type(self).__name__,) + tuple(getattr(self, name) for name in self._compare)
+    object.__setattr__(self, "_hash", hash(key))
+    if self._below is not None:
+        object.__setattr__(self, "_height", 1 + self._below())
+
+
+def _cached_hash(self):
+    return self._hash
+
+
+def _node(cls):
+    """Frozen dataclass whose hash and height are computed once, from the children's.
+
+    That keeps hashing O(1) per node, so whole subtrees are cheap memo keys.
+    """
+    cls.__post_init__ = _post_init
+    cls = dataclass(frozen=True)(cls)
+    cls._compare = tuple(f.name for f in fields(cls) if f.compare)
+    cls.__hash__ = _cached_hash
+    if not hasattr(cls, "_below"):
+        cls._below = None  # a leaf
+        cls._height = 1
+    return cls
+
+
+@_node
+class Num:
+    value: Union[int, float]
+    # literal as typed; kept for modes that re-read it at higher precision.
+    # Compared too, so 2 and 2.0 stay distinct subtrees.
+    text: str = ""
+
+
+@_node
+class Name:
+    id: str
+
+
+@_node
+class Unary:
+    op: str
+    operand: "Node"
+
+    def _below(self):
+        return self.operand._height
+
+
+@_node
+class BinOp:
+    op: str
+    left: "Node"
+    right: "Node"
+
+    def _below(self):
+        return max(self.left._height, self.right._height)
+
+
+@_node
+class Call:
+    func: str
+    args: Tuple["Node", ...]
+
+    def _below(self):
+        return max([arg._height for arg in self.args], default=0)
+
+
+@_node
+class Factorial:
+    operand: "Node"
+
+    def _below(self):
+        return self.operand._height
+
+
+Node = Union[Num, Name, Unary, BinOp, Call, Factorial]
+
+
+def height(node: Node) -> int:
+    """Levels in ``node``: 1 for a leaf."""
+    return node._height
+
+
+def walk(node: Node):
+    """Yield ``node`` and every node below it, parents first."""
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        yield node
+        if isinstance(node, BinOp):
+            stack.append(node.right)
+            stack.append(node.left)
+        elif isinstance(node, (Unary, Factorial)):
+            stack.append(node.operand)
+        elif isinstance(node, Call):
+            stack.extend(reversed(node.args))
+
+
+def free_names(node: Node, names) -> list:
+    """Names read by ``node`` that are not in ``names``, in order of appearance."""
+    seen = []
+    for sub in walk(node):
+        if isinstance(sub, Name) and sub.id not in names and sub.id not in seen:
+            seen.append(sub.id)
+    return seen
+
+
+# binding strength used when printing; mirrors the parser's precedence
+_PREC = {"+": 10, "-": 10, "*": 20, "/": 20, "//": 20, "%": 20, "**": 40}
+_ATOM = 100
+
+
+def _prec(node: Node) -> int:
+    if isinstance(node, BinOp):
+        return _PREC[node.op]
+    if isinstance(node, Unary):
+        return 30
+    if isinstance(node, Factorial):
+        return 50
+    if isinstance(node, Num) and node.value < 0:
+        return 30
+    return _ATOM
+
+
+def to_source(node: Node) -> str:
+    """Render ``node`` back to calculator syntax with minimal parentheses."""
+    def wrap(child, paren):
+        text = to_source(child)
+        return f"({text})" if paren else text
+
+    if isinstance(node, Num):
+        return node.text or repr(node.value)
+    if isinstance(node, Name):
+        return node.id
+    if isinstance(node, Unary):
+        return node.op + wrap(node.operand, _prec(node.operand) < 30)
+    if isinstance(node, Factorial):
+        return wrap(node.operand, _prec(node.operand) < 50) + "!"
+    if isinstance(node, Call):
+        return f"{node.func}({', '.join(to_source(arg) for arg in node.args)})"
+    p = _PREC[node.op]
+    if node.op == "**":
+        left = wrap(node.left, _prec(node.left) <= p)
+        right = wrap(node.right, _prec(node.right) < 30)
+        return f"{left}^{right}"
+    left = wrap(node.left, _prec(node.left) < p)
+    right = wrap(node.right, _prec(node.right) <= p)
+    return f"{left}{node.op}{right}"
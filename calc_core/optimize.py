@@ -0,0 +1,106 @@
+"""Optimization pass between parsing and evaluation.
+
+* Constant folding: subtrees built only from literals, constants such as
+  ``pi``/``e`` and whitelisted functions are evaluated once and replaced by a
+  literal. Folding runs under a tight budget, so anything big or failing is
+  simply left for the real evaluation.
+* Common-subexpression elimination: the rebuilt tree is hash-consed, so equal
+  subtrees become one shared node; evaluating it with a memo computes each
+  shared subtree once.
+"""
+
+import math
+from collections import Counter
+from typing import Mapping, Optional
+
+from .errors import CalcError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator, MemoEvaluator
+from .nodes import BinOp, Call, Factorial, Name, Node, Num, Unary, to_source, walk
+
+# folded integers stay small enough to print and to re-read as literals
+FOLD_BUDGET = Budget(max_int_bits=256, max_exponent=256, max_factorial=57)
+
+
+class Optimizer:
+    def __init__(self, names: Mapping, reserved=()):
+        self.names = names
+        self.reserved = frozenset(reserved)  # names shadowed by variables; never folded
+        self.interned = {}
+        self.folded = 0
+        self._fold = Evaluator(names, FOLD_BUDGET)
+
+    def intern(self, node: Node) -> Node:
+        return self.interned.setdefault(node, node)
+
+    def constant(self, node: Node) -> Optional[Num]:
+        try:
+            value = self._fold.evaluate(node)
+        except (CalcError, ArithmeticError, ValueError, TypeError):
+            return None
+        if type(value) is float and not math.isfinite(value):
+            return None
+        if type(value) not in (int, float):
+            return None
+        self.folded += 1
+        return Num(value, repr(value))
+
+    def visit(self, node: Node) -> Node:
+        kind = type(node)
+        if kind is Num:
+            return self.intern(node)
+        if kind is Name:
+            value = self.names.get(node.id)
+            if node.id not in self.reserved and isinstance(value, (int, float)):
+                return self.intern(Num(value, repr(value)))
+            return self.intern(node)
+        if kind is Unary or kind is Factorial:
+            operand = self.visit(node.operand)
+            node = Unary(node.op, operand) if kind is Unary else Factorial(operand)
+            children = (operand,)
+        elif kind is BinOp:
+            children = (self.visit(node.left), self.visit(node.right))
+            node = BinOp(node.op, *children)
+        else:
+            children = tuple(self.visit(arg) for arg in node.args)
+            node = Call(node.func, children)
+            if node.func in self.reserved or not callable(self.names.get(node.func)):
+                return self.intern(node)
+        if all(type(child) is Num for child in children):
+            folded = self.constant(node)
+            if folded is not None:
+                return self.intern(folded)
+        return self.intern(node)
+
+
+def optimize(node: Node, names: Mapping, reserved=()) -> Node:
+    """Return a folded, hash-consed copy of ``node``."""
+    return Optimizer(names, reserved).visit(node)
+
+
+def evaluate_optimized(node: Node, names: Mapping, env: Optional[Mapping] = None,
+                       budget: Budget = DEFAULT_BUDGET):
+    """Evaluate an optimized tree, computing each shared subtree once."""
+    return MemoEvaluator(names, budget).evaluate(node, env)
+
+
+def shared_subexpressions(node: Node) -> list:
+    """``(source, count)`` for compound subtrees that occur more than once."""
+    counts = Counter(id(sub) for sub in walk(node))
+    seen, shared = set(), []
+    for sub in walk(node):
+        if id(sub) in seen or type(sub) in (Num, Name) or counts[id(sub)] < 2:
+            continue
+        seen.add(id(sub))
+        shared.append((to_source(sub), counts[id(sub)]))
+    return shared
+
+
+def explain(node: Node, names: Mapping) -> str:
+    """Human-readable optimized form, for the debug panel."""
+    opt = Optimizer(names)
+    result = opt.visit(node)
+    lines = [f"input:     {to_source(node)}", f"optimized: {to_source(result)}",
+             f"folded {opt.folded} constant subtree(s)"]
+    for source, count in shared_subexpressions(result):
+        lines.append(f"shared ×{count}: {source}")
+    return "\n".join(lines)
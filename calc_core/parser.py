@@ -0,0 +1,182 @@
+"""Tokenizer and Pratt parser for calculator expressions.
+
+Grammar (loosest to tightest): ``+ -``, ``* / // %``, unary ``+ -``,
+``** ^`` (right associative), postfix ``!``, calls and parentheses.
+Unary minus binds looser than power so ``-2^2`` is ``-4``, as in Python.
+"""
+
+import re
+from typing import List, NamedTuple
+
+from .errors import BudgetError, ParseError
+from .nodes import BinOp, Call, Factorial, Name, Node, Num, Unary, height
+
+MAX_LENGTH = 10_000
+MAX_DEPTH = 200
+# tree height, nesting and operator chains alike ("1+1+…+1" is a left chain);
+# keeps the recursive visitors (evaluator, optimizer, printer) off the
+# interpreter's recursion limit
+MAX_HEIGHT = 250
+
+_TOKEN_RE = re.compile(
+    r"""
+    (?P<ws>\s+)
+    |(?P<num>0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+    |(?P<name>[^\W\d][\w\u0300-\u036f]*)   # combining marks allow STAT names like x̄
+    |(?P<op>\*\*|//|[-+*/%^(),!])
+    """,
+    re.VERBOSE,
+)
+
+# infix operator -> (left binding power, right binding power)
+_INFIX = {
+    "+": (10, 11),
+    "-": (10, 11),
+    "*": (20, 21),
+    "/": (20, 21),
+    "//": (20, 21),
+    "%": (20, 21),
+    "**": (40, 39),
+    "^": (40, 39),
+}
+_PREFIX_BP = 30
+_POSTFIX_BP = 50
+
+
+class Token(NamedTuple):
+    kind: str  # "num", "name", "op" or "end"
+    text: str
+    pos: int
+
+
+def tokenize(text: str, start: int = 0) -> List[Token]:
+    """Split ``text[start:]`` into tokens, ending with an ``end`` token."""
+    if len(text) > MAX_LENGTH:
+        raise ParseError(f"expression longer than {MAX_LENGTH} characters")
+    tokens = []
+    pos = start
+    match = _TOKEN_RE.match
+    while pos < len(text):
+        m = match(text, pos)
+        if m is None:
+            raise ParseError(f"unexpected character {text[pos]!r} at {pos}")
+        kind = m.lastgroup
+        if kind != "ws":
+            tokens.append(Token(kind, m.group(), pos))
+        pos = m.end()
+    tokens.append(Token("end", "", pos))
+    return tokens
+
+
+def _number(text: str):
+    if text[1:2] in ("x", "X", "o", "O", "b", "B"):
+        return int(text, 0)  # 0x / 0o / 0b literal (BASE-N)
+    if any(c in text for c in ".eE"):
+        return float(text)
+    return int(text)
+
+
+class Parser:
+    def __init__(self, tokens: List[Token]):
+        self.tokens = tokens
+        self.i = 0
+        self.depth = 0
+
+    def peek(self) -> Token:
+        return self.tokens[self.i]
+
+    def next(self) -> Token:
+        tok = self.tokens[self.i]
+        self.i += 1
+        return tok
+
+    def expect(self, text: str) -> Token:
+        tok = self.next()
+        if tok.text != text:
+            raise ParseError(f"expected {text!r} at {tok.pos}")
+        return tok
+
+    def parse(self) -> Node:
+        node = self.expression(0)
+        tok = self.peek()
+        if tok.kind != "end":
+            raise ParseError(f"unexpected {tok.text!r} at {tok.pos}")
+        return node
+
+    def expression(self, rbp: int) -> Node:
+        self.depth += 1
+        if self.depth > MAX_DEPTH:
+            raise ParseError("expression nested too deeply")
+        left = self.infix(self.prefix(self.next()), rbp)
+        self.depth -= 1
+        return left
+
+    def resume(self, left: Node, i: int) -> Node:
+        """Continue a top-level parse whose tokens before ``i`` produced ``left``."""
+        self.i = i
+        self.depth = 1
+        node = self.infix(left, 0)
+        tok = self.peek()
+        if tok.kind != "end":
+            raise ParseError(f"unexpected {tok.text!r} at {tok.pos}")
+        return node
+
+    def mark(self, left: Node, rbp: int):
+        """Hook called each time the operator loop is about to read a token."""
+
+    def infix(self, left: Node, rbp: int) -> Node:
+        while True:
+            if height(left) > MAX_HEIGHT:
+                raise BudgetError(f"expression more than {MAX_HEIGHT} operations deep")
+            self.mark(left, rbp)
+            tok = self.peek()
+            if tok.kind != "op":
+                break
+            if tok.text == "!":
+                if _POSTFIX_BP <= rbp:
+                    break
+                self.next()
+                left = Factorial(left)
+                continue
+            bp = _INFIX.get(tok.text)
+            if bp is None or bp[0] <= rbp:
+                break
+            self.next()
+            op = "**" if tok.text == "^" else tok.text
+            left = BinOp(op, left, self.expression(bp[1]))
+        return left
+
+    def prefix(self, tok: Token) -> Node:
+        if tok.kind == "num":
+            return Num(_number(tok.text), tok.text)
+        if tok.kind == "name":
+            if self.peek().text == "(":
+                self.next()
+                return Call(tok.text, self.arguments())
+            return Name(tok.text)
+        if tok.text in ("-", "+"):
+            return Unary(tok.text, self.expression(_PREFIX_BP))
+        if tok.text == "(":
+            node = self.expression(0)
+            self.expect(")")
+            return node
+        if tok.kind == "end":
+            raise ParseError("unexpected end of expression")
+        raise ParseError(f"unexpected {tok.text!r} at {tok.pos}")
+
+    def arguments(self) -> tuple:
+        args = []
+        if self.peek().text == ")":
+            self.next()
+            return ()
+        while True:
+            args.append(self.expression(0))
+            tok = self.next()
+            if tok.text == ")":
+                return tuple(args)
+            if tok.text != ",":
+                raise ParseError(f"expected ',' or ')' at {tok.pos}")
+
+
+def parse(text: str) -> Node:
+    return Parser(tokenize(text)).parse()
@@ -0,0 +1,138 @@
+"""Graph mode: adaptive sampling of ``f(x)`` and min-max downsampling for display.
+
+Sampling starts from a coarse uniform grid and repeatedly bisects only the
+intervals where the curve bends or jumps, evaluating all new midpoints in one
+vectorized call. Poles (``tan`` at 90°) and undefined stretches become NaN so
+the chart breaks the line instead of drawing a vertical spike. Before the data
+goes to the browser it is reduced to the min and max of each pixel-wide bucket,
+which keeps the visible shape while bounding the payload.
+"""
+
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .vector import compile_vectorized
+
+MAX_SAMPLES = 200_000
+DISPLAY_POINTS = 2000
+
+
+def _refine_mask(x: np.ndarray, y: np.ndarray, xm: np.ndarray, ym: np.ndarray,
+                 tol: float, min_width: float) -> np.ndarray:
+    """Intervals whose midpoint is far from the chord, or that cross a NaN boundary."""
+    chord = 0.5 * (y[:-1] + y[1:])
+    finite = np.isfinite(y[:-1]) & np.isfinite(y[1:])
+    bent = finite & np.isfinite(ym) & (np.abs(ym - chord) > tol)
+    # an edge of the domain (or a pole) lies inside: bisect to locate it
+    edge = np.isfinite(y[:-1]) ^ np.isfinite(y[1:])
+    wide = (x[1:] - x[:-1]) > min_width
+    return (bent | edge) & wide
+
+
+def adaptive_sample(fn, a: float, b: float, initial: int = 256, max_depth: int = 12,
+                    tol: Optional[float] = None, max_samples: int = MAX_SAMPLES) -> Tuple[np.ndarray, np.ndarray]:
+    """Sample the vectorized ``fn`` on ``[a, b]``, densely where it bends.
+
+    ``tol`` is the allowed gap between a midpoint and its chord; it defaults to
+    a thousandth of the spread of the initial samples.
+    """
+    if not a < b:
+        raise ValueError("range start must be below its end")
+    x = np.linspace(a, b, initial + 1)
+    y = fn(x)
+    if tol is None:
+        finite = y[np.isfinite(y)]
+        spread = np.subtract(*np.percentile(finite, [95, 5])) if finite.size else 0.0
+        tol = 1e-3 * spread if spread > 0 else 1e-9
+    min_width = (b - a) * 1e-9
+    for _ in range(max_depth):
+        xm = 0.5 * (x[:-1] + x[1:])
+        ym = fn(xm)
+        refine = _refine_mask(x, y, xm, ym, tol, min_width)
+        count = int(refine.sum())
+        if not count or x.size + count > max_samples:
+            break
+        # splice the accepted midpoints in after the left end of their interval
+        at = np.flatnonzero(refine) + 1
+        x = np.insert(x, at, xm[refine])
+        y = np.insert(y, at, ym[refine])
+    return x, _break_jumps(x, y, tol)
+
+
+def _break_jumps(x: np.ndarray, y: np.ndarray, tol: float) -> np.ndarray:
+    """Replace the far side of a pole-like jump with NaN so the line is not joined."""
+    y = y.copy()
+    y[~np.isfinite(y)] = np.nan
+    dy = np.diff(y)
+    finite = np.abs(dy[np.isfinite(dy)])
+    if not finite.size:
+        return y
+    # a jump is a step that changes sign and dwarfs the typical step size
+    typical = np.median(finite) + tol
+    with np.errstate(invalid="ignore"):
+        jump = (np.abs(dy) > 1000 * typical) & (np.sign(y[:-1]) != np.sign(y[1:]))
+    idx = np.flatnonzero(jump)
+    # blank the point with the larger magnitude: that one sits on the pole
+    left_bigger = np.abs(y[idx]) >= np.abs(y[idx + 1])
+    y[np.where(left_bigger, idx, idx + 1)] = np.nan
+    return y
+
+
+def robust_limits(y: np.ndarray, low: float = 2.0, high: float = 98.0,
+                  pad: float = 0.25) -> Tuple[float, float]:
+    """y-range covering the bulk of the curve, ignoring spikes towards poles."""
+    finite = y[np.isfinite(y)]
+    if not finite.size:
+        return -1.0, 1.0
+    lo, hi = np.percentile(finite, [low, high])
+    span = hi - lo or max(abs(lo), 1.0)
+    return float(lo - pad * span), float(hi + pad * span)
+
+
+def minmax_downsample(x: np.ndarray, y: np.ndarray,
+                      buckets: int = DISPLAY_POINTS // 2) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the min and max of ``y`` in each of ``buckets`` equal-width x slices.
+
+    A slice that contains NaN also keeps its first NaN so line breaks survive;
+    when ``y`` has gaps the slices are made a third fewer, so the result never
+    exceeds ``2 * buckets`` points.
+    """
+    if x.size <= 2 * buckets:
+        return x, y
+    nan = np.isnan(y)
+    if nan.any():
+        buckets = max(2 * buckets // 3, 1)  # up to min, max and a NaN per slice
+    edges = np.linspace(x[0], x[-1], buckets + 1)
+    starts = np.unique(np.searchsorted(x, edges[:-1], side="left"))
+    starts = starts[starts < x.size]
+    bucket = np.repeat(np.arange(starts.size), np.diff(np.append(starts, x.size)))
+    # sorting by (bucket, value) puts each bucket's extreme at the bucket start
+    argmin = np.lexsort((np.where(nan, np.inf, y), bucket))[starts]
+    argmax = np.lexsort((np.where(nan, np.inf, -y), bucket))[starts]
+    gaps = np.flatnonzero(nan)
+    first_nan = gaps[np.unique(bucket[gaps], return_index=True)[1]]
+    keep = np.zeros(x.size, dtype=bool)
+    keep[argmin] = keep[argmax] = keep[first_nan] = True
+    x, y = x[keep], y[keep]
+    # all-NaN slices in a row still need only one NaN between them
+    nan = np.isnan(y)
+    keep = ~nan | ~np.r_[False, nan[:-1]]
+    return x[keep], y[keep]
+
+
+def plot_data(expr: str, a: float, b: float, angle_mode: str = "RAD",
+              points: int = DISPLAY_POINTS, clip: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Adaptive samples of ``expr`` in ``x`` over ``[a, b]``, reduced to about ``points``."""
+    fn = compile_vectorized(expr, ["x"], angle_mode)
+    x, y = adaptive_sample(fn, a, b)
+    if clip:
+        # limits from a uniform grid: the adaptive samples crowd around poles
+        lo, hi = robust_limits(fn(np.linspace(a, b, 1025)))
+        with np.errstate(invalid="ignore"):
+            y = np.where((y < lo) | (y > hi), np.nan, y)
+    # one NaN per gap is enough to break the line
+    nan = np.isnan(y)
+    keep = ~nan | ~np.r_[False, nan[:-1]]
+    x, y = x[keep], y[keep]
+    return minmax_downsample(x, y, max(points // 2, 1))
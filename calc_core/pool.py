@@ -0,0 +1,261 @@
+"""Offload expensive evaluations to worker processes.
+
+A static cost estimate over the AST decides whether an expression is cheap
+enough to run inline or should run on a worker process, where it can be timed
+out or cancelled without blocking the Streamlit script thread. Each offloaded
+expression gets its own process, so cancelling one (AC, a timeout) terminates
+only that process and never another session's evaluation; batches from
+``evaluate_many`` share a ``ProcessPoolExecutor``.
+"""
+
+import math
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor, TimeoutError, wait
+from typing import Callable, List, Optional, Sequence
+
+from .calculus import calculus_table
+from .cmplx import complex_table
+from .engine import compile_expression
+from .evaluator import Evaluator
+from .nodes import BinOp, Call, Factorial, Node, Num, Unary, walk
+from .tables import function_table
+
+# estimated cost (roughly "bits of big-integer work") above which we offload
+INLINE_LIMIT = 200_000
+
+
+def _literal(node: Node):
+    """Value of a constant integer subtree, or None if it is not one."""
+    if isinstance(node, Num):
+        return node.value
+    if isinstance(node, Unary):
+        value = _literal(node.operand)
+        return -value if value is not None and node.op == "-" else value
+    if isinstance(node, BinOp) and node.op in ("+", "-", "*"):
+        left, right = _literal(node.left), _literal(node.right)
+        if isinstance(left, int) and isinstance(right, int):
+            if abs(left) < 1 << 64 and abs(right) < 1 << 64:
+                return {"+": left + right, "-": left - right, "*": left * right}[node.op]
+    return None
+
+
+def _factorial_cost(arg: Node) -> float:
+    n = _literal(arg)
+    if not isinstance(n, (int, float)) or n < 2:
+        return 1.0 if n is not None else INLINE_LIMIT / 4
+    return n * math.log2(n)
+
+
+def _power_cost(base: Node, exp: Node) -> float:
+    b, x = _literal(base), _literal(exp)
+    if b is None or x is None:
+        return 64.0 if x is not None and abs(x) < 64 else INLINE_LIMIT / 4
+    if not isinstance(x, int) or x <= 0 or not isinstance(b, int) or abs(b) < 2:
+        return 1.0
+    return abs(b).bit_length() * x
+
+
+def estimate_cost(node: Node) -> float:
+    """Cheap static estimate of how much work evaluating ``node`` takes."""
+    cost = 0.0
+    for sub in walk(node):
+        if isinstance(sub, Factorial):
+            cost += _factorial_cost(sub.operand)
+        elif isinstance(sub, Call) and sub.func == "factorial" and len(sub.args) == 1:
+            cost += _factorial_cost(sub.args[0])
+        elif isinstance(sub, BinOp) and sub.op == "**":
+            cost += _power_cost(sub.left, sub.right)
+        elif isinstance(sub, Call) and sub.func == "pow" and len(sub.args) == 2:
+            cost += _power_cost(*sub.args)
+        else:
+            cost += 1.0
+    return cost
+
+
+# ---------------- worker side ----------------
+def _table(angle_mode: str, mode: str = "COMP"):
+    # the same tables the app evaluates with inline, integrate and diff included
+    return complex_table(angle_mode) if mode == "CMPLX" else calculus_table(angle_mode)
+
+
+def _evaluate_one(expr: str, angle_mode: str, env: Optional[dict] = None, mode: str = "COMP"):
+    return Evaluator(_table(angle_mode, mode)).evaluate(compile_expression(expr), env)
+
+
+def _evaluate_chunk(items: Sequence[tuple], angle_mode: str) -> list:
+    evaluator = Evaluator(function_table(angle_mode))
+    out = []
+    for expr, variables in items:
+        try:
+            out.append((evaluator.evaluate(compile_expression(expr), variables), None))
+        except Exception as exc:
+            out.append((None, str(exc) or type(exc).__name__))
+    return out
+
+
+def _run_task(conn, fn, args):
+    try:
+        conn.send((True, fn(*args)))
+    except BaseException as exc:
+        conn.send((False, exc))
+    finally:
+        conn.close()
+
+
+class _ProcessTask:
+    """One call on a dedicated process, exposed as a ``Future``."""
+
+    def __init__(self, context, fn, args, on_done: Callable[[Future], None]):
+        self.cancelled = False
+        self.future = Future()
+        self.future.set_running_or_notify_cancel()
+        self.future.add_done_callback(on_done)
+        receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=_run_task, args=(sender, fn, args), daemon=True)
+        self.process.start()
+        sender.close()
+        threading.Thread(target=self._collect, args=(receiver,), daemon=True).start()
+
+    def _collect(self, receiver):
+        try:
+            ok, value = receiver.recv()
+        except (EOFError, OSError):  # the process ended without answering
+            ok, value = False, None
+        receiver.close()
+        self.process.join()
+        if ok:
+            self.future.set_result(value)
+        elif value is not None:
+            self.future.set_exception(value)
+        elif self.cancelled:
+            self.future.set_exception(CancelledError())
+        else:
+            self.future.set_exception(RuntimeError(f"worker process exited with code {self.process.exitcode}"))
+
+    def terminate(self):
+        self.cancelled = True
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class PooledEvaluator:
+    """Evaluates inline when cheap and on a worker process otherwise."""
+
+    def __init__(self, max_workers: Optional[int] = None, timeout: float = 10.0,
+                 inline_limit: float = INLINE_LIMIT):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.timeout = timeout
+        self.inline_limit = inline_limit
+        self._executor = None
+        # spawn: forking a multi-threaded Streamlit server is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = {}  # Future -> _ProcessTask still running
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(self.max_workers, mp_context=self._context)
+        return self._executor
+
+    def is_heavy(self, expr: str) -> bool:
+        return estimate_cost(compile_expression(expr)) > self.inline_limit
+
+    def submit(self, expr: str, angle_mode: str = "DEG", env: Optional[dict] = None,
+               mode: str = "COMP") -> Future:
+        compile_expression(expr)  # surface syntax errors before paying for a process
+        task = _ProcessTask(self._context, _evaluate_one, (expr, angle_mode, env, mode), self._forget)
+        with self._lock:
+            if not task.future.done():
+                self._tasks[task.future] = task
+        return task.future
+
+    def _forget(self, future: Future):
+        with self._lock:
+            self._tasks.pop(future, None)
+
+    def wait(self, future: Future, timeout: Optional[float] = None,
+             on_tick: Optional[Callable[[float], None]] = None, tick: float = 0.1):
+        """Block until ``future`` finishes, calling ``on_tick(elapsed)`` while waiting.
+
+        On timeout the task is cancelled so it stops using CPU.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        while True:
+            done, _ = wait([future], timeout=tick)
+            if done:
+                return future.result()
+            elapsed = time.monotonic() - start
+            if elapsed >= timeout:
+                self.cancel(future)
+                raise TimeoutError(f"evaluation exceeded {timeout:g}s")
+            if on_tick is not None:
+                on_tick(elapsed)
+
+    def evaluate(self, expr: str, angle_mode: str = "DEG", timeout: Optional[float] = None,
+                 on_tick: Optional[Callable[[float], None]] = None, env: Optional[dict] = None,
+                 mode: str = "COMP"):
+        if not self.is_heavy(expr):
+            return _evaluate_one(expr, angle_mode, env, mode)
+        return self.wait(self.submit(expr, angle_mode, env, mode), timeout, on_tick)
+
+    def evaluate_many(self, items: Sequence, angle_mode: str = "DEG",
+                      timeout: Optional[float] = None) -> List[tuple]:
+        """Evaluate a batch across all workers; returns ``(result, error)`` per item.
+
+        Items are expression strings or ``(expr, variables)`` pairs.
+        """
+        if not items:
+            return []
+        items = [(item, None) if isinstance(item, str) else item for item in items]
+        size = max(1, math.ceil(len(items) / (self.max_workers * 4)))
+        chunks = [items[i:i + size] for i in range(0, len(items), size)]
+        futures = [self.executor.submit(_evaluate_chunk, chunk, angle_mode) for chunk in chunks]
+        deadline = time.monotonic() + (self.timeout if timeout is None else timeout)
+        out = []
+        try:
+            for future in futures:
+                out.extend(future.result(timeout=max(0.0, deadline - time.monotonic())))
+        except TimeoutError:
+            for future in futures:
+                self.cancel(future)
+            raise
+        return out
+
+    def cancel(self, future: Future):
+        """Cancel ``future``, terminating only the process that runs it.
+
+        A running ``evaluate_many`` chunk cannot be stopped on its own, so that
+        restarts the batch executor (whose futures all belong to that batch).
+        """
+        with self._lock:
+            task = self._tasks.get(future)
+        if task is not None:
+            task.terminate()
+            return
+        if future.cancel() or future.done():
+            return
+        self._restart()
+
+    def _restart(self):
+        executor, self._executor = self._executor, None
+        if executor is None:
+            return
+        # ProcessPoolExecutor has no public way to stop a running task
+        for process in list(getattr(executor, "_processes", {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            tasks = list(self._tasks.values())
+        for task in tasks:
+            task.terminate()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
@@ -0,0 +1,317 @@
+"""Arbitrary-precision evaluation with ``decimal``.
+
+Literals are read from their source text as ``Decimal`` and every operation
+runs with a few guard digits before the result is rounded to the requested
+precision. Constants and the name tables are cached per precision, and
+factorials come from an incremental table so ``n!`` right after ``(n-1)!``
+costs a single multiplication.
+"""
+
+import math
+import threading
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation, getcontext, localcontext
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, Optional
+
+from .engine import compile_expression
+from .errors import BudgetError, CalcError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .nodes import Node, Num
+
+GUARD_DIGITS = 5
+MAX_PRECISION = 1000
+
+
+# ---------------- factorials ----------------
+class FactorialTable:
+    """Keeps a few recent factorials and steps from the nearest one.
+
+    Within ``max_step`` of a cached ``m!`` we multiply (or divide) our way to
+    ``n!``; further away ``math.factorial``'s divide-and-conquer is faster.
+    """
+
+    def __init__(self, size: int = 16, max_step: int = 64):
+        self.size = size
+        self.max_step = max_step
+        self._cache = OrderedDict({0: 1})
+        self._lock = threading.Lock()
+
+    def get(self, n: int) -> int:
+        if n < 0:
+            raise ValueError("factorial() not defined for negative values")
+        with self._lock:
+            value = self._cache.get(n)
+            if value is None:
+                value = self._step(n)
+                self._cache[n] = value
+                if len(self._cache) > self.size:
+                    self._cache.popitem(last=False)
+            self._cache.move_to_end(n)
+            return value
+
+    def _step(self, n: int) -> int:
+        m = min(self._cache, key=lambda k: abs(k - n))
+        if abs(m - n) > self.max_step:
+            return math.factorial(n)
+        value = self._cache[m]
+        if m < n:
+            for k in range(m + 1, n + 1):
+                value *= k
+        else:
+            for k in range(m, n, -1):
+                value //= k
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._cache = OrderedDict({0: 1})
+
+
+FACTORIALS = FactorialTable()
+
+
+def _integral(x) -> int:
+    if isinstance(x, int):
+        return x
+    if x != x.to_integral_value():
+        raise CalcError("factorial needs a whole number")
+    return int(x)
+
+
+def precise_factorial(n):
+    return FACTORIALS.get(_integral(n))
+
+
+def ncr(n, r):
+    n, r = _integral(n), _integral(r)
+    if not 0 <= r <= n:
+        return 0
+    return FACTORIALS.get(n) // (FACTORIALS.get(r) * FACTORIALS.get(n - r))
+
+
+def npr(n, r):
+    n, r = _integral(n), _integral(r)
+    if not 0 <= r <= n:
+        return 0
+    return FACTORIALS.get(n) // FACTORIALS.get(n - r)
+
+
+# ---------------- constants ----------------
+@lru_cache(maxsize=32)
+def pi_at(prec: int) -> Decimal:
+    """pi to ``prec`` significant digits (series from the decimal docs)."""
+    with localcontext() as ctx:
+        ctx.prec = prec + GUARD_DIGITS
+        three = Decimal(3)
+        lasts, t, s, n, na, d, da = 0, three, 3, 1, 0, 0, 24
+        while s != lasts:
+            lasts = s
+            n, na = n + na, na + 8
+            d, da = d + da, da + 32
+            t = (t * n) / d
+            s += t
+        return s
+
+
+@lru_cache(maxsize=32)
+def e_at(prec: int) -> Decimal:
+    with localcontext() as ctx:
+        ctx.prec = prec + GUARD_DIGITS
+        return Decimal(1).exp()
+
+
+# ---------------- functions (run at the caller's context precision) ----------------
+def _d(x) -> Decimal:
+    return x if isinstance(x, Decimal) else Decimal(x)
+
+
+def _pi() -> Decimal:
+    return pi_at(getcontext().prec)
+
+
+def _series_sin_cos(x: Decimal, start: Decimal, i: int) -> Decimal:
+    with localcontext() as ctx:
+        ctx.prec += 2
+        s, term, lasts = start, start, 0
+        x2 = x * x
+        while s != lasts:
+            lasts = s
+            term = -term * x2 / ((i + 1) * (i + 2))
+            s += term
+            i += 2
+    return +s
+
+
+def d_sin(x):
+    x = _d(x) % (2 * _pi())
+    return _series_sin_cos(x, x, 1)
+
+
+def d_cos(x):
+    x = _d(x) % (2 * _pi())
+    return _series_sin_cos(x, Decimal(1), 0)
+
+
+def d_tan(x):
+    return d_sin(x) / d_cos(x)
+
+
+def d_atan(x):
+    x = _d(x)
+    if x < 0:
+        return -d_atan(-x)
+    if x > 1:
+        return _pi() / 2 - d_atan(1 / x)
+    with localcontext() as ctx:
+        ctx.prec += 4
+        # halve the argument twice so the series converges quickly
+        for _ in range(2):
+            x = x / (1 + (1 + x * x).sqrt())
+        s, term, lasts, k = x, x, 0, 1
+        x2 = x * x
+        while s != lasts:
+            lasts = s
+            term = -term * x2
+            k += 2
+            s += term / k
+        s *= 4
+    return +s
+
+
+def d_asin(x):
+    x = _d(x)
+    if abs(x) > 1:
+        raise ValueError("math domain error")
+    if abs(x) == 1:
+        return x * _pi() / 2
+    return d_atan(x / (1 - x * x).sqrt())
+
+
+def d_acos(x):
+    return _pi() / 2 - d_asin(x)
+
+
+def d_sinh(x):
+    x = _d(x)
+    return (x.exp() - (-x).exp()) / 2
+
+
+def d_cosh(x):
+    x = _d(x)
+    return (x.exp() + (-x).exp()) / 2
+
+
+def d_tanh(x):
+    x = _d(x)
+    return d_sinh(x) / d_cosh(x)
+
+
+def d_log(x, base=None):
+    x = _d(x)
+    return x.ln() if base is None else x.ln() / _d(base).ln()
+
+
+@lru_cache(maxsize=32)
+def precise_table(angle_mode: str, prec: int) -> Mapping:
+    """Frozen name table for ``angle_mode`` with constants at ``prec`` digits."""
+    pi, e = pi_at(prec + GUARD_DIGITS), e_at(prec + GUARD_DIGITS)
+    if angle_mode == "DEG":
+        with localcontext() as ctx:
+            ctx.prec = prec + 2 * GUARD_DIGITS
+            d2r = pi / 180
+        trig = {
+            "sin": lambda x: d_sin(_d(x) * d2r),
+            "cos": lambda x: d_cos(_d(x) * d2r),
+            "tan": lambda x: d_tan(_d(x) * d2r),
+            "asin": lambda x: d_asin(x) / d2r,
+            "acos": lambda x: d_acos(x) / d2r,
+            "atan": lambda x: d_atan(x) / d2r,
+        }
+    elif angle_mode == "RAD":
+        trig = {"sin": d_sin, "cos": d_cos, "tan": d_tan,
+                "asin": d_asin, "acos": d_acos, "atan": d_atan}
+    else:
+        raise ValueError(f"unknown angle mode {angle_mode!r}")
+    return MappingProxyType({
+        "pi": pi,
+        "e": e,
+        **trig,
+        "sinh": d_sinh,
+        "cosh": d_cosh,
+        "tanh": d_tanh,
+        "log": d_log,
+        "ln": d_log,
+        "log10": lambda x: _d(x).log10(),
+        "sqrt": lambda x: _d(x).sqrt(),
+        "abs": abs,
+        "pow": pow,
+        "factorial": precise_factorial,
+        "nCr": ncr,
+        "nPr": npr,
+        "exp": lambda x: _d(x).exp(),
+        "rad": lambda x: _d(x) * pi / 180,
+        "deg": lambda x: _d(x) * 180 / pi,
+    })
+
+
+# ---------------- evaluator ----------------
+class PreciseEvaluator(Evaluator):
+    def __init__(self, angle_mode: str = "DEG", precision: int = 50,
+                 budget: Budget = DEFAULT_BUDGET):
+        if not 1 <= precision <= MAX_PRECISION:
+            raise BudgetError(f"precision must be between 1 and {MAX_PRECISION} digits")
+        super().__init__(precise_table(angle_mode, precision), budget)
+        self.precision = precision
+        self._guards = {precise_factorial: (1, self.factorial), pow: (2, self.power),
+                        ncr: (2, self._binomial(ncr)), npr: (2, self._binomial(npr))}
+
+    def evaluate(self, node: Node, env: Optional[Mapping] = None):
+        with localcontext() as ctx:
+            ctx.prec = self.precision + GUARD_DIGITS
+            result = super().evaluate(node, env)
+            ctx.prec = self.precision
+            # exact integers (e.g. 50!) are kept whole; everything else is rounded
+            return +result if isinstance(result, Decimal) else result
+
+    def arith(self, op: str, left, right):
+        try:
+            if op == "/":
+                # keep int / int (e.g. from factorials) in Decimal instead of float
+                return _d(left) / _d(right)
+            return super().arith(op, left, right)
+        except InvalidOperation:  # 0/0, 0 % 0
+            raise CalcError("undefined result") from None
+
+    def _num(self, node: Num):
+        if type(node.value) is int:
+            return Decimal(node.value)  # also covers 0x / 0o / 0b literals
+        return Decimal(node.text) if node.text else Decimal(repr(node.value))
+
+    def lookup(self, name: str):
+        value = super().lookup(name)
+        return Decimal(repr(value)) if isinstance(value, float) else value
+
+    def power(self, base, exp):
+        if isinstance(base, int) and isinstance(exp, int):
+            return super().power(base, exp)
+        return _d(base) ** _d(exp)
+
+    def factorial(self, n):
+        n = _integral(n)
+        if n > self.budget.max_factorial:
+            raise BudgetError(f"factorial argument above {self.budget.max_factorial}")
+        return FACTORIALS.get(n)
+
+    def _binomial(self, fn):
+        def guarded(n, r):
+            if _integral(n) > self.budget.max_factorial:
+                raise BudgetError(f"argument above {self.budget.max_factorial}")
+            return fn(n, r)
+        return guarded
+
+
+def precise_eval(expr: str, angle_mode: str = "DEG", precision: int = 50,
+                 env: Optional[Mapping] = None):
+    return PreciseEvaluator(angle_mode, precision).evaluate(compile_expression(expr), env)
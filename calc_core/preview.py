@@ -0,0 +1,124 @@
+"""Live preview of the expression while it is being typed.
+
+The preview keeps three pieces of state between keypresses:
+
+* the token list -- an edit only re-tokenizes from the last token boundary;
+* parse checkpoints -- ``(token index, finished left operand)`` pairs taken by
+  the top-level operator loop, so parsing resumes after the last untouched one;
+* a memo of evaluated subtrees -- resumed parses reuse the same node objects,
+  so only the path from the newest token up to the root is evaluated again.
+
+``DEL`` simply drops the tokens and checkpoints past the edit point.
+"""
+
+from typing import Mapping, Optional
+
+from .errors import CalcError
+from .evaluator import Budget, MemoEvaluator
+from .nodes import Node
+from .parser import Parser, Token, tokenize
+
+# small enough that a preview never stalls typing (or overflows int -> str)
+PREVIEW_BUDGET = Budget(max_int_bits=1 << 13, max_exponent=10_000, max_factorial=1_000)
+
+# tokens after which an expression cannot end yet
+_OPEN_ENDED = {"+", "-", "*", "/", "//", "%", "**", "^", "(", ","}
+
+
+class _CheckpointParser(Parser):
+    def __init__(self, tokens: list, checkpoints: list):
+        super().__init__(tokens)
+        self.checkpoints = checkpoints
+
+    def mark(self, left: Node, rbp: int):
+        if rbp == 0 and self.depth == 1:
+            self.checkpoints.append((self.i, left))
+
+
+class IncrementalPreview:
+    __slots__ = ("budget", "max_memo", "_text", "_tokens", "_depths", "_body",
+                 "_checkpoints", "_memo", "_names", "_env")
+
+    def __init__(self, budget: Budget = PREVIEW_BUDGET, max_memo: int = 2048):
+        self.budget = budget
+        self.max_memo = max_memo
+        self._memo = {}
+        self._names = None
+        self._env = {}
+        self.reset()
+
+    def reset(self):
+        self._text = ""
+        self._tokens = []       # real tokens, without the end token
+        self._depths = []       # paren depth after each token
+        self._body = 0          # tokens the last parse actually used
+        self._checkpoints = []
+        self._memo.clear()
+
+    def _retokenize(self, text: str) -> int:
+        """Update the token list for ``text``; returns how many tokens survived."""
+        old = self._text
+        n = min(len(old), len(text))
+        common = 0
+        while common < n and old[common] == text[common]:
+            common += 1
+        tokens, depths = self._tokens, self._depths
+        # a token near the edit point may grow ("12" + "3", or "1.5" + "e-" + "6"
+        # which looks two characters ahead), so redo those
+        while tokens and tokens[-1].pos + len(tokens[-1].text) >= common - 2:
+            tokens.pop()
+            depths.pop()
+        kept = len(tokens)
+        start = tokens[-1].pos + len(tokens[-1].text) if tokens else 0
+        depth = depths[-1] if depths else 0
+        for tok in tokenize(text, start)[:-1]:
+            depth += (tok.text == "(") - (tok.text == ")")
+            tokens.append(tok)
+            depths.append(depth)
+        self._text = text
+        return kept
+
+    def _completed(self) -> list:
+        """Drop a dangling operator and close open parentheses so the prefix parses."""
+        body = len(self._tokens)
+        while body and self._tokens[body - 1].kind == "op" and self._tokens[body - 1].text in _OPEN_ENDED:
+            body -= 1
+        self._body = body
+        end = len(self._text)
+        depth = self._depths[body - 1] if body else 0
+        return self._tokens[:body] + [Token("op", ")", end)] * max(depth, 0) + [Token("end", "", end)]
+
+    def _parse(self, kept: int) -> Node:
+        # a checkpoint at i depends on tokens[0..i], all of which must be unchanged
+        limit = min(kept, self._body)
+        checkpoints = self._checkpoints
+        while checkpoints and checkpoints[-1][0] >= limit:
+            checkpoints.pop()
+        tokens = self._completed()
+        parser = _CheckpointParser(tokens, checkpoints)
+        if checkpoints and checkpoints[-1][0] < self._body:
+            i, left = checkpoints.pop()
+            return parser.resume(left, i)
+        checkpoints.clear()
+        return parser.parse()
+
+    def update(self, text: str, names: Mapping, env: Optional[Mapping] = None):
+        """Return the preview value of ``text``, or None if it has no value yet."""
+        if names is not self._names:
+            self._memo.clear()  # angle mode or precision changed
+            self._names = names
+        env = env or {}
+        if env != self._env:
+            self._memo.clear()  # a variable (e.g. Ans) changed
+            self._env = dict(env)
+        if len(self._memo) > self.max_memo:
+            self._memo.clear()
+        try:
+            kept = self._retokenize(text)
+            if not self._tokens:
+                return None
+            node = self._parse(kept)
+            value = MemoEvaluator(names, self.budget, self._memo).evaluate(node, env)
+        except (CalcError, ArithmeticError, ValueError, TypeError):
+            return None
+        return value if isinstance(value, (int, float, complex)) else None
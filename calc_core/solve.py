@@ -0,0 +1,316 @@
+"""SOLVE: roots of f(x) = 0, polynomial roots and small linear systems.
+
+``f`` is compiled once to closures over a function table whose entries also
+accept dual numbers, so the same compiled function yields ``f(x)`` for floats
+and ``(f(x), f'(x))`` for a ``Dual`` -- Newton gets exact derivatives without
+symbolic work or finite differences. When Newton stalls (zero slope, a
+non-differentiable function, divergence) the solver brackets a sign change
+and falls back to Brent's method, which always converges on a bracket.
+"""
+
+import math
+from typing import Mapping, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .compiler import guarded_compiler
+from .engine import compile_expression
+from .errors import CalcError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .tables import acos_deg, asin_deg, atan_deg, cos_deg, sin_deg, tan_deg
+
+_D2R = math.pi / 180.0
+# a solution must satisfy |f(x)| <= RESIDUAL_TOL·(1+|x|)
+RESIDUAL_TOL = 1e-8
+
+
+class Dual:
+    """``a + b·ε`` with ``ε² = 0``: carries a value and its derivative."""
+
+    __slots__ = ("a", "b")
+
+    def __init__(self, a, b=0.0):
+        self.a = a
+        self.b = b
+
+    def __repr__(self):
+        return f"Dual({self.a!r}, {self.b!r})"
+
+    def __add__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.a + other.a, self.b + other.b)
+        return Dual(self.a + other, self.b)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.a - other.a, self.b - other.b)
+        return Dual(self.a - other, self.b)
+
+    def __rsub__(self, other):
+        return Dual(other - self.a, -self.b)
+
+    def __mul__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.a * other.a, self.a * other.b + self.b * other.a)
+        return Dual(self.a * other, self.b * other)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if isinstance(other, Dual):
+            return Dual(self.a / other.a, (self.b * other.a - self.a * other.b) / (other.a * other.a))
+        return Dual(self.a / other, self.b / other)
+
+    def __rtruediv__(self, other):
+        return Dual(other / self.a, -other * self.b / (self.a * self.a))
+
+    def __pow__(self, other):
+        if isinstance(other, Dual):
+            value = self.a ** other.a
+            return Dual(value, value * (other.b * math.log(self.a) + other.a * self.b / self.a))
+        if other == 0:
+            return Dual(1.0, 0.0)
+        return Dual(self.a ** other, other * self.a ** (other - 1) * self.b)
+
+    def __rpow__(self, other):
+        value = other ** self.a
+        return Dual(value, value * math.log(other) * self.b if other > 0 else 0.0)
+
+    def __neg__(self):
+        return Dual(-self.a, -self.b)
+
+    def __pos__(self):
+        return self
+
+    def __abs__(self):
+        if self.a == 0:
+            # the corner of |x|: no derivative, so NaN rather than either slope
+            return Dual(abs(self.a), math.nan if self.b else 0.0)
+        return Dual(abs(self.a), self.b if self.a > 0 else -self.b)
+
+
+def _lift(fn, derivative):
+    """``fn`` extended to dual numbers via the chain rule."""
+    def lifted(x):
+        if isinstance(x, Dual):
+            return Dual(fn(x.a), derivative(x.a) * x.b)
+        return fn(x)
+    lifted.__name__ = getattr(fn, "__name__", "lifted")
+    return lifted
+
+
+# derivative of every differentiable whitelisted function, keyed by identity
+DERIVATIVES = {
+    math.sin: math.cos,
+    math.cos: lambda x: -math.sin(x),
+    math.tan: lambda x: 1.0 / math.cos(x) ** 2,
+    math.asin: lambda x: 1.0 / math.sqrt(1.0 - x * x),
+    math.acos: lambda x: -1.0 / math.sqrt(1.0 - x * x),
+    math.atan: lambda x: 1.0 / (1.0 + x * x),
+    sin_deg: lambda x: cos_deg(x) * _D2R,
+    cos_deg: lambda x: -sin_deg(x) * _D2R,
+    tan_deg: lambda x: _D2R / cos_deg(x) ** 2,
+    asin_deg: lambda x: 1.0 / (_D2R * math.sqrt(1.0 - x * x)),
+    acos_deg: lambda x: -1.0 / (_D2R * math.sqrt(1.0 - x * x)),
+    atan_deg: lambda x: 1.0 / (_D2R * (1.0 + x * x)),
+    math.sinh: math.cosh,
+    math.cosh: math.sinh,
+    math.tanh: lambda x: 1.0 - math.tanh(x) ** 2,
+    math.exp: math.exp,
+    math.log: lambda x: 1.0 / x,
+    math.log10: lambda x: 1.0 / (x * math.log(10.0)),
+    math.sqrt: lambda x: 0.5 / math.sqrt(x),
+    math.radians: lambda x: _D2R,
+    math.degrees: lambda x: 1.0 / _D2R,
+}
+
+
+def dual_table(names: Mapping) -> dict:
+    """Copy of ``names`` whose differentiable functions also accept ``Dual``."""
+    table = dict(names)
+    for name, fn in names.items():
+        if callable(fn) and fn in DERIVATIVES:
+            table[name] = _lift(fn, DERIVATIVES[fn])
+    return table
+
+
+class Solution(NamedTuple):
+    x: float
+    fx: float
+    iterations: int
+    method: str
+
+
+def compile_equation(equation: str, names: Mapping, variable: str = "x",
+                     budget: Budget = DEFAULT_BUDGET):
+    """Compile ``lhs = rhs`` (or just ``f``) to a callable of ``x`` giving ``lhs - rhs``."""
+    lhs, eq, rhs = equation.partition("=")
+    text = f"({lhs}) - ({rhs})" if eq and rhs.strip() else lhs
+    compiled = guarded_compiler(dual_table(names), (variable,), Evaluator(names, budget)).compile(
+        compile_expression(text))
+    return lambda x: compiled((x,))
+
+
+def newton(fn, x0: float, tol: float = 1e-12, maxiter: int = 50) -> Optional[Solution]:
+    """Newton's method with derivatives from dual numbers; None if it stalls."""
+    x = float(x0)
+    for i in range(1, maxiter + 1):
+        try:
+            y = fn(Dual(x, 1.0))
+        except (ArithmeticError, ValueError, TypeError):
+            return None  # left the domain, or a function without a derivative
+        if not isinstance(y, Dual):
+            return None  # f does not depend on x
+        f, df = y.a, y.b
+        if f == 0:
+            return Solution(x, 0.0, i, "newton")
+        if not df or not math.isfinite(df) or not math.isfinite(f):
+            return None
+        step = f / df
+        x -= step
+        if abs(step) <= tol * (1.0 + abs(x)):
+            return Solution(x, fn(x), i, "newton")
+    return None
+
+
+def bracket(fn, x0: float, lo: Optional[float] = None, hi: Optional[float] = None,
+            tries: int = 60) -> Optional[tuple]:
+    """An interval around a sign change of ``fn``: the given one, or found by
+    stepping outward from ``x0`` in growing steps."""
+    def value(x):
+        try:
+            y = float(fn(x))
+        except (ArithmeticError, ValueError, TypeError):
+            return math.nan
+        return y
+
+    if lo is not None and hi is not None:
+        flo, fhi = value(lo), value(hi)
+        return (lo, hi, flo, fhi) if flo * fhi <= 0 else None
+    step = max(abs(x0) * 0.1, 0.1)
+    left = right = x0
+    fleft = fright = value(x0)
+    for _ in range(tries):
+        for side in (-1, 1):
+            x = (left if side < 0 else right) + side * step
+            fx = value(x)
+            prev, fprev = (left, fleft) if side < 0 else (right, fright)
+            if math.isfinite(fx) and math.isfinite(fprev) and fx * fprev <= 0:
+                return (x, prev, fx, fprev) if side < 0 else (prev, x, fprev, fx)
+            if side < 0:
+                left, fleft = x, fx
+            else:
+                right, fright = x, fx
+        step *= 1.6
+    return None
+
+
+def brent(fn, a: float, b: float, fa: float, fb: float, tol: float = 1e-12,
+          maxiter: int = 200) -> Solution:
+    """Brent's method on a bracket ``[a, b]`` with ``fa * fb <= 0``."""
+    if fa == 0:
+        return Solution(a, 0.0, 0, "brent")
+    if fb == 0:
+        return Solution(b, 0.0, 0, "brent")
+    c, fc = a, fa
+    d = e = b - a
+    for i in range(1, maxiter + 1):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        tol1 = 2.0 * 2.2e-16 * abs(b) + 0.5 * tol
+        m = 0.5 * (c - b)
+        if abs(m) <= tol1 or fb == 0:
+            return Solution(b, fb, i, "brent")
+        if abs(e) >= tol1 and abs(fa) > abs(fb):
+            # inverse quadratic interpolation, or secant when only two points differ
+            s = fb / fa
+            if a == c:
+                p, q = 2.0 * m * s, 1.0 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2.0 * m * q * (q - r) - (b - a) * (r - 1.0))
+                q = (q - 1.0) * (r - 1.0) * (s - 1.0)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2.0 * p < min(3.0 * m * q - abs(tol1 * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = m  # interpolation rejected: bisect
+        else:
+            d = e = m
+        a, fa = b, fb
+        b += d if abs(d) > tol1 else math.copysign(tol1, m)
+        fb = float(fn(b))
+    raise CalcError("Brent's method did not converge")
+
+
+def _is_root(found: Solution) -> bool:
+    # accepted when |f(x)| <= RESIDUAL_TOL·(1+|x|); a sign change across a pole
+    # (1/x at 0) brackets a discontinuity, not a root
+    return math.isfinite(found.x) and abs(found.fx) <= RESIDUAL_TOL * (1.0 + abs(found.x))
+
+
+def solve(equation: str, names: Mapping, x0: float = 0.0, lo: Optional[float] = None,
+          hi: Optional[float] = None, variable: str = "x", tol: float = 1e-12) -> Solution:
+    """Root of ``equation`` in ``variable``: Newton from ``x0``, Brent as the fallback."""
+    fn = compile_equation(equation, names, variable)
+    if lo is None or hi is None:
+        found = newton(fn, x0, tol)
+        if found is not None and _is_root(found):
+            return found
+    found = bracket(fn, x0, lo, hi)
+    if found is None:
+        raise CalcError("no sign change found; try another initial value or range")
+    try:
+        found = brent(fn, *found, tol=tol)
+    except ArithmeticError:  # stepped exactly onto the pole
+        raise CalcError("converged to a discontinuity, not a root") from None
+    if not _is_root(found):
+        raise CalcError("converged to a discontinuity, not a root")
+    return found
+
+
+def poly_roots(coeffs: Sequence[float]) -> list:
+    """All roots of ``c0·xⁿ + … + cn`` (highest degree first) as companion-matrix eigenvalues.
+
+    Real roots come back as floats, complex ones as complex; sorted by real part.
+    """
+    c = np.trim_zeros(np.asarray(coeffs, dtype=float), "f")
+    if c.size < 2 or not np.all(np.isfinite(c)):
+        raise CalcError("need a polynomial of degree 1 or more")
+    n = c.size - 1
+    companion = np.zeros((n, n))
+    companion[0, :] = -c[1:] / c[0]
+    companion[1:, :-1] = np.eye(n - 1)
+    roots = np.linalg.eigvals(companion)
+    # one Newton step on the original polynomial tightens the eigenvalue roots
+    dc = np.polyder(c)
+    slope = np.polyval(dc, roots)
+    safe = slope != 0
+    roots[safe] -= np.polyval(c, roots[safe]) / slope[safe]
+    out = []
+    for r in sorted(roots, key=lambda z: (z.real, z.imag)):
+        if abs(r.imag) <= 1e-9 * max(1.0, abs(r)):
+            out.append(float(r.real))
+        else:
+            out.append(complex(r))
+    return out
+
+
+def linear_solve(matrix: Sequence[Sequence[float]], rhs: Sequence[float]) -> list:
+    """Solution of the square system ``matrix · x = rhs``."""
+    a = np.asarray(matrix, dtype=float)
+    b = np.asarray(rhs, dtype=float)
+    if a.ndim != 2 or a.shape[0] != a.shape[1] or b.shape != (a.shape[0],):
+        raise CalcError("need an n×n matrix and n right-hand sides")
+    try:
+        return np.linalg.solve(a, b).tolist()
+    except np.linalg.LinAlgError:
+        raise CalcError("the system has no unique solution") from None
@@ -0,0 +1,197 @@
+"""Compact per-session calculator state.
+
+Streamlit keeps one of these per browser session instead of a handful of loose
+``st.session_state`` keys. Results stay in their native numeric form; only a
+short display string is kept alongside, so a huge ``factorial`` result is never
+stored (or re-rendered) as a multi-megabyte string. History is a fixed-size
+ring buffer, so per-session memory is bounded.
+"""
+
+from decimal import Decimal, localcontext
+from typing import Iterator, Tuple
+
+from .basen import Word, format_radix
+from .cmplx import format_complex
+from .definitions import Definitions
+
+DISPLAY_DIGITS = 120
+HISTORY_SIZE = 50
+MAX_EXPR_CHARS = 500
+
+
+def _int_scientific(n: int, sig: int = 15) -> str:
+    """Leading digits and exponent of a huge int without converting all of it to text."""
+    sign = "-" if n < 0 else ""
+    n = abs(n)
+    shift = max(n.bit_length() - 64, 0)
+    with localcontext() as ctx:
+        ctx.prec = sig + 25  # enough headroom for shifts of millions of bits
+        log10 = Decimal(n >> shift).log10() + shift * Decimal(2).log10()
+        exp = int(log10)
+        mantissa = (10 ** (log10 - exp)).quantize(Decimal(1).scaleb(1 - sig))
+    if mantissa >= 10:  # rounding pushed us over
+        mantissa, exp = (mantissa / 10).quantize(Decimal(1).scaleb(1 - sig)), exp + 1
+    return f"{sign}{mantissa}e+{exp}"
+
+
+def format_result(value, max_digits: int = DISPLAY_DIGITS) -> Tuple[str, bool]:
+    """Return ``(text, exact)``; ``exact`` is False when the text was shortened."""
+    if isinstance(value, bool):
+        return str(value), True
+    if isinstance(value, int):
+        # bit_length * log10(2) is a cheap upper bound on the digit count
+        if value.bit_length() * 0.30103 < max_digits:
+            return str(value), True
+        return _int_scientific(value), False
+    if isinstance(value, complex):
+        # parts are rounded to 15 digits and "2i" does not parse, so never exact
+        return format_complex(value), False
+    if isinstance(value, Decimal):
+        text = str(value)
+        if len(text) <= max_digits + 8:
+            return text, True
+        return f"{value:.{max_digits - 1}E}", False
+    text = str(value)
+    if len(text) <= max_digits + 8:
+        return text, True
+    return text[:max_digits] + "…", False
+
+
+class History:
+    """Fixed-capacity ring buffer of ``(expr, result_text)`` pairs."""
+
+    __slots__ = ("capacity", "_items", "_next", "_size")
+
+    def __init__(self, capacity: int = HISTORY_SIZE):
+        self.capacity = capacity
+        self._items = [None] * capacity
+        self._next = 0
+        self._size = 0
+
+    def append(self, expr: str, result_text: str):
+        if len(expr) > MAX_EXPR_CHARS:
+            expr = expr[:MAX_EXPR_CHARS] + "…"
+        self._items[self._next] = (expr, result_text)
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def __len__(self):
+        return self._size
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        """Oldest to newest."""
+        start = (self._next - self._size) % self.capacity
+        for i in range(self._size):
+            yield self._items[(start + i) % self.capacity]
+
+    def latest(self, n: int = 10) -> list:
+        """Up to ``n`` entries, newest first."""
+        out = []
+        for i in range(1, min(n, self._size) + 1):
+            out.append(self._items[(self._next - i) % self.capacity])
+        return out
+
+    def clear(self):
+        self._items = [None] * self.capacity
+        self._next = self._size = 0
+
+
+class CalcState:
+    __slots__ = (
+        "expr",            # expression being edited
+        "last",            # last result, native (int / float / Decimal / complex) or None
+        "last_text",       # display form of ``last`` (possibly shortened)
+        "memory",
+        "angle_mode",      # "DEG" or "RAD"
+        "mode",            # calculator mode: "COMP", "CMPLX", "BASE-N", "TABLE", ...
+        "complex_format",  # CMPLX display: "a+bi" or "r∠θ"
+        "radix",           # BASE-N entry and display radix: 16, 10, 8 or 2
+        "word",            # BASE-N word width and signedness (basen.Word)
+        "shift",           # SHIFT functional toggle
+        "precision",       # significant digits; 0 = float mode
+        "history",
+        "pending",         # Future of an evaluation running on the worker pool
+        "keypad_version",  # bumped whenever the server rewrites expr for the client keypad
+        "preview",         # IncrementalPreview, created lazily by the app
+        "matrices",        # matrix.MatrixStore (NumPy arrays), created on first use
+        "variables",       # named values visible to expressions (STAT results, ...)
+        "definitions",     # user variables and functions (A=3, f(x)=...), see definitions.py
+    )
+
+    def __init__(self, angle_mode: str = "DEG", history_size: int = HISTORY_SIZE):
+        self.expr = ""
+        self.last = None
+        self.last_text = ""
+        self.memory = 0.0
+        self.angle_mode = angle_mode
+        self.mode = "COMP"
+        self.complex_format = "a+bi"
+        self.radix = 10
+        self.word = Word(32, True)
+        self.shift = False
+        self.precision = 0
+        self.history = History(history_size)
+        self.pending = None
+        self.keypad_version = 0
+        self.preview = None
+        self.matrices = None
+        self.variables = {}
+        self.definitions = Definitions()
+
+    @property
+    def env(self) -> dict:
+        """Variables visible to expressions (``Ans`` refers to the last result)."""
+        variables = self.variables
+        if self.definitions.values:
+            variables = {**variables, **self.definitions.values}
+        if self.last is None:
+            return variables
+        return {**variables, "Ans": self.last}
+
+    def format(self, value) -> Tuple[str, bool]:
+        """``format_result``, with complex values in this session's CMPLX format
+        and integers in the BASE-N radix."""
+        if isinstance(value, complex):
+            return format_complex(value, self.complex_format == "r∠θ", self.angle_mode), False
+        if self.mode == "BASE-N" and type(value) is int:
+            text = format_radix(value, self.radix, self.word)
+            if len(text) <= DISPLAY_DIGITS + 8:
+                return text, True
+            return text[:DISPLAY_DIGITS] + "…", False
+        return format_result(value)
+
+    def set_result(self, value):
+        """Record an evaluation: keep the value, its display text and a history entry."""
+        text, exact = self.format(value)
+        self.history.append(self.expr, text)
+        self.last = value
+        self.last_text = text
+        # continue from the result; big results are referenced by name, not copied
+        self.expr = text if exact else "Ans"
+
+    def restore(self, recent, registers: dict):
+        """Reload a saved session: ``recent`` history newest first, and the
+        registers (``M``, ``Ans`` and the variables ``A``–``F``, ``X``, ``Y``)."""
+        for expr, text in reversed(recent[:self.history.capacity]):
+            self.history.append(expr, text)
+        registers = dict(registers)
+        self.memory = registers.pop("M", self.memory)
+        last = registers.pop("Ans", None)
+        if last is not None:
+            self.last = last
+            self.last_text = self.format(last)[0]
+        self.variables = {**self.variables, **registers}
+
+    def define(self, definition) -> list:
+        """Add or replace a user definition; a stored variable of that name gives way.
+
+        Returns the invalidated names (the definition and its dependents)."""
+        dirty = self.definitions.define(definition)
+        if definition.name in self.variables:
+            self.variables = {k: v for k, v in self.variables.items() if k != definition.name}
+        return dirty
+
+    def clear(self):
+        self.expr = ""
+        self.last = None
+        self.last_text = ""
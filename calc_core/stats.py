@@ -0,0 +1,223 @@
+"""STAT mode: single-pass, chunked statistics and regressions.
+
+Data arrives in chunks (a pasted column, or a CSV read ``chunksize`` rows at a
+time) and is folded into a ``StatAccumulator``: each chunk's moments are
+computed with NumPy and merged with Chan's parallel form of Welford's update,
+so the mean and variance stay accurate for large, offset data and memory does
+not grow with the row count. Quantiles come from a fixed-size uniform
+reservoir sample (exact until the reservoir fills).
+"""
+
+import math
+from typing import Iterable, NamedTuple, Optional
+
+import numpy as np
+
+from .errors import CalcError
+
+RESERVOIR = 1 << 16
+REGRESSIONS = ("linear", "quadratic", "exponential")
+# every name Stats.variables() can produce, so a new result replaces all of the old one
+STAT_VARIABLES = frozenset((
+    "n", "x̄", "xbar", "σx", "sigmax", "sx", "Σx", "sumx", "Σx2", "sumx2", "minX", "maxX",
+    "Q1", "med", "Q3", "ȳ", "ybar", "σy", "sigmay", "sy", "Σy", "sumy", "Σxy", "sumxy",
+    "r", "a", "b", "c",
+))
+
+
+class _Moments:
+    """Count, means, centred second moments and co-moment of ``(x, y)``."""
+
+    __slots__ = ("n", "mx", "my", "m2x", "m2y", "cxy")
+
+    def __init__(self):
+        self.n = 0
+        self.mx = self.my = self.m2x = self.m2y = self.cxy = 0.0
+
+    def merge(self, x: np.ndarray, y: np.ndarray):
+        nb = x.size
+        if not nb:
+            return
+        mxb, myb = float(x.mean()), float(y.mean())
+        dx, dy = x - mxb, y - myb
+        na, n = self.n, self.n + nb
+        delta_x, delta_y = mxb - self.mx, myb - self.my
+        # Chan et al.: combine two partial results without revisiting either
+        self.m2x += float(dx @ dx) + delta_x * delta_x * na * nb / n
+        self.m2y += float(dy @ dy) + delta_y * delta_y * na * nb / n
+        self.cxy += float(dx @ dy) + delta_x * delta_y * na * nb / n
+        self.mx += delta_x * nb / n
+        self.my += delta_y * nb / n
+        self.n = n
+
+    def slope(self) -> Optional[float]:
+        return self.cxy / self.m2x if self.m2x > 0 else None
+
+
+class Stats(NamedTuple):
+    n: int
+    mean_x: float
+    sigma_x: float          # population standard deviation
+    s_x: float              # sample standard deviation
+    sum_x: float
+    sum_x2: float
+    min_x: float
+    max_x: float
+    q1: float
+    median: float
+    q3: float
+    exact_quantiles: bool
+    paired: bool
+    mean_y: float
+    sigma_y: float
+    s_y: float
+    sum_y: float
+    sum_xy: float
+    r: Optional[float]
+    linear: Optional[tuple]       # (a, b): y = a + b·x
+    quadratic: Optional[tuple]    # (a, b, c): y = a + b·x + c·x²
+    exponential: Optional[tuple]  # (a, b): y = a·e^(b·x)
+
+    def variables(self, regression: str = "linear") -> dict:
+        """STAT results as expression variables (Unicode and ASCII spellings)."""
+        out = {
+            "n": self.n, "x̄": self.mean_x, "xbar": self.mean_x,
+            "σx": self.sigma_x, "sigmax": self.sigma_x, "sx": self.s_x,
+            "Σx": self.sum_x, "sumx": self.sum_x, "Σx2": self.sum_x2, "sumx2": self.sum_x2,
+            "minX": self.min_x, "maxX": self.max_x, "Q1": self.q1, "med": self.median, "Q3": self.q3,
+        }
+        if self.paired:
+            out.update({
+                "ȳ": self.mean_y, "ybar": self.mean_y, "σy": self.sigma_y, "sigmay": self.sigma_y,
+                "sy": self.s_y, "Σy": self.sum_y, "sumy": self.sum_y, "Σxy": self.sum_xy, "sumxy": self.sum_xy,
+            })
+            if self.r is not None:
+                out["r"] = self.r
+            coeffs = getattr(self, regression)
+            if coeffs is not None:
+                out.update(zip("abc", coeffs))
+        return out
+
+
+class StatAccumulator:
+    """Folds chunks of ``x`` (and optionally paired ``y``) into running statistics."""
+
+    __slots__ = ("paired", "_xy", "_logy", "_shift", "_power", "_cross", "_sum_x",
+                 "_sum_y", "_min", "_max", "_reservoir", "_filled", "_rng", "_nonpositive")
+
+    def __init__(self, paired: bool = False, reservoir: int = RESERVOIR, seed: Optional[int] = None):
+        self.paired = paired
+        self._xy = _Moments()
+        self._logy = _Moments()     # (x, ln y) for the exponential fit
+        self._shift = None          # x offset for the quadratic power sums
+        self._power = np.zeros(5)   # Σu^k, k = 0..4 with u = x - shift
+        self._cross = np.zeros(3)   # Σu^k·y, k = 0..2
+        self._sum_x = self._sum_y = 0.0
+        self._min, self._max = math.inf, -math.inf
+        self._reservoir = np.empty(reservoir)
+        self._filled = 0
+        self._rng = np.random.default_rng(seed)
+        self._nonpositive = 0
+
+    @property
+    def n(self) -> int:
+        return self._xy.n
+
+    def update(self, x, y=None):
+        """Fold one chunk in; rows with a missing value are skipped."""
+        x = np.asarray(x, dtype=float).ravel()
+        if self.paired:
+            if y is None:
+                raise CalcError("paired data needs a y column")
+            y = np.asarray(y, dtype=float).ravel()
+            if y.shape != x.shape:
+                raise CalcError("x and y columns differ in length")
+            ok = np.isfinite(x) & np.isfinite(y)
+            x, y = x[ok], y[ok]
+        else:
+            x = x[np.isfinite(x)]
+            y = np.zeros_like(x)
+        if not x.size:
+            return
+        seen = self._xy.n
+        self._xy.merge(x, y)
+        self._sum_x += float(x.sum())
+        self._min = min(self._min, float(x.min()))
+        self._max = max(self._max, float(x.max()))
+        self._sample(x, seen)
+        if self.paired:
+            self._sum_y += float(y.sum())
+            if self._shift is None:
+                self._shift = float(x.mean())
+            u = x - self._shift
+            powers = np.vander(u, 5, increasing=True)  # 1, u, u², u³, u⁴
+            self._power += powers.sum(axis=0)
+            self._cross += powers[:, :3].T @ y
+            positive = y > 0
+            self._nonpositive += int((~positive).sum())
+            self._logy.merge(x[positive], np.log(y[positive]))
+
+    def _sample(self, x: np.ndarray, seen: int):
+        """Algorithm R, vectorized over the chunk."""
+        size = self._reservoir.size
+        take = min(size - self._filled, x.size)
+        if take > 0:
+            self._reservoir[self._filled:self._filled + take] = x[:take]
+            self._filled += take
+        rest = x[take:]
+        if rest.size:
+            # item i (0-based overall) replaces a random slot with probability size/(i+1)
+            index = np.arange(seen + take, seen + take + rest.size)
+            slots = (self._rng.random(rest.size) * (index + 1)).astype(np.int64)
+            keep = slots < size
+            self._reservoir[slots[keep]] = rest[keep]
+
+    def _quadratic(self) -> Optional[tuple]:
+        s, t = self._power, self._cross
+        gram = np.array([[s[0], s[1], s[2]], [s[1], s[2], s[3]], [s[2], s[3], s[4]]])
+        try:
+            alpha, beta, gamma = np.linalg.solve(gram, t)
+        except np.linalg.LinAlgError:
+            return None
+        c = self._shift
+        # back from u = x - shift to x
+        return (float(alpha - beta * c + gamma * c * c), float(beta - 2 * gamma * c), float(gamma))
+
+    def result(self) -> Stats:
+        m = self._xy
+        if not m.n:
+            raise CalcError("no data")
+        n = m.n
+        sample = self._reservoir[:self._filled]
+        q1, median, q3 = (float(v) for v in np.percentile(sample, [25, 50, 75]))
+        sum_x2 = m.m2x + n * m.mx * m.mx
+        linear = quadratic = exponential = r = None
+        if self.paired:
+            b = m.slope()
+            if b is not None:
+                linear = (m.my - b * m.mx, b)
+                if m.m2y > 0:
+                    r = m.cxy / math.sqrt(m.m2x * m.m2y)
+            if n >= 3:
+                quadratic = self._quadratic()
+            lb = self._logy.slope()
+            if not self._nonpositive and lb is not None:
+                exponential = (math.exp(self._logy.my - lb * self._logy.mx), lb)
+        return Stats(
+            n=n, mean_x=m.mx, sigma_x=math.sqrt(m.m2x / n), s_x=math.sqrt(m.m2x / (n - 1)) if n > 1 else math.nan,
+            sum_x=self._sum_x, sum_x2=sum_x2, min_x=self._min, max_x=self._max,
+            q1=q1, median=median, q3=q3, exact_quantiles=n <= self._reservoir.size,
+            paired=self.paired, mean_y=m.my if self.paired else math.nan,
+            sigma_y=math.sqrt(m.m2y / n) if self.paired else math.nan,
+            s_y=math.sqrt(m.m2y / (n - 1)) if self.paired and n > 1 else math.nan,
+            sum_y=self._sum_y, sum_xy=m.cxy + n * m.mx * m.my if self.paired else math.nan,
+            r=r, linear=linear, quadratic=quadratic, exponential=exponential,
+        )
+
+
+def accumulate(chunks: Iterable, x: str, y: Optional[str] = None, **kwargs) -> Stats:
+    """Statistics over an iterable of column mappings (e.g. ``pd.read_csv(..., chunksize=...)``)."""
+    acc = StatAccumulator(paired=y is not None, **kwargs)
+    for chunk in chunks:
+        acc.update(chunk[x], chunk[y] if y is not None else None)
+    return acc.result()
@@ -0,0 +1,214 @@
+"""Persistent history, memory registers and saved formulas in SQLite.
+
+One ``Store`` per server process holds a WAL-mode database shared by all
+sessions. Writes are queued and applied by a background thread in batched
+transactions (one ``executemany`` per run of identical statements), so an
+``=`` press only appends to a queue and never waits on disk; WAL lets the
+script threads read while the writer commits.
+
+Reads are index-backed: the first page of a user's history is a reverse scan of
+``(user, id)`` and prefix search is a range scan of ``(user, expr)``
+(``expr >= prefix AND expr < prefix || U+10FFFF``) rather than a ``LIKE``.
+"""
+
+import atexit
+import itertools
+import queue
+import sqlite3
+import threading
+import time
+from decimal import Decimal
+from typing import Optional
+
+from .errors import CalcError
+
+REGISTERS = ("M", "A", "B", "C", "D", "E", "F", "X", "Y", "Ans")
+MAX_HISTORY = 10_000     # rows kept per user
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id      INTEGER PRIMARY KEY,
+    user    TEXT NOT NULL,
+    expr    TEXT NOT NULL,
+    result  TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_recent ON history (user, id);
+CREATE INDEX IF NOT EXISTS history_prefix ON history (user, expr, id);
+CREATE TABLE IF NOT EXISTS registers (
+    user  TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    kind  TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (user, name)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS formulas (
+    user TEXT NOT NULL,
+    name TEXT NOT NULL,
+    expr TEXT NOT NULL,
+    PRIMARY KEY (user, name)
+) WITHOUT ROWID;
+"""
+
+_ADD_HISTORY = "INSERT INTO history (user, expr, result, created) VALUES (?, ?, ?, ?)"
+_SET_REGISTER = "INSERT OR REPLACE INTO registers (user, name, kind, value) VALUES (?, ?, ?, ?)"
+_SAVE_FORMULA = "INSERT OR REPLACE INTO formulas (user, name, expr) VALUES (?, ?, ?)"
+_DELETE_FORMULA = "DELETE FROM formulas WHERE user = ? AND name = ?"
+_PRUNE = """DELETE FROM history WHERE user = ? AND id <= (
+    SELECT id FROM history WHERE user = ? ORDER BY id DESC LIMIT 1 OFFSET ?)"""
+_CLEAR_HISTORY = "DELETE FROM history WHERE user = ?"
+
+_STOP = object()
+
+
+# ---------------- register values ----------------
+def encode(value) -> tuple:
+    """``(kind, text)`` for a register value; ints are stored in hex (no digit limit)."""
+    if isinstance(value, bool):
+        value = int(value)
+    if type(value) is int:
+        return "int", format(value, "x")
+    if isinstance(value, complex):
+        return "complex", repr(value)
+    if isinstance(value, Decimal):
+        return "decimal", str(value)
+    if isinstance(value, float):
+        return "float", repr(value)
+    raise CalcError(f"cannot store a {type(value).__name__}")
+
+
+def decode(kind: str, text: str):
+    if kind == "int":
+        return int(text, 16)
+    if kind == "complex":
+        return complex(text)
+    if kind == "decimal":
+        return Decimal(text)
+    return float(text)
+
+
+class Store:
+    """SQLite-backed per-user history, registers and formulas with a batching writer."""
+
+    def __init__(self, path: str, flush_interval: float = 0.2, max_batch: int = 500,
+                 max_history: int = MAX_HISTORY):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_history = max_history
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        conn = self._connect()
+        conn.executescript(SCHEMA)
+        conn.close()
+        self._writer = threading.Thread(target=self._run, name="calc-store-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10.0, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")  # durable at checkpoints; plenty for history
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        # sqlite3 connections belong to one thread: one reader per script thread
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ---------------- writes (queued) ----------------
+    def add_history(self, user: str, expr: str, result: str):
+        self._queue.put((_ADD_HISTORY, (user, expr, result, time.time())))
+
+    def set_register(self, user: str, name: str, value):
+        if name not in REGISTERS:
+            raise CalcError(f"unknown register {name!r}")
+        self._queue.put((_SET_REGISTER, (user, name) + encode(value)))
+
+    def save_formula(self, user: str, name: str, expr: str):
+        self._queue.put((_SAVE_FORMULA, (user, name, expr)))
+
+    def delete_formula(self, user: str, name: str):
+        self._queue.put((_DELETE_FORMULA, (user, name)))
+
+    def clear_history(self, user: str):
+        self._queue.put((_CLEAR_HISTORY, (user,)))
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        self._queue.join()
+
+    def close(self):
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def _run(self):
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            # gather whatever else arrives within the interval, up to max_batch writes
+            deadline = time.monotonic() + self.flush_interval
+            while item is not _STOP and len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                batch.append(item)
+            writes = [w for w in batch if w is not _STOP]
+            try:
+                self._commit(conn, writes)
+            except sqlite3.Error as exc:
+                self.errors += 1
+                self.last_error = str(exc)
+            for _ in batch:
+                self._queue.task_done()
+            if len(writes) != len(batch):
+                conn.close()
+                return
+
+    def _commit(self, conn: sqlite3.Connection, writes: list):
+        if not writes:
+            return
+        users = {params[0] for sql, params in writes if sql is _ADD_HISTORY}
+        conn.execute("BEGIN")
+        try:
+            for sql, group in itertools.groupby(writes, key=lambda w: w[0]):
+                conn.executemany(sql, [params for _, params in group])
+            for user in users:
+                conn.execute(_PRUNE, (user, user, self.max_history))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # ---------------- reads ----------------
+    def recent(self, user: str, limit: int = 50) -> list:
+        """The newest ``limit`` ``(expr, result)`` pairs, newest first."""
+        return self._reader().execute(
+            "SELECT expr, result FROM history WHERE user = ? ORDER BY id DESC LIMIT ?",
+            (user, limit)).fetchall()
+
+    def search(self, user: str, prefix: str, limit: int = 20) -> list:
+        """Distinct past expressions starting with ``prefix``, each with its latest result."""
+        return [(expr, result) for expr, result, _ in self._reader().execute(
+            "SELECT expr, result, max(id) FROM history WHERE user = ? AND expr >= ? AND expr < ?"
+            " GROUP BY expr ORDER BY expr LIMIT ?",
+            (user, prefix, prefix + "\U0010ffff", limit))]
+
+    def registers(self, user: str) -> dict:
+        return {name: decode(kind, value) for name, kind, value in self._reader().execute(
+            "SELECT name, kind, value FROM registers WHERE user = ?", (user,))}
+
+    def formulas(self, user: str) -> list:
+        return self._reader().execute(
+            "SELECT name, expr FROM formulas WHERE user = ? ORDER BY name", (user,)).fetchall()
+
+    def session(self, user: str, history: int = 50) -> tuple:
+        """Everything a new session shows at once: recent history, registers, formulas."""
+        return self.recent(user, history), self.registers(user), self.formulas(user)
@@ -0,0 +1,98 @@
+"""TABLE mode: f(x) / g(x) value tables produced lazily.
+
+Both functions are compiled once to closures; rows are computed on demand from
+the row index (``x = start + i * step``), so a page deep into a million-row
+table costs the same as the first one and nothing is ever materialized.
+"""
+
+import csv
+import math
+from itertools import islice
+from typing import Iterator, Mapping, Optional, TextIO
+
+from .compiler import guarded_compiler
+from .engine import compile_expression
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .errors import CalcError
+
+MAX_ROWS = 10_000_000
+# a download is handed to the browser as one blob, so exports stay well below
+# MAX_ROWS (about 10 MB of CSV)
+MAX_EXPORT_ROWS = 250_000
+FIELDS = ("x", "f(x)", "g(x)")
+
+
+def row_count(start: float, end: float, step: float) -> int:
+    """Number of x values from ``start`` to ``end`` inclusive."""
+    if step == 0 or not all(math.isfinite(v) for v in (start, end, step)):
+        raise CalcError("step must be a finite non-zero number")
+    if (end - start) / step < 0:
+        raise CalcError("step points away from the end value")
+    # tolerate float fuzz so 0..1 step 0.1 includes 1.0
+    return int(math.floor((end - start) / step + 1e-9)) + 1
+
+
+class ValueTable:
+    """Lazy table of ``f(x)`` (and optionally ``g(x)``) over an arithmetic range."""
+
+    __slots__ = ("f_expr", "g_expr", "start", "step", "size", "_f", "_g")
+
+    def __init__(self, f_expr: str, names: Mapping, start: float, end: float, step: float,
+                 g_expr: str = "", budget: Budget = DEFAULT_BUDGET, max_rows: int = MAX_ROWS):
+        self.size = row_count(start, end, step)
+        if self.size > max_rows:
+            raise CalcError(f"table has more than {max_rows} rows")
+        self.f_expr = f_expr
+        self.g_expr = g_expr
+        self.start = start
+        self.step = step
+        evaluator = Evaluator(names, budget)
+        compiler = guarded_compiler(names, ("x",), evaluator)
+        self._f = compiler.compile(compile_expression(f_expr))
+        self._g = compiler.compile(compile_expression(g_expr)) if g_expr.strip() else None
+
+    def __len__(self):
+        return self.size
+
+    def x_at(self, i: int) -> float:
+        # computed from the index rather than accumulated, so no drift
+        return self.start + i * self.step
+
+    @staticmethod
+    def _value(fn, x) -> Optional[float]:
+        try:
+            return fn((x,))
+        except (CalcError, ArithmeticError, ValueError, TypeError):
+            return None  # shown as an empty cell, like the fx "ERROR" entry
+
+    def rows(self, first: int = 0, count: Optional[int] = None) -> Iterator[tuple]:
+        """Yield ``(x, f(x), g(x))`` rows starting at index ``first``."""
+        stop = self.size if count is None else min(self.size, first + count)
+        f, g, value = self._f, self._g, self._value
+        for i in range(max(first, 0), stop):
+            x = self.x_at(i)
+            yield x, value(f, x), value(g, x) if g is not None else None
+
+    def page(self, number: int, size: int = 50) -> list:
+        """Rows of page ``number`` (0-based)."""
+        return list(self.rows(number * size, size))
+
+    def pages(self, size: int = 50) -> int:
+        return max(math.ceil(self.size / size), 1)
+
+    def write_csv(self, out: TextIO, chunk: int = 10_000, max_rows: int = MAX_EXPORT_ROWS) -> int:
+        """Stream every row to ``out`` in chunks; returns the number of rows written."""
+        if self.size > max_rows:
+            raise CalcError(f"tables of more than {max_rows:,} rows cannot be exported")
+        writer = csv.writer(out)
+        writer.writerow(FIELDS if self._g is not None else FIELDS[:2])
+        rows = self.rows()
+        written = 0
+        while True:
+            block = list(islice(rows, chunk))
+            if not block:
+                return written
+            if self._g is None:
+                block = [row[:2] for row in block]
+            writer.writerows(block)
+            written += len(block)
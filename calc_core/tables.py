@@ -0,0 +1,86 @@
+"""Whitelisted function tables, one per angle mode.
+
+Both tables are built once at import and frozen, so an evaluation only has to
+pick the table for its angle mode; nothing reads Streamlit session state inside
+the hot loop and the tables are safe to share between threads.
+"""
+
+import math
+from math import factorial
+from types import MappingProxyType
+
+
+# Trig in DEG mode: convert degrees -> radians for sin/cos/tan,
+# and inverse trig returns degrees.
+def sin_deg(x):
+    return math.sin(math.radians(x))
+
+
+def cos_deg(x):
+    return math.cos(math.radians(x))
+
+
+def tan_deg(x):
+    return math.tan(math.radians(x))
+
+
+def asin_deg(x):
+    return math.degrees(math.asin(x))
+
+
+def acos_deg(x):
+    return math.degrees(math.acos(x))
+
+
+def atan_deg(x):
+    return math.degrees(math.atan(x))
+
+
+# names that do not depend on the angle mode
+BASE = {
+    "pi": math.pi,
+    "e": math.e,
+    "sinh": math.sinh,
+    "cosh": math.cosh,
+    "tanh": math.tanh,
+    "log": math.log,      # natural
+    "ln": math.log,
+    "log10": math.log10,
+    "sqrt": math.sqrt,
+    "abs": abs,
+    "pow": pow,
+    "factorial": factorial,
+    "exp": math.exp,
+    "rad": math.radians,
+    "deg": math.degrees,
+}
+
+DEG = MappingProxyType({
+    **BASE,
+    "sin": sin_deg,
+    "cos": cos_deg,
+    "tan": tan_deg,
+    "asin": asin_deg,
+    "acos": acos_deg,
+    "atan": atan_deg,
+})
+
+RAD = MappingProxyType({
+    **BASE,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "asin": math.asin,
+    "acos": math.acos,
+    "atan": math.atan,
+})
+
+TABLES = MappingProxyType({"DEG": DEG, "RAD": RAD})
+
+
+def function_table(angle_mode: str):
+    """Return the frozen name table for ``"DEG"`` or ``"RAD"``."""
+    try:
+        return TABLES[angle_mode]
+    except KeyError:
+        raise ValueError(f"unknown angle mode {angle_mode!r}") from None
@@ -0,0 +1,437 @@
+"""CONV and CONST: unit conversion and CODATA physical constants.
+
+Units form a graph whose edges are their defining relations (1 ft = 12 in,
+1 in = 2.54 cm, 1 °C = 1 K + 273.15, ...). At import the graph is closed, with
+exact fractions, into a dense all-pairs table of ``(scale, offset)`` pairs, so
+converting between any two units is one list index.
+
+Unit-tagged expressions such as ``3 km + 200 m`` are read by a parser subclass
+that takes ``<number> <unit>`` as a product, and their dimensions are inferred
+over the AST as soon as they are parsed: ``3 km + 2 s`` is a ``ParseError``
+before anything is evaluated. Evaluation is then plain float arithmetic in SI
+units, with each unit and constant bound to its SI value.
+"""
+
+import math
+from collections import deque
+from fractions import Fraction as F
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Optional
+
+from .cache import LRUCache
+from .engine import normalize
+from .errors import CalcError, ParseError
+from .evaluator import DEFAULT_BUDGET, Budget, Evaluator
+from .nodes import BinOp, Call, Factorial, Name, Node, Num, Unary
+from .parser import _INFIX, Parser, Token, tokenize
+from .tables import TABLES
+
+# ---------------- dimensions ----------------
+# exponents of the SI base units m, kg, s, A, K, mol
+BASE_UNITS = ("m", "kg", "s", "A", "K", "mol")
+NONE = (0, 0, 0, 0, 0, 0)
+
+
+def _dim(m=0, kg=0, s=0, A=0, K=0, mol=0) -> tuple:
+    return (m, kg, s, A, K, mol)
+
+
+def _mul(a: tuple, b: tuple) -> tuple:
+    return tuple(x + y for x, y in zip(a, b))
+
+
+def _div(a: tuple, b: tuple) -> tuple:
+    return tuple(x - y for x, y in zip(a, b))
+
+
+def _scale(a: tuple, n: int) -> tuple:
+    return tuple(x * n for x in a)
+
+
+_SUPERSCRIPT = str.maketrans("-0123456789", "⁻⁰¹²³⁴⁵⁶⁷⁸⁹")
+
+
+def format_dim(dim: tuple) -> str:
+    """``kg·m²·s⁻²`` style text for a dimension (``1`` for dimensionless)."""
+    parts = [name + (str(n).translate(_SUPERSCRIPT) if n != 1 else "")
+             for name, n in sorted(zip(BASE_UNITS, dim), key=lambda p: p[1] < 0) if n]
+    return "·".join(parts) or "1"
+
+
+# ---------------- unit graph ----------------
+# coherent SI units: (name, label, dimension); each is its dimension's root
+_SI = (
+    ("m", "m", _dim(m=1)),
+    ("kg", "kg", _dim(kg=1)),
+    ("s", "s", _dim(s=1)),
+    ("A", "A", _dim(A=1)),
+    ("K", "K", _dim(K=1)),
+    ("mol", "mol", _dim(mol=1)),
+    ("m2", "m²", _dim(m=2)),
+    ("m3", "m³", _dim(m=3)),
+    ("mps", "m/s", _dim(m=1, s=-1)),
+    ("Hz", "Hz", _dim(s=-1)),
+    ("N", "N", _dim(m=1, kg=1, s=-2)),
+    ("J", "J", _dim(m=2, kg=1, s=-2)),
+    ("W", "W", _dim(m=2, kg=1, s=-3)),
+    ("Pa", "Pa", _dim(m=-1, kg=1, s=-2)),
+    ("C", "C", _dim(s=1, A=1)),
+    ("V", "V", _dim(m=2, kg=1, s=-3, A=-1)),
+    ("ohm", "Ω", _dim(m=2, kg=1, s=-3, A=-2)),
+    ("S", "S", _dim(m=-2, kg=-1, s=3, A=2)),
+    ("Wb", "Wb", _dim(m=2, kg=1, s=-2, A=-1)),
+    ("T", "T", _dim(kg=1, s=-2, A=-1)),
+)
+
+# edges: (unit, label, scale, offset, ref) meaning  value in ref = scale · value in unit + offset
+_EDGES = (
+    ("cm", "cm", F("0.01"), 0, "m"),
+    ("mm", "mm", F("0.1"), 0, "cm"),
+    ("km", "km", F(1000), 0, "m"),
+    ("in", "in", F("2.54"), 0, "cm"),
+    ("ft", "ft", F(12), 0, "in"),
+    ("yd", "yd", F(3), 0, "ft"),
+    ("mile", "mile", F(1760), 0, "yd"),
+    ("nmile", "n mile", F(1852), 0, "m"),
+    ("au", "au", F(149597870700), 0, "m"),
+    ("pc", "pc", F(648000) / F(math.pi), 0, "au"),
+    ("cm2", "cm²", F("0.0001"), 0, "m2"),
+    ("in2", "in²", F("6.4516"), 0, "cm2"),
+    ("ft2", "ft²", F(144), 0, "in2"),
+    ("acre", "acre", F(43560), 0, "ft2"),
+    ("ha", "ha", F(10000), 0, "m2"),
+    ("L", "L", F("0.001"), 0, "m3"),
+    ("mL", "mL", F("0.001"), 0, "L"),
+    ("cm3", "cm³", F(1), 0, "mL"),
+    ("in3", "in³", F("16.387064"), 0, "cm3"),
+    ("galUS", "gal(US)", F(231), 0, "in3"),
+    ("galUK", "gal(UK)", F("4.54609"), 0, "L"),
+    ("kmh", "km/h", F(1000, 3600), 0, "mps"),
+    ("mph", "mph", F("0.44704"), 0, "mps"),
+    ("knot", "knot", F(1852, 3600), 0, "mps"),
+    ("g", "g", F("0.001"), 0, "kg"),
+    ("mg", "mg", F("0.001"), 0, "g"),
+    ("oz", "oz", F("28.349523125"), 0, "g"),
+    ("lb", "lb", F(16), 0, "oz"),
+    ("min", "min", F(60), 0, "s"),
+    ("hr", "h", F(60), 0, "min"),
+    ("day", "day", F(24), 0, "hr"),
+    ("kPa", "kPa", F(1000), 0, "Pa"),
+    ("bar", "bar", F(100000), 0, "Pa"),
+    ("atm", "atm", F(101325), 0, "Pa"),
+    ("mmHg", "mmHg", F("133.322387415"), 0, "Pa"),
+    ("kgfcm2", "kgf/cm²", F("98066.5"), 0, "Pa"),
+    ("psi", "lbf/in²", F("4.4482216152605") / F("0.00064516"), 0, "Pa"),
+    ("kgf", "kgf", F("9.80665"), 0, "N"),
+    ("lbf", "lbf", F("4.4482216152605"), 0, "N"),
+    ("kW", "kW", F(1000), 0, "W"),
+    ("hp", "hp", F(550) * F("0.3048") * F("4.4482216152605"), 0, "W"),  # 550 ft·lbf/s
+    ("kJ", "kJ", F(1000), 0, "J"),
+    ("cal", "cal", F("4.184"), 0, "J"),
+    ("kcal", "kcal", F(1000), 0, "cal"),
+    ("kgfm", "kgf·m", F("9.80665"), 0, "J"),
+    ("kWh", "kWh", F(3600), 0, "kJ"),
+    ("eV", "eV", F("1.602176634e-19"), 0, "J"),
+    ("degC", "°C", F(1), F("273.15"), "K"),
+    ("degF", "°F", F(5, 9), F(-160, 9), "degC"),
+)
+
+
+class Unit(NamedTuple):
+    name: str
+    label: str
+    dim: tuple
+    scale: float    # SI value = scale · value + offset
+    offset: float
+
+
+def _close(si, edges):
+    """All-pairs affine maps over the unit graph, composed along BFS paths."""
+    names = [name for name, _, _ in si] + [edge[0] for edge in edges]
+    if len(set(names)) != len(names):
+        raise ValueError("duplicate unit name")
+    adjacency = {name: [] for name in names}
+    for unit, _, scale, offset, ref in edges:
+        adjacency[unit].append((ref, scale, F(offset)))
+        adjacency[ref].append((unit, 1 / scale, -F(offset) / scale))
+    maps = []
+    for source in names:
+        # value in node = scale · value in source + offset
+        seen = {source: (F(1), F(0))}
+        queue = deque([source])
+        while queue:
+            node = queue.popleft()
+            s, o = seen[node]
+            for other, scale, offset in adjacency[node]:
+                if other not in seen:
+                    seen[other] = (scale * s, scale * o + offset)
+                    queue.append(other)
+        maps.append(seen)
+    return names, maps
+
+
+def _build():
+    names, maps = _close(_SI, _EDGES)
+    roots = {name: (label, dim) for name, label, dim in _SI}
+    labels = {**{name: label for name, label, _ in _SI}, **{edge[0]: edge[1] for edge in _EDGES}}
+    units = {}
+    for name, reach in zip(names, maps):
+        root = [r for r in reach if r in roots]
+        if len(root) != 1:
+            raise ValueError(f"unit {name!r} must reach exactly one SI unit")
+        scale, offset = reach[root[0]]
+        units[name] = Unit(name, labels[name], roots[root[0]][1], float(scale), float(offset))
+    index = {name: i for i, name in enumerate(names)}
+    # dense n×n table: (scale, offset) from unit i to unit j, None across dimensions
+    table = tuple(
+        tuple((float(reach[target][0]), float(reach[target][1])) if target in reach else None
+              for target in names)
+        for reach in maps
+    )
+    return MappingProxyType(units), MappingProxyType(index), table
+
+
+UNITS, UNIT_INDEX, FACTORS = _build()
+# °C and °F: not proportional to kelvin, so they convert but cannot appear in expressions
+OFFSET_UNITS = frozenset(name for name, unit in UNITS.items() if unit.offset)
+# the coherent SI unit that displays each dimension
+SI_UNITS = MappingProxyType({dim: name for name, _, dim in _SI})
+
+
+def convert(value: float, source: str, target: str) -> float:
+    """``value`` in ``source`` units expressed in ``target`` units."""
+    try:
+        entry = FACTORS[UNIT_INDEX[source]][UNIT_INDEX[target]]
+    except KeyError as exc:
+        raise CalcError(f"unknown unit {exc.args[0]!r}") from None
+    if entry is None:
+        raise CalcError(f"cannot convert {UNITS[source].label} to {UNITS[target].label}")
+    scale, offset = entry
+    return scale * value + offset
+
+
+def compatible(dim: tuple) -> list:
+    """Names of the units of dimension ``dim``."""
+    return [name for name, unit in UNITS.items() if unit.dim == dim]
+
+
+# fx-991 CONV catalog, numbered 1-40
+CONVERSIONS = (
+    ("in", "cm"), ("cm", "in"), ("ft", "m"), ("m", "ft"), ("yd", "m"), ("m", "yd"),
+    ("mile", "km"), ("km", "mile"), ("nmile", "m"), ("m", "nmile"), ("acre", "m2"), ("m2", "acre"),
+    ("galUS", "L"), ("L", "galUS"), ("galUK", "L"), ("L", "galUK"), ("pc", "km"), ("km", "pc"),
+    ("kmh", "mps"), ("mps", "kmh"), ("oz", "g"), ("g", "oz"), ("lb", "kg"), ("kg", "lb"),
+    ("atm", "Pa"), ("Pa", "atm"), ("mmHg", "Pa"), ("Pa", "mmHg"), ("hp", "kW"), ("kW", "hp"),
+    ("kgfcm2", "Pa"), ("Pa", "kgfcm2"), ("kgfm", "J"), ("J", "kgfm"), ("psi", "kPa"), ("kPa", "psi"),
+    ("degF", "degC"), ("degC", "degF"), ("J", "cal"), ("cal", "J"),
+)
+
+
+# ---------------- unit-tagged expressions ----------------
+class UnitParser(Parser):
+    """Parser that reads ``<number> <unit>`` (``3 km``) as ``3 * km``.
+
+    A power binds to the unit first: ``3 m^2`` is ``3 * m^2``, not ``(3 m)^2``.
+    """
+
+    def prefix(self, tok: Token) -> Node:
+        node = super().prefix(tok)
+        if tok.kind == "num":
+            unit = self.peek()
+            if unit.kind == "name" and unit.text in UNITS and self.tokens[self.i + 1].text != "(":
+                self.next()
+                factor = Name(unit.text)
+                if self.peek().text == "^":
+                    self.next()
+                    factor = BinOp("**", factor, self.expression(_INFIX["^"][1]))
+                node = BinOp("*", node, factor)
+        return node
+
+
+def _exponent(node: Node) -> Optional[int]:
+    """Integer value of a literal exponent such as ``2`` or ``-3``."""
+    if type(node) is Num and float(node.value).is_integer():
+        return int(node.value)
+    if type(node) is Unary and type(node.operand) is Num:
+        n = _exponent(node.operand)
+        return None if n is None else (-n if node.op == "-" else n)
+    return None
+
+
+def infer(node: Node, dims: Mapping) -> tuple:
+    """Dimension of ``node`` given the dimensions of names; ParseError if inconsistent."""
+    kind = type(node)
+    if kind is Num:
+        return NONE
+    if kind is Name:
+        if node.id in OFFSET_UNITS:
+            raise ParseError(f"{UNITS[node.id].label} is an offset scale; convert it with CONV instead")
+        return dims.get(node.id, NONE)  # functions, Ans and variables are plain numbers
+    if kind is Unary:
+        return infer(node.operand, dims)
+    if kind is Factorial:
+        if infer(node.operand, dims) != NONE:
+            raise ParseError("factorial of a quantity with units")
+        return NONE
+    if kind is Call:
+        args = [infer(arg, dims) for arg in node.args]
+        if node.func == "abs" and len(args) == 1:
+            return args[0]
+        if node.func == "sqrt" and len(args) == 1:
+            if any(n % 2 for n in args[0]):
+                raise ParseError(f"sqrt of {format_dim(args[0])} has no unit")
+            return tuple(n // 2 for n in args[0])
+        if node.func == "pow" and len(args) == 2:
+            return _power(args[0], args[1], node.args[1])
+        if any(arg != NONE for arg in args):
+            raise ParseError(f"{node.func}() needs a dimensionless argument")
+        return NONE
+    left, right = infer(node.left, dims), infer(node.right, dims)
+    op = node.op
+    if op == "*":
+        return _mul(left, right)
+    if op in ("/", "//"):
+        return _div(left, right)
+    if op == "**":
+        return _power(left, right, node.right)
+    if left != right:  # + - %
+        raise ParseError(f"cannot combine {format_dim(left)} and {format_dim(right)} with {op!r}")
+    return left
+
+
+def _power(base: tuple, exp: tuple, exp_node: Node) -> tuple:
+    if exp != NONE:
+        raise ParseError("exponents must be dimensionless")
+    if base == NONE:
+        return NONE
+    n = _exponent(exp_node)
+    if n is None:
+        raise ParseError("a quantity with units needs a whole-number literal exponent")
+    return _scale(base, n)
+
+
+class Constant(NamedTuple):
+    number: int     # fx-991 CONST number
+    name: str       # expression name
+    symbol: str
+    description: str
+    value: float    # SI
+    unit: str       # SI unit, as a unit expression
+    dim: tuple
+
+
+# fx-991 CONST catalog (CODATA 2018): (name, symbol, description, value, SI unit)
+_CONSTANTS = (
+    ("mp", "mp", "proton mass", 1.67262192369e-27, "kg"),
+    ("mn", "mn", "neutron mass", 1.67492749804e-27, "kg"),
+    ("me", "me", "electron mass", 9.1093837015e-31, "kg"),
+    ("mmu", "mμ", "muon mass", 1.883531627e-28, "kg"),
+    ("a0", "a0", "Bohr radius", 5.29177210903e-11, "m"),
+    ("h", "h", "Planck constant", 6.62607015e-34, "J*s"),
+    ("muN", "μN", "nuclear magneton", 5.0507837461e-27, "J/T"),
+    ("muB", "μB", "Bohr magneton", 9.2740100783e-24, "J/T"),
+    ("hbar", "ħ", "reduced Planck constant", 1.054571817e-34, "J*s"),
+    ("alpha", "α", "fine-structure constant", 7.2973525693e-3, "1"),
+    ("re", "re", "classical electron radius", 2.8179403262e-15, "m"),
+    ("lambdac", "λc", "Compton wavelength", 2.42631023867e-12, "m"),
+    ("gammap", "γp", "proton gyromagnetic ratio", 2.6752218744e8, "1/(s*T)"),
+    ("lambdacp", "λcp", "proton Compton wavelength", 1.32140985539e-15, "m"),
+    ("lambdacn", "λcn", "neutron Compton wavelength", 1.31959090581e-15, "m"),
+    ("Rinf", "R∞", "Rydberg constant", 10973731.568160, "1/m"),
+    ("u", "u", "atomic mass constant", 1.66053906660e-27, "kg"),
+    ("mup", "μp", "proton magnetic moment", 1.41060679736e-26, "J/T"),
+    ("mue", "μe", "electron magnetic moment", -9.2847647043e-24, "J/T"),
+    ("mun", "μn", "neutron magnetic moment", -9.6623651e-27, "J/T"),
+    ("mumu", "μμ", "muon magnetic moment", -4.49044830e-26, "J/T"),
+    ("Fc", "F", "Faraday constant", 96485.33212, "C/mol"),
+    ("qe", "e", "elementary charge", 1.602176634e-19, "C"),
+    ("NA", "NA", "Avogadro constant", 6.02214076e23, "1/mol"),
+    ("k", "k", "Boltzmann constant", 1.380649e-23, "J/K"),
+    ("Vm", "Vm", "molar volume of ideal gas (273.15 K, 100 kPa)", 22.71095464e-3, "m3/mol"),
+    ("R", "R", "molar gas constant", 8.314462618, "J/(mol*K)"),
+    ("c0", "c0", "speed of light in vacuum", 299792458.0, "m/s"),
+    ("C1", "C1", "first radiation constant", 3.741771852e-16, "W*m2"),
+    ("C2", "C2", "second radiation constant", 1.438776877e-2, "m*K"),
+    ("sigmaSB", "σ", "Stefan–Boltzmann constant", 5.670374419e-8, "W/(m2*K**4)"),
+    ("eps0", "ε0", "electric constant", 8.8541878128e-12, "C/(V*m)"),
+    ("mu0", "μ0", "magnetic constant", 1.25663706212e-6, "N/A**2"),
+    ("phi0", "φ0", "magnetic flux quantum", 2.067833848e-15, "Wb"),
+    ("gn", "g", "standard acceleration of gravity", 9.80665, "m/s**2"),
+    ("G0", "G0", "conductance quantum", 7.748091729e-5, "S"),
+    ("Z0", "Z0", "characteristic impedance of vacuum", 376.730313668, "ohm"),
+    ("t0", "t", "Celsius temperature zero", 273.15, "K"),
+    ("G", "G", "Newtonian constant of gravitation", 6.67430e-11, "m3/(kg*s**2)"),
+    ("atm0", "atm", "standard atmosphere", 101325.0, "Pa"),
+)
+
+_UNIT_DIMS = {name: unit.dim for name, unit in UNITS.items() if name not in OFFSET_UNITS}
+
+CONSTANTS = tuple(
+    Constant(i, name, symbol, description, value, unit,
+             infer(UnitParser(tokenize(unit)).parse(), _UNIT_DIMS))
+    for i, (name, symbol, description, value, unit) in enumerate(_CONSTANTS, 1)
+)
+
+# dimension of every unit and constant an expression can use
+DIMS = MappingProxyType({**_UNIT_DIMS, **{c.name: c.dim for c in CONSTANTS}})
+
+
+def _unit_table(angle_mode: str) -> Mapping:
+    names = TABLES[angle_mode]
+    values = {**{name: UNITS[name].scale for name in _UNIT_DIMS}, **{c.name: c.value for c in CONSTANTS}}
+    clash = set(values) & set(names)
+    if clash:
+        raise ValueError(f"unit or constant names shadow functions: {sorted(clash)}")
+    return MappingProxyType({**names, **values})
+
+
+# built once: the function table plus every unit and constant as its SI value
+UNIT_TABLES = MappingProxyType({mode: _unit_table(mode) for mode in ("DEG", "RAD")})
+
+
+class Quantity(NamedTuple):
+    value: float    # SI
+    dim: tuple
+
+    def to(self, unit: str) -> float:
+        """The value in ``unit``, which must have this quantity's dimension."""
+        try:
+            target = UNITS[unit]
+        except KeyError:
+            raise CalcError(f"unknown unit {unit!r}") from None
+        if target.dim != self.dim:
+            raise CalcError(f"cannot express {format_dim(self.dim)} in {target.label}")
+        return (self.value - target.offset) / target.scale
+
+    def format(self, unit: Optional[str] = None, digits: int = 12) -> str:
+        """``3200 m`` style text, in ``unit`` or the coherent SI unit."""
+        if unit is None:
+            unit = SI_UNITS.get(self.dim)
+        if unit is not None:
+            return f"{self.to(unit):.{digits}g} {UNITS[unit].label}"
+        if self.dim == NONE:
+            return f"{self.value:.{digits}g}"
+        return f"{self.value:.{digits}g} {format_dim(self.dim)}"
+
+
+# parsed, dimension-checked expressions keyed by normalized text
+QUANTITY_CACHE = LRUCache(maxsize=512)
+
+
+def compile_quantity(expr: str) -> tuple:
+    """``(AST, dimension)`` of a unit-tagged expression; dimensions are checked here."""
+    key = normalize(expr)
+    hit = QUANTITY_CACHE.get(key)
+    if hit is None:
+        node = UnitParser(tokenize(key)).parse()
+        hit = (node, infer(node, DIMS))
+        QUANTITY_CACHE.put(key, hit)
+    return hit
+
+
+def quantity_eval(expr: str, angle_mode: str = "DEG", env: Optional[Mapping] = None,
+                  budget: Budget = DEFAULT_BUDGET) -> Quantity:
+    """Evaluate a unit-tagged expression such as ``3 km + 200 m`` to an SI ``Quantity``."""
+    node, dim = compile_quantity(expr)
+    value = Evaluator(UNIT_TABLES[angle_mode], budget).evaluate(node, env)
+    return Quantity(value, dim)
@@ -0,0 +1,48 @@
+"""Client-side keypad component for the fx-991 style apps.
+
+The keypad and display run in the browser: digits, operators, ``DEL``,
+``SHIFT`` and ``Ans`` edit the expression locally without a server
+round-trip. The component only reports back on ``=``, ``AC`` (so the server
+can reset its state and cancel a running evaluation), on mode and memory
+keys, and (debounced) for live-preview ticks, so typing a number costs no
+script reruns at all.
+
+Events arrive as ``{"event": ..., "expr": ..., "seq": n}``. When the server
+replaces the expression (e.g. with a result after ``=``) it bumps
+``version`` and the browser adopts the new ``expr``.
+"""
+
+import os
+from typing import Callable, Iterable, Optional
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from calc_core.keypad import SHIFT_ALT, Key
+
+_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+_component = components.declare_component("fx_keypad", path=_FRONTEND)
+
+def layout(rows: Iterable[Iterable[Key]]) -> list:
+    """Turn ``calc_core.keypad`` rows into the JSON the frontend renders."""
+    return [[{"label": k.label, "action": k.action, "arg": k.arg, "style": k.style} for k in row]
+            for row in rows]
+
+
+def fx_keypad(rows: list, expr: str = "", result: str = "", status: str = "", last: str = "",
+              version: int = 0, preview_ms: int = 400, key: str = "fx_keypad",
+              on_event: Optional[Callable[[dict], None]] = None):
+    """Render the keypad; ``on_event(event)`` runs once per new event, before the rerun."""
+    seen_key = f"{key}__seq"
+
+    def _changed():
+        event = st.session_state.get(key)
+        if not event or event.get("seq", 0) <= st.session_state.get(seen_key, 0):
+            return
+        st.session_state[seen_key] = event["seq"]
+        if on_event is not None:
+            on_event(event)
+
+    return _component(rows=rows, expr=expr, result=result, status=status, last=last,
+                      version=version, shift_alt=SHIFT_ALT, preview_ms=preview_ms,
+                      key=key, default=None, on_change=_changed)
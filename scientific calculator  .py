@@ -3,16 +3,35 @@
 # Black/ClassWiz style. Input and result shown in equal-sized display blocks.
 # Safe eval + DEG/RAD handling + SHIFT toggle (functional) + memory + Ans
 
+import os
+import time
+
+import numpy as np
+import pandas as pd
 import streamlit as st
-import math
-import re
-from math import factorial
+
+import calc_core
+from calc_core.pool import PooledEvaluator, TimeoutError
+from calc_core.basen import RADIX_NAMES, WIDTHS, WORD_TABLES, BaseNEvaluator, Word, basen_eval, convert_many
+from calc_core.calculus import calculus_table
+from calc_core.cmplx import complex_table
+from calc_core.definitions import Definitions, parse_definition
+from calc_core.matrix import MATRIX_NAMES, MAX_DIM, MatrixStore, matrix_eval
+from calc_core.keypad import ACTION_ROW, ACTION_WIDTHS, BASEN_ROWS, CALC_ROW, CMPLX_ROW, MEMORY_KEYS, NUM_ROWS, SCI_ROWS, Key, apply_key
+from calc_core.plot import plot_data
+from calc_core.solve import linear_solve, poly_roots, solve
+from calc_core.units import CONSTANTS, CONVERSIONS, UNITS, compatible, compile_quantity, convert, format_dim, quantity_eval
+from calc_core.store import REGISTERS, Store
+from calc_core.stats import REGRESSIONS, STAT_VARIABLES, StatAccumulator, accumulate
+from calc_core.vector import compile_vectorized
+from fx_keypad import fx_keypad, layout
 
 # ---------------- Page config ----------------
 st.set_page_config(page_title="fx-991 Inspired Scientific Calculator", page_icon="🧮", layout="wide")
 
 # ---------------- Styling ----------------
-st.markdown(r"""
+# Emitted on full reruns only; key presses rerun just the calculator fragment.
+CSS = r"""
 <style>
 @import url('https://fonts.googleapis.com/css2?family=Orbitron:wght@600;700&family=Inter:wght@300;400;600&display=swap');
 
@@ -63,6 +82,14 @@ body { background: var(--bg); color: #eaf0f7; }
   word-break:break-all;
 }
 
+/* precision tag inside the result block */
+.display-prec {
+  margin-right:auto;
+  font-family: 'Inter', sans-serif;
+  font-size:12px;
+  color: var(--muted);
+}
+
 /* small label under display */
 .display-sub {
   color: var(--muted);
@@ -100,240 +127,724 @@ body { background: var(--bg); color: #eaf0f7; }
 /* tighten streamlit spacing */
 [data-testid="stVerticalBlock"] > div { gap:8px; }
 </style>
-""", unsafe_allow_html=True)
-
-# ---------------- Safe math environment and wrappers ----------------
-
-# Trig wrappers: when in DEG mode convert degrees -> radians for sin/cos/tan,
-# and inverse trig returns degrees if DEG mode.
-def sin_wr(x):
-    x = float(x)
-    if st.session_state.angle_mode == "DEG":
-        return math.sin(math.radians(x))
-    return math.sin(x)
-
-def cos_wr(x):
-    x = float(x)
-    if st.session_state.angle_mode == "DEG":
-        return math.cos(math.radians(x))
-    return math.cos(x)
-
-def tan_wr(x):
-    x = float(x)
-    if st.session_state.angle_mode == "DEG":
-        return math.tan(math.radians(x))
-    return math.tan(x)
-
-def asin_wr(x):
-    res = math.asin(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-def acos_wr(x):
-    res = math.acos(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-def atan_wr(x):
-    res = math.atan(float(x))
-    return math.degrees(res) if st.session_state.angle_mode == "DEG" else res
-
-SAFE = {
-    "pi": math.pi,
-    "e": math.e,
-    "sin": sin_wr,
-    "cos": cos_wr,
-    "tan": tan_wr,
-    "asin": asin_wr,
-    "acos": acos_wr,
-    "atan": atan_wr,
-    "sinh": math.sinh,
-    "cosh": math.cosh,
-    "tanh": math.tanh,
-    "log": math.log,      # natural
-    "ln": math.log,
-    "log10": math.log10,
-    "sqrt": math.sqrt,
-    "abs": abs,
-    "pow": pow,
-    "factorial": factorial,
-    "exp": math.exp,
-    "rad": math.radians,
-    "deg": math.degrees,
-}
+"""
+st.markdown(CSS, unsafe_allow_html=True)
+
+# ---------------- Safe math environment ----------------
+
+# DEG/RAD function tables live in calc_core.tables and are built once at import;
+# each evaluation picks the table for the current angle mode (plus integrate/diff).
+def names():
+    # chosen once per evaluation: COMP keeps the math table, CMPLX swaps in cmath
+    if calc.mode == "CMPLX":
+        return complex_table(calc.angle_mode)
+    if calc.mode == "BASE-N":
+        return WORD_TABLES[calc.word]
+    return calculus_table(calc.angle_mode)
+
+def safe_eval(expr: str):
+    # parsed once per normalized expression (calc_core); only whitelisted names are reachable
+    return calc_core.safe_eval(expr, names(), calc.env)
+
+# user definitions (A=3, f(x)=…) may not shadow anything a mode table provides
+RESERVED = frozenset(calculus_table("DEG")).union(calc_core.COMPLEX_TABLES["DEG"], WORD_TABLES[Word()], ("Ans",))
+
+def evaluate_node(node, env):
+    # definitions are evaluated in the current mode, like the expressions that read them
+    if calc.mode == "BASE-N":
+        return BaseNEvaluator(calc.word).evaluate(node, env)
+    if calc.precision and calc.mode != "CMPLX":
+        return calc_core.PreciseEvaluator(calc.angle_mode, calc.precision).evaluate(node, env)
+    return calc_core.evaluate(node, names(), env)
+
+def recalculate():
+    # only definitions invalidated since the last call are evaluated (all of them after a mode change)
+    return calc.definitions.recalculate(evaluate_node, calc.variables,
+                                        (calc.mode, calc.angle_mode, calc.precision, calc.word))
 
 # ---------------- Session state ----------------
-if "expr" not in st.session_state:
-    st.session_state.expr = ""
-if "last" not in st.session_state:
-    st.session_state.last = ""
-if "memory" not in st.session_state:
-    st.session_state.memory = 0.0
-if "angle_mode" not in st.session_state:
-    st.session_state.angle_mode = "DEG"  # DEG or RAD
-if "shift" not in st.session_state:
-    st.session_state.shift = False  # SHIFT functional toggle
+@st.cache_resource
+def get_store():
+    # one SQLite (WAL) store per server process; writes are batched on its own thread
+    return Store(os.environ.get("CALC_STORE", "calc_store.sqlite3"))
+
+# history, registers and formulas (definitions) are kept per user (?user=name in the URL)
+USER = st.query_params.get("user", "local")
+
+# One compact object per session (calc_core.state): results stay native, history is bounded.
+if "calc" not in st.session_state:
+    st.session_state.calc = calc_core.CalcState()
+    st.session_state.calc.preview = calc_core.IncrementalPreview()  # keeps parse state between keypresses
+    # first page of history + registers + formulas in one go from the local store
+    recent, registers, formulas = get_store().session(USER, calc_core.state.HISTORY_SIZE)
+    st.session_state.calc.restore(recent, registers)
+    # saved formulas are definitions: "f(x)" -> "sin(x)^2+x", "A" -> "3"
+    st.session_state.calc.definitions = Definitions(RESERVED)
+    st.session_state.calc.definitions.load(formulas)
+calc = st.session_state.calc
+MODES = ("COMP", "CMPLX", "BASE-N")
 
 # ---------------- Helpers ----------------
 def append(tok: str):
-    st.session_state.expr = (st.session_state.expr or "") + str(tok)
-
-def replace_factorials(expr: str) -> str:
-    # replace number! -> factorial(number), and (expr)! -> factorial(expr)
-    expr = re.sub(r"(\d+(?:\.\d+)?)!", r"factorial(\1)", expr)
-    expr = re.sub(r"(\))!", r"factorial\1", expr)
-    return expr
-
-def safe_eval(expr: str):
-    expr = expr.replace("^", "**")
-    expr = replace_factorials(expr)
-    # block accidental builtins
-    return eval(expr, {"__builtins__": None}, SAFE)
+    calc.expr = (calc.expr or "") + str(tok)
+
+@st.cache_resource
+def get_pool():
+    # one worker pool per server process, shared by all sessions
+    return PooledEvaluator()
+
+@st.cache_resource
+def get_result_cache():
+    # evaluated results shared by all sessions (size + TTL bounded, thread safe)
+    return calc_core.ResultCache(maxsize=4096, ttl=600.0)
+
+def compute(expr: str):
+    if calc.mode == "BASE-N":
+        # integers only, masked to the word; literals are read in the current radix
+        return basen_eval(expr, calc.radix, calc.word, calc.env)
+    pool = get_pool()
+    if calc.precision and calc.mode != "CMPLX":
+        # arbitrary-precision mode (decimal); factorials come from the incremental table
+        return calc_core.precise_eval(expr, calc.angle_mode, calc.precision, calc.env)
+    if pool.is_heavy(expr):
+        # expensive (big factorial / power): run on a worker so AC can cancel it
+        progress = st.empty()
+        calc.pending = pool.submit(expr, calc.angle_mode, calc.env, calc.mode)
+        res = pool.wait(calc.pending, on_tick=lambda t: progress.caption(f"Evaluating on worker… {t:.1f}s (AC cancels)"))
+        progress.empty()
+        calc.pending = None
+        return res
+    return safe_eval(expr)
 
 def evaluate_expression():
-    if not st.session_state.expr:
+    if not calc.expr:
         return
+    cache = get_result_cache()
     try:
-        res = safe_eval(st.session_state.expr)
-        st.session_state.last = str(res)
-        st.session_state.expr = str(res)
+        definition = parse_definition(calc.expr)
+        if definition is not None:
+            define_expression(definition)
+            return
+        # user functions are inlined first, so the cache key and every evaluator see plain math
+        source = calc.definitions.expand_source(calc.expr)
+        # keyed by AST + mode + angle mode + precision; expressions reading Ans are never cached.
+        # BASE-N results depend on radix and word too, and are cheap: not cached.
+        key = None
+        if calc.mode != "BASE-N":
+            key = cache.key(source, names(), calc.angle_mode, calc.precision, calc.mode)
+        res = cache.get(key) if key is not None else None
+        if res is None:
+            res = compute(source)
+            if key is not None:
+                cache.put(key, res)
+        expr = calc.expr
+        calc.set_result(res)
+        # queued for the store's writer thread; "=" never waits on disk
+        store = get_store()
+        store.add_history(USER, expr, calc.last_text)
+        try:
+            store.set_register(USER, "Ans", res)
+        except calc_core.CalcError:
+            pass  # not a storable number
+    except TimeoutError:
+        calc.pending = None
+        st.error("Evaluation timed out")
+    except calc_core.BudgetError as exc:
+        st.error(str(exc))
     except Exception:
         st.error("Invalid expression")
 
-# ---------------- Layout ----------------
-st.markdown('<div class="calc-card">', unsafe_allow_html=True)
-
-# Top: display row with two equal blocks (input / result)
-st.markdown('<div class="display-row">', unsafe_allow_html=True)
-
-# Left: input block
-input_val = st.session_state.expr if st.session_state.expr else ""
-st.markdown(f'<div class="display-block" id="input_block">{st.session_state.expr or ""}</div>', unsafe_allow_html=True)
-
-# Right: result block — show last or 0
-result_val = st.session_state.last if st.session_state.last else ""
-st.markdown(f'<div class="display-block" id="result_block">{st.session_state.last or ""}</div>', unsafe_allow_html=True)
-
-st.markdown('</div>', unsafe_allow_html=True)
-
-# sub info (angle, memory, shift state)
-st.markdown(f'<div class="display-sub">Angle: {st.session_state.angle_mode} &nbsp;&nbsp; Memory: {st.session_state.memory} &nbsp;&nbsp; SHIFT: {"ON" if st.session_state.shift else "OFF"}</div>', unsafe_allow_html=True)
-
-# ------- Buttons area -------
-# We'll place main keys in a wide column and extras on the right side
-col_keys, col_side = st.columns([9, 3])
-
-with col_keys:
-    # Scientific function rows (6 columns)
-    st.markdown('<div class="keys grid-6">', unsafe_allow_html=True)
-    c = st.columns(6)
-    # SHIFT functional behavior: when SHIFT ON, primary trig -> inverse trig, etc.
-    if c[0].button("sin", key="sin_btn"):
-        append("asin(") if st.session_state.shift else append("sin(")
-        st.session_state.shift = False
-    if c[1].button("cos", key="cos_btn"):
-        append("acos(") if st.session_state.shift else append("cos(")
-        st.session_state.shift = False
-    if c[2].button("tan", key="tan_btn"):
-        append("atan(") if st.session_state.shift else append("tan(")
-        st.session_state.shift = False
-    if c[3].button("SHIFT", key="shift_btn"):
-        # toggle shift mode
-        st.session_state.shift = not st.session_state.shift
-    if c[4].button("(", key="lpar_btn"):
-        append("(")
-    if c[5].button(")", key="rpar_btn"):
-        append(")")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown('<div class="keys grid-6">', unsafe_allow_html=True)
-    c = st.columns(6)
-    if c[0].button("ln", key="ln_btn"): append("ln(")
-    if c[1].button("log", key="log_btn"): append("log10(")  # keep label 'log' for log10 as in many calculators
-    if c[2].button("sqrt", key="sqrt_btn"): append("sqrt(")
-    if c[3].button("x^2", key="x2_btn"): append("**2")
-    if c[4].button("x^3", key="x3_btn"): append("**3")
-    if c[5].button("x^y", key="xy_btn"): append("**")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown('<div class="keys grid-6">', unsafe_allow_html=True)
-    c = st.columns(6)
-    if c[0].button("pi", key="pi_btn"): append("pi")
-    if c[1].button("e", key="e_btn"): append("e")
-    if c[2].button("!", key="fact_btn"): append("!")   # will be converted
-    if c[3].button("Ans", key="ans_btn"): append(st.session_state.last or "")
-    if c[4].button("^", key="caret_btn"): append("**")
-    if c[5].button("Exp", key="exp_btn"): append("exp(")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown('<div style="height:10px"></div>', unsafe_allow_html=True)
-
-    # Numeric keypad & operators (4 columns)
-    st.markdown('<div class="keys grid-4">', unsafe_allow_html=True)
-    k = st.columns(4)
-    if k[0].button("7", key="k7"): append("7")
-    if k[1].button("8", key="k8"): append("8")
-    if k[2].button("9", key="k9"): append("9")
-    if k[3].button("/", key="kdiv"): append("/")
-    k = st.columns(4)
-    if k[0].button("4", key="k4"): append("4")
-    if k[1].button("5", key="k5"): append("5")
-    if k[2].button("6", key="k6"): append("6")
-    if k[3].button("*", key="kmul"): append("*")
-    k = st.columns(4)
-    if k[0].button("1", key="k1"): append("1")
-    if k[1].button("2", key="k2"): append("2")
-    if k[2].button("3", key="k3"): append("3")
-    if k[3].button("-", key="ksub"): append("-")
-    k = st.columns(4)
-    if k[0].button("0", key="k0"): append("0")
-    if k[1].button(".", key="kdot"): append(".")
-    if k[2].button("+/-", key="kneg"):
-        # toggle sign for current expr or last
-        expr = st.session_state.expr or st.session_state.last or ""
-        if expr.startswith("-"):
-            st.session_state.expr = expr[1:]
-        else:
-            st.session_state.expr = "-" + expr
-    if k[3].button("+", key="kadd"): append("+")
-    st.markdown('</div>', unsafe_allow_html=True)
-
-    st.markdown('<div style="height:12px"></div>', unsafe_allow_html=True)
-
-    # Action row: DEL / AC / = / Mode
-    a1, a2, a3, a4 = st.columns([2,2,2,4])
-    if a1.button("DEL", key="del_btn"): st.session_state.expr = (st.session_state.expr or "")[:-1]
-    if a2.button("AC", key="ac_btn"):
-        st.session_state.expr = ""
-        st.session_state.last = ""
-    if a3.button("=", key="eq_btn"):
-        evaluate_expression()
-    if a4.button("Mode: DEG/RAD", key="mode_btn"):
-        st.session_state.angle_mode = "RAD" if st.session_state.angle_mode == "DEG" else "DEG"
-
-with col_side:
-    st.markdown('<div class="side-panel">', unsafe_allow_html=True)
-    st.subheader("Memory & Extras")
-    if st.button("M+", key="mplus"):
+def define(definition) -> bool:
+    # add/replace a definition, persist it and recompute just its dependents
+    old = calc.definitions.get(definition.name)
+    try:
+        dirty = calc.define(definition)
+    except calc_core.CalcError as exc:
+        st.session_state.flash = ("error", str(exc))
+        return False
+    store = get_store()
+    if old is not None and old.signature != definition.signature:
+        store.delete_formula(USER, old.signature)
+    store.save_formula(USER, definition.signature, definition.source)
+    recalculate()
+    error = calc.definitions.errors.get(definition.name)
+    if error is not None:
+        st.session_state.flash = ("warning", f"{definition.signature}: {error}")
+    else:
+        updated = len(dirty) - 1
+        note = f" · {updated} dependent{'s' if updated != 1 else ''} updated" if updated else ""
+        st.session_state.flash = ("success", f"{definition.signature} defined{note}")
+    return True
+
+def define_expression(definition):
+    # "A=3" or "f(x)=…" typed on the keypad: a variable shows its value like any result
+    if not define(definition):
+        return
+    value = calc.definitions.values.get(definition.name)
+    if value is not None:
+        calc.set_result(value)
+    else:
+        calc.expr = ""
+    calc.keypad_version += 1
+
+# ---------------- Key handling ----------------
+def press(key):
+    # on_click callback: runs before the fragment reruns, so the display is never a press behind
+    if apply_key(calc, key):
+        return
+    if key.action == "eq":
+        st.session_state.eval_requested = True
+    elif key.action == "ac":
+        calc.clear()
+        if calc.pending is not None:
+            get_pool().cancel(calc.pending)
+            calc.pending = None
+    elif key.action in ("mplus", "mminus"):
         try:
-            st.session_state.memory += float(st.session_state.last)
-            st.success("Added to memory")
+            sign = 1 if key.action == "mplus" else -1
+            calc.memory += sign * float(calc.last)
+            get_store().set_register(USER, "M", calc.memory)
+            st.session_state.flash = ("success", "Added to memory" if sign > 0 else "Subtracted from memory")
         except Exception:
-            st.error("No numeric last answer")
-    if st.button("M-", key="mminus"):
+            st.session_state.flash = ("error", "No numeric last answer")
+    elif key.action == "mrec":
+        calc.expr = (calc.expr or "") + str(calc.memory)
+    elif key.action == "mclear":
+        calc.memory = 0.0
+        get_store().set_register(USER, "M", calc.memory)
+
+def keypad_event(event):
+    # client keypad: the browser sends its expression on "=", mode/memory keys and preview ticks
+    calc.expr = event["expr"]
+    if event["event"] == "preview":
+        return
+    press(Key(event["event"], event["event"], event["event"]))
+    calc.keypad_version += 1
+
+CLIENT_ROWS = layout(SCI_ROWS + (CALC_ROW,) + NUM_ROWS + (ACTION_ROW, MEMORY_KEYS))
+CLIENT_ROWS_CMPLX = layout(SCI_ROWS + (CALC_ROW, CMPLX_ROW) + NUM_ROWS + (ACTION_ROW, MEMORY_KEYS))
+CLIENT_ROWS_BASEN = layout(BASEN_ROWS + NUM_ROWS + (ACTION_ROW, MEMORY_KEYS))
+
+def client_rows():
+    if calc.mode == "CMPLX":
+        return CLIENT_ROWS_CMPLX
+    if calc.mode == "BASE-N":
+        return CLIENT_ROWS_BASEN
+    return CLIENT_ROWS
+
+def key_row(keys, widths=None):
+    for col, key in zip(st.columns(widths or len(keys)), keys):
+        col.button(key.label, key=key.key, on_click=press, args=(key,))
+
+def set_precision():
+    calc.precision = int(st.session_state.precision)
+
+def set_mode():
+    calc.mode = st.session_state.calc_mode
+    if calc.last is not None:
+        calc.last_text = calc.format(calc.last)[0]
+    calc.keypad_version += 1
+
+def set_word():
+    bits = st.session_state.word_bits
+    calc.word = Word(None if bits == "∞" else bits, st.session_state.word_signed)
+    if type(calc.last) is int:
+        calc.last = calc.word.wrap(calc.last)
+        calc.last_text = calc.format(calc.last)[0]
+
+def set_complex_format():
+    calc.complex_format = st.session_state.complex_format
+    if isinstance(calc.last, complex):
+        calc.last_text = calc.format(calc.last)[0]
+
+def store_variable():
+    # STO: Ans -> A…F, X, Y (kept in the local store)
+    name = st.session_state.sto_name
+    if calc.last is None:
+        st.session_state.flash = ("error", "No answer to store")
+        return
+    try:
+        get_store().set_register(USER, name, calc.last)
+    except calc_core.CalcError as exc:
+        st.session_state.flash = ("error", str(exc))
+        return
+    calc.variables = {**calc.variables, name: calc.last}
+    if name in calc.definitions:
+        # a stored value replaces the definition; its dependents pick the value up
+        delete_definition(name)
+    st.session_state.flash = ("success", f"Ans → {name}")
+
+def save_formula():
+    # name the current expression: "A" saves A=expr, "f(x)" saves f(x)=expr
+    name = st.session_state.formula_name.strip()
+    if not (name and calc.expr):
+        return
+    try:
+        definition = parse_definition(f"{name}={calc.expr}")
+    except calc_core.CalcError as exc:
+        st.session_state.flash = ("error", str(exc))
+        return
+    define(definition)
+
+def use_definition(definition):
+    append(f"{definition.name}(" if definition.params else definition.name)
+    calc.keypad_version += 1
+
+def delete_definition(name: str):
+    get_store().delete_formula(USER, calc.definitions.get(name).signature)
+    calc.definitions.remove(name)
+
+def definition_label(name: str, definition) -> str:
+    if name in calc.definitions.values:
+        return f"{definition} → {calc.format(calc.definitions.values[name])[0]}"
+    if name in calc.definitions.errors:
+        return f"{definition} → {calc.definitions.errors[name]}"
+    return str(definition)
+
+def side_panel(memory_keys: bool):
+    # memory keys move into the client keypad when it is on
+    st.subheader("Memory & Extras")
+    if memory_keys:
+        for key in MEMORY_KEYS:
+            st.button(key.label, key=key.key, on_click=press, args=(key,))
+    st.radio("Mode", MODES, index=MODES.index(calc.mode), key="calc_mode", horizontal=True, on_change=set_mode)
+    if calc.mode == "CMPLX":
+        st.radio("Complex results", ("a+bi", "r∠θ"), index=("a+bi", "r∠θ").index(calc.complex_format),
+                 key="complex_format", horizontal=True, on_change=set_complex_format)
+    if calc.mode == "BASE-N":
+        bits = WIDTHS + ("∞",)
+        st.selectbox("Word bits", bits, index=bits.index(calc.word.bits or "∞"), key="word_bits", on_change=set_word)
+        st.checkbox("Signed", value=calc.word.signed, key="word_signed", on_change=set_word)
+    st.number_input("Precision digits (0 = float)", min_value=0, max_value=1000, step=10,
+                    value=calc.precision, key="precision", on_change=set_precision)
+
+    c1, c2 = st.columns([2, 1])
+    c1.selectbox("Variable", [r for r in REGISTERS if r not in ("M", "Ans")], key="sto_name", label_visibility="collapsed")
+    c2.button("STO", key="sto_btn", on_click=store_variable, help="Store Ans in the variable")
+
+    with st.expander(f"History ({len(calc.history)})"):
+        prefix = st.text_input("Search saved history", key="history_prefix", placeholder="starts with…")
+        # prefix search runs on the store's (user, expr) index; otherwise the in-session ring buffer
+        rows = get_store().search(USER, prefix) if prefix else calc.history.latest(10)
+        for expr, text in rows:
+            st.caption(f"{expr} = {text}")
+
+    with st.expander(f"Definitions ({len(calc.definitions)})"):
+        st.caption("Type `A=3` or `f(x)=sin(x)^2+x` and press =, or name the current expression.")
+        st.text_input("Name", key="formula_name", placeholder="A or f(x)")
+        st.button("Save current expression", key="formula_save", on_click=save_formula)
+        for i, (name, definition) in enumerate(calc.definitions.items()):
+            c1, c2 = st.columns([5, 1])
+            c1.button(definition_label(name, definition), key=f"formula_{i}", on_click=use_definition, args=(definition,))
+            c2.button("✕", key=f"formula_del_{i}", on_click=delete_definition, args=(name,), help=f"Delete {name}")
+
+    with st.expander("Debug: optimized form"):
+        # constant folding + shared subexpressions as the engine will evaluate them
         try:
-            st.session_state.memory -= float(st.session_state.last)
-            st.success("Subtracted from memory")
+            st.code(calc_core.explain(calc_core.compile_expression(calc.expr or "0"), names()))
         except Exception:
-            st.error("No numeric last answer")
-    if st.button("MR", key="mrec"): st.session_state.expr = (st.session_state.expr or "") + str(st.session_state.memory)
-    if st.button("MC", key="mclear"): st.session_state.memory = 0.0
+            st.caption("Expression does not parse yet")
 
     st.markdown("---")
-    st.markdown("**Quick tips**")
-    st.markdown("- Use `^` for power (becomes `**`).")
-    st.markdown("- Use `!` for factorial (auto-converted).")
-    st.markdown("- SHIFT toggles inverse trig when ON (press SHIFT then the trig key).")
-    st.markdown("- Trig obeys DEG/RAD mode shown above.")
-    st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown(
+        "**Quick tips**\n"
+        "- Use `^` for power (becomes `**`).\n"
+        "- Use `!` for factorial (auto-converted).\n"
+        "- SHIFT toggles inverse trig when ON (press SHIFT then the trig key).\n"
+        "- Trig obeys DEG/RAD mode shown above.\n"
+        "- Set precision digits for 50+ digit results.\n"
+        "- ∫dx: `integrate(f(x), a, b)`; d/dx: `diff(f(x), x0)` (float mode).\n"
+        "- CMPLX: `i`, `rect(r, θ)` for r∠θ, `arg`, `conj`, `re`, `im` (float only).\n"
+        "- BASE-N: type in the shown radix (`0x`/`0o`/`0b` override); `and`, `or`, `xor`, `not`, `neg`, `shl`, `shr`.\n"
+        "- Definitions: `A=3`, `f(x)=sin(x)^2+x`, `g(x)=f(x)*A`; changing `A` recomputes only what uses it.\n"
+        "- `Ans` is the last result; huge results are shown shortened."
+    )
+
+# ---------------- Layout ----------------
+# Only the calculator fragment reruns on a key press; the page config, CSS and
+# batch section below are emitted on full reruns only.
+@st.fragment
+def calculator():
+    recalculate()
+    if st.session_state.pop("eval_requested", False):
+        evaluate_expression()
+    flash = st.session_state.pop("flash", None)
+    if flash is not None:
+        getattr(st, flash[0])(flash[1])
+
+    # Right block: live preview while typing, otherwise last
+    result_val = calc.last_text
+    if calc.expr and calc.expr not in (calc.last_text, "Ans"):
+        if calc.mode == "BASE-N":
+            try:
+                preview = basen_eval(calc.definitions.expand_source(calc.expr), calc.radix, calc.word, calc.env)
+            except Exception:
+                preview = None
+        else:
+            try:
+                source = calc.definitions.expand_source(calc.expr)
+            except calc_core.CalcError:
+                source = calc.expr  # still being typed
+            preview = calc.preview.update(source, names(), calc.env)
+        if preview is not None:
+            result_val = f"≈ {calc.format(preview)[0]}"
+    if calc.mode == "CMPLX":
+        prec_label = "CMPLX"
+    elif calc.mode == "BASE-N":
+        prec_label = f"{RADIX_NAMES[calc.radix]} {calc.word.bits or '∞'}-bit {'signed' if calc.word.signed else 'unsigned'}"
+    else:
+        prec_label = f"PREC {calc.precision}" if calc.precision else "FLOAT"
+
+    status = f'Angle: {calc.angle_mode}   Memory: {calc.memory}   {prec_label}'
+    if st.session_state.client_keypad:
+        # keypad + display run in the browser; the server only hears about =, mode, memory and previews
+        col_keys, col_side = st.columns([9, 3])
+        with col_keys:
+            fx_keypad(client_rows(), expr=calc.expr or "", result=result_val, status=status,
+                      last="Ans" if calc.last is not None else "", version=calc.keypad_version,
+                      on_event=keypad_event)
+        with col_side:
+            side_panel(memory_keys=False)
+        return
+
+    # display row (input / result) and sub info (angle, memory, shift state) in one delta
+    st.markdown(
+        f'<div class="display-row">'
+        f'<div class="display-block" id="input_block">{calc.expr or ""}</div>'
+        f'<div class="display-block" id="result_block"><span class="display-prec">{prec_label}</span>{result_val}</div>'
+        f'</div>'
+        f'<div class="display-sub">Angle: {calc.angle_mode} &nbsp;&nbsp; Memory: {calc.memory} &nbsp;&nbsp; SHIFT: {"ON" if calc.shift else "OFF"}</div>',
+        unsafe_allow_html=True,
+    )
+
+    # main keys in a wide column and extras on the right side
+    col_keys, col_side = st.columns([9, 3])
+    with col_keys:
+        if calc.mode == "BASE-N":
+            for row in BASEN_ROWS:
+                key_row(row)
+        else:
+            for row in SCI_ROWS:
+                key_row(row)
+            key_row(CALC_ROW)
+        if calc.mode == "CMPLX":
+            key_row(CMPLX_ROW)
+        for row in NUM_ROWS:
+            key_row(row)
+        key_row(ACTION_ROW, ACTION_WIDTHS)
+
+    with col_side:
+        side_panel(memory_keys=True)
+
+st.sidebar.toggle("Client-side keypad", value=True, key="client_keypad",
+                  help="Type in the browser; the server only reruns on =, mode/memory keys and previews.")
+with st.sidebar.expander("Debug: shared result cache"):
+    stats = get_result_cache().stats()
+    st.metric("Hit rate", f"{stats['hit_rate']:.0%}")
+    st.caption(f"{stats['hits']} hits · {stats['misses']} misses · {stats['size']}/{stats['maxsize']} entries · "
+               f"{stats['evictions']} evicted · {stats['expired']} expired (TTL {stats['ttl']:.0f}s)")
+calculator()
+
+# ---------------- Graph mode ----------------
+# f(x) is sampled adaptively (dense near bends and poles) with vectorized
+# evaluation, then reduced to per-bucket min/max so only ~2000 points reach the browser.
+@st.fragment
+def graph_mode():
+    with st.expander("Graph mode — plot f(x) over a range"):
+        c1, c2, c3 = st.columns([4, 1, 1])
+        graph_expr = c1.text_input("f(x) =", value="tan(x)", key="graph_expr")
+        x_min = c2.number_input("x min", value=-360.0, key="graph_min")
+        x_max = c3.number_input("x max", value=360.0, key="graph_max")
+        if st.button("Plot", key="graph_btn"):
+            try:
+                x, y = plot_data(graph_expr, x_min, x_max, angle_mode=calc.angle_mode)
+                st.session_state.graph_data = pd.DataFrame({"x": x, "f(x)": y})
+            except Exception:
+                st.error("Invalid function or range")
+        df = st.session_state.get("graph_data")
+        if df is not None:
+            st.line_chart(df, x="x", y="f(x)")
+            st.caption(f"{len(df)} points sent · angle mode {calc.angle_mode}")
+
+graph_mode()
+
+# ---------------- SOLVE ----------------
+# f(x) is compiled once; Newton gets exact derivatives from dual numbers and
+# falls back to Brent on a bracket. Polynomials go through companion-matrix eigenvalues.
+def parse_numbers(text: str) -> list:
+    # comma/space separated entries, each a whitelisted expression ("sqrt(2)", "-pi")
+    return [safe_eval(part) for part in text.replace(";", ",").split(",") if part.strip()]
+
+@st.fragment
+def solver():
+    with st.expander("SOLVE — equations, polynomials and linear systems"):
+        eq_tab, poly_tab, lin_tab = st.tabs(["f(x) = 0", "Polynomial", "Linear system"])
+        with eq_tab:
+            c1, c2 = st.columns([4, 1])
+            equation = c1.text_input("Equation in x", value="cos(x) = x", key="solve_eq")
+            x0 = c2.number_input("Initial x", value=1.0, key="solve_x0")
+            if st.button("Solve", key="solve_btn"):
+                try:
+                    t0 = time.perf_counter()
+                    sol = solve(equation, calc_core.function_table(calc.angle_mode), x0)
+                    dt = (time.perf_counter() - t0) * 1e6
+                    st.success(f"x = {sol.x:.15g}")
+                    st.caption(f"f(x) = {sol.fx:.3g} · {sol.method}, {sol.iterations} iterations · {dt:.0f} µs")
+                except Exception as exc:
+                    st.error(str(exc) if isinstance(exc, calc_core.CalcError) else "Could not solve this equation")
+        with poly_tab:
+            coeffs = st.text_input("Coefficients, highest degree first", value="1, 0, -2, -5", key="solve_poly")
+            if st.button("Find roots", key="solve_poly_btn"):
+                try:
+                    for i, root in enumerate(poly_roots(parse_numbers(coeffs)), 1):
+                        st.write(f"x{i} = {root:.12g}")
+                except Exception:
+                    st.error("Invalid coefficients")
+        with lin_tab:
+            rows = st.text_area("One equation per line: a, b, …, = rhs", value="2, 1, = 5\n1, -1, = 1", key="solve_lin")
+            if st.button("Solve system", key="solve_lin_btn"):
+                try:
+                    lines = [line.split("=") for line in rows.splitlines() if line.strip()]
+                    matrix = [parse_numbers(lhs) for lhs, _ in lines]
+                    rhs = [safe_eval(value) for _, value in lines]
+                    for i, value in enumerate(linear_solve(matrix, rhs), 1):
+                        st.write(f"x{i} = {value:.12g}")
+                except calc_core.CalcError as exc:
+                    st.error(str(exc))
+                except Exception:
+                    st.error("Invalid system")
+
+solver()
+
+# ---------------- MATRIX mode ----------------
+# MatA–MatD are float64 arrays in the session's MatrixStore; * between matrices
+# is the matrix product and det/inv/trn/dot/cross are single NumPy calls.
+GRID_PAGE = 50
+
+def matrix_start(store, name: str, rows: int, cols: int, fill: str) -> np.ndarray:
+    if fill == "identity":
+        return np.eye(rows, cols)
+    if fill == "random":
+        # drawn once per matrix and size: reruns (and Store) must see the grid the user sees
+        drawn = st.session_state.get("mat_random")
+        if drawn is None or drawn[0] != (name, rows, cols):
+            values = np.random.default_rng().integers(-9, 10, (rows, cols)).astype(float)
+            drawn = st.session_state.mat_random = ((name, rows, cols), values)
+        return drawn[1]
+    base = np.zeros((rows, cols))
+    current = store.get(name)
+    if fill == "current" and current is not None:
+        r, c = min(rows, current.shape[0]), min(cols, current.shape[1])
+        base[:r, :c] = current[:r, :c]
+    return base
+
+def show_grid(values: np.ndarray, key: str):
+    # large results are shown GRID_PAGE rows at a time
+    pages = max((values.shape[0] + GRID_PAGE - 1) // GRID_PAGE, 1)
+    page = st.number_input(f"Rows page (of {pages})", 1, pages, 1, key=key) if pages > 1 else 1
+    start = (page - 1) * GRID_PAGE
+    st.dataframe(pd.DataFrame(values[start:start + GRID_PAGE], index=range(start + 1, min(start + GRID_PAGE, values.shape[0]) + 1),
+                              columns=range(1, values.shape[1] + 1)), use_container_width=True)
+    st.caption(f"{values.shape[0]}×{values.shape[1]}")
+
+@st.fragment
+def matrix_mode():
+    with st.expander("MATRIX mode — MatA…MatD"):
+        if calc.matrices is None:
+            calc.matrices = MatrixStore()
+        store = calc.matrices
+        edit_tab, calc_tab = st.tabs(["Edit", "Calculate"])
+        with edit_tab:
+            c = st.columns(4)
+            name = c[0].selectbox("Matrix", MATRIX_NAMES, key="mat_name")
+            current = store.get(name)
+            rows = c[1].number_input("Rows", 1, MAX_DIM, current.shape[0] if current is not None else 3, key="mat_rows")
+            cols = c[2].number_input("Columns", 1, MAX_DIM, current.shape[1] if current is not None else 3, key="mat_cols")
+            fill = c[3].selectbox("Start from", ("current", "zeros", "identity", "random"), key="mat_fill")
+            values = matrix_start(store, name, rows, cols, fill)
+            if rows * cols <= 400:
+                edited = st.data_editor(pd.DataFrame(values), key=f"mat_edit_{name}_{rows}_{cols}_{fill}")
+                values = edited.to_numpy(dtype=float)
+            else:
+                upload = st.file_uploader("Large matrix: upload CSV values (no header)", type=["csv"], key="mat_csv")
+                if upload is not None:
+                    values = np.loadtxt(upload, delimiter=",", ndmin=2)
+            if st.button("Store", key="mat_store"):
+                try:
+                    store.set(name, values)
+                    st.success(f"{name} stored ({values.shape[0]}×{values.shape[1]})")
+                except Exception as exc:
+                    st.error(str(exc) if isinstance(exc, calc_core.CalcError) else "Invalid matrix")
+            st.caption("Stored: " + ", ".join(f"{n} {store.get(n).shape[0]}×{store.get(n).shape[1]}" for n in MATRIX_NAMES if n in store)
+                       + f" · {store.nbytes() / 1024:.0f} KB")
+        with calc_tab:
+            expr = st.text_input("Expression (det, inv, trn, dot, cross; * is the matrix product)", value="det(MatA)", key="mat_expr")
+            if st.button("Calculate", key="mat_calc"):
+                try:
+                    res = matrix_eval(expr, calc.angle_mode, store.env())
+                    if isinstance(res, np.ndarray):
+                        res = store.set("MatAns", res)
+                    st.session_state.mat_result = res
+                except Exception as exc:
+                    st.session_state.mat_result = None
+                    st.error(str(exc) if isinstance(exc, calc_core.CalcError) else "Invalid matrix expression")
+            res = st.session_state.get("mat_result")
+            if isinstance(res, np.ndarray):
+                show_grid(res, "mat_page")
+                st.caption("Saved as MatAns")
+            elif res is not None:
+                st.success(f"= {res:.12g}")
+
+matrix_mode()
+
+# ---------------- STAT mode ----------------
+# Uploaded CSVs are read in chunks and folded into single-pass accumulators;
+# results become variables (x̄, σx, a, b, …) for the calculator above.
+STAT_CHUNK = 100_000
+
+@st.fragment
+def stat_mode():
+    with st.expander("STAT mode — one- and two-variable statistics"):
+        upload = st.file_uploader("CSV file (read in chunks)", type=["csv"], key="stat_csv")
+        if upload is not None:
+            columns = list(pd.read_csv(upload, nrows=0).columns)
+            c1, c2, c3 = st.columns(3)
+            x_col = c1.selectbox("x column", columns, key="stat_x")
+            y_col = c2.selectbox("y column", ["(none)"] + columns, key="stat_y")
+            y_col = None if y_col == "(none)" else y_col
+        else:
+            c1, c2, c3 = st.columns(3)
+            x_text = c1.text_area("x values", value="1 2 3 4 5", key="stat_x_text", height=100)
+            y_text = c2.text_area("y values (optional)", value="2.1 3.9 6.2 8.1 9.8", key="stat_y_text", height=100)
+        regression = c3.selectbox("Regression", REGRESSIONS, key="stat_reg")
+        if st.button("Calculate statistics", key="stat_btn"):
+            try:
+                if upload is not None:
+                    upload.seek(0)
+                    usecols = [x_col] + ([y_col] if y_col else [])
+                    stats = accumulate(pd.read_csv(upload, usecols=usecols, chunksize=STAT_CHUNK), x_col, y_col)
+                else:
+                    xs = np.array(x_text.replace(",", " ").split(), dtype=float)
+                    ys = np.array(y_text.replace(",", " ").split(), dtype=float) if y_text.strip() else None
+                    acc = StatAccumulator(paired=ys is not None)
+                    acc.update(xs, ys)
+                    stats = acc.result()
+                st.session_state.stat_result = stats
+                kept = {k: v for k, v in calc.variables.items() if k not in STAT_VARIABLES}
+                calc.variables = {**kept, **stats.variables(regression)}
+            except Exception as exc:
+                st.error(str(exc) if isinstance(exc, calc_core.CalcError) else "Could not read the data")
+        stats = st.session_state.get("stat_result")
+        if stats is not None:
+            m = st.columns(4)
+            m[0].metric("n", f"{stats.n:,}")
+            m[1].metric("x̄", f"{stats.mean_x:.10g}")
+            m[2].metric("σx", f"{stats.sigma_x:.10g}")
+            m[3].metric("sx", f"{stats.s_x:.10g}")
+            quantiles = "" if stats.exact_quantiles else " (from a uniform sample)"
+            st.caption(f"min {stats.min_x:.10g} · Q1 {stats.q1:.10g} · med {stats.median:.10g} · "
+                       f"Q3 {stats.q3:.10g} · max {stats.max_x:.10g}{quantiles}")
+            if stats.paired:
+                coeffs = getattr(stats, regression)
+                forms = {"linear": "y = a + b·x", "quadratic": "y = a + b·x + c·x²", "exponential": "y = a·e^(b·x)"}
+                if coeffs is None:
+                    st.warning(f"{regression} regression is not defined for this data")
+                else:
+                    st.write(f"{forms[regression]}: " + ", ".join(f"{k} = {v:.10g}" for k, v in zip("abc", coeffs)))
+                if stats.r is not None:
+                    st.caption(f"r = {stats.r:.10g} · ȳ = {stats.mean_y:.10g} · σy = {stats.sigma_y:.10g}")
+            st.caption("Use x̄ (xbar), σx (sigmax), sx, n, a, b, c, r … in the calculator.")
+
+stat_mode()
+
+# ---------------- BASE-N converter ----------------
+# Pasted register dumps are converted in one pass of integer parsing/formatting.
+@st.fragment
+def basen_converter():
+    with st.expander("BASE-N converter — paste values, one per line"):
+        c1, c2, c3 = st.columns(3)
+        radix = c1.selectbox("Input radix", (16, 10, 8, 2), format_func=RADIX_NAMES.get, key="conv_radix")
+        bits = c2.selectbox("Word bits", ("∞",) + WIDTHS, key="conv_bits")
+        signed = c3.checkbox("Signed", value=False, key="conv_signed")
+        text = st.text_area("Values (0x/0o/0b prefixes, _ separators allowed)", value="0xDEADBEEF\n0x7F\nFFFF_FFFF",
+                            key="conv_text", height=150)
+        if st.button("Convert", key="conv_btn"):
+            word = Word(None if bits == "∞" else bits, signed)
+            table = pd.DataFrame(convert_many(text.splitlines(), radix, word))
+            failed = int((table["error"] != "").sum())
+            st.dataframe(table if failed else table.drop(columns="error"), use_container_width=True)
+            st.caption(f"{len(table):,} values converted" + (f" · {failed} could not be read" if failed else ""))
+            st.download_button("Download CSV", table.to_csv(index=False), "converted.csv", "text/csv", key="conv_csv")
+
+basen_converter()
+
+# ---------------- CONV / CONST ----------------
+# Unit pairs come from a table precomputed at import; unit-tagged expressions
+# are dimension-checked when parsed, before anything is evaluated.
+@st.fragment
+def conv_const():
+    with st.expander("CONV / CONST — units and physical constants"):
+        conv_tab, qty_tab, const_tab = st.tabs(["CONV", "Quantities", "CONST"])
+        with conv_tab:
+            c1, c2 = st.columns([3, 2])
+            number = c1.selectbox("Conversion", range(len(CONVERSIONS)), key="conv_no",
+                                  format_func=lambda i: f"{i + 1:02d}  {UNITS[CONVERSIONS[i][0]].label} → {UNITS[CONVERSIONS[i][1]].label}")
+            value = c2.number_input("Value", value=1.0, format="%.10g", key="conv_value")
+            source, target = CONVERSIONS[number]
+            st.success(f"{value:.12g} {UNITS[source].label} = {convert(value, source, target):.12g} {UNITS[target].label}")
+        with qty_tab:
+            expr = st.text_input("Expression with units and constants", value="3 km + 200 m", key="qty_expr",
+                                 help="Tag numbers with units (`3 km`, `60 kmh`, `5 kg`); constants by name (`c0`, `h`, `G`, `me`).")
+            try:
+                _, dim = compile_quantity(expr)
+            except calc_core.CalcError as exc:
+                st.error(str(exc))
+            else:
+                choices = compatible(dim)
+                c1, c2 = st.columns([2, 3])
+                unit = c1.selectbox("Show in", ["SI"] + choices, key="qty_unit",
+                                    format_func=lambda n: n if n == "SI" else UNITS[n].label)
+                c2.caption(f"Dimension: {format_dim(dim)}")
+                try:
+                    q = quantity_eval(expr, calc.angle_mode)
+                    st.success(f"= {q.format(None if unit == 'SI' else unit)}")
+                except Exception as exc:
+                    st.error(str(exc) if isinstance(exc, calc_core.CalcError) else "Invalid expression")
+        with const_tab:
+            st.dataframe(pd.DataFrame(
+                [(c.number, c.symbol, c.name, c.description, f"{c.value:.12g}", format_dim(c.dim)) for c in CONSTANTS],
+                columns=["No.", "Symbol", "Name", "Constant", "Value", "SI unit"]), hide_index=True, use_container_width=True)
+            st.caption("CODATA 2018 values; use the Name column in the Quantities tab.")
+
+conv_const()
+
+# ---------------- Batch mode ----------------
+# One expression compiled to NumPy ufuncs, evaluated over a whole column at once.
+with st.expander("Batch mode — evaluate an expression over a column of values"):
+    batch_expr = st.text_input("Expression (free names are read from columns)", value="sin(x)^2 + ln(x)", key="batch_expr")
+    batch_file = st.file_uploader("CSV with one column per variable", type=["csv"], key="batch_csv")
+    batch_paste = st.text_area("...or paste a single column of values", key="batch_paste", height=120)
+    if st.button("Evaluate batch", key="batch_btn"):
+        try:
+            fn = compile_vectorized(batch_expr, angle_mode=calc.angle_mode)
+            if batch_file is not None:
+                df = pd.read_csv(batch_file)
+            else:
+                values = np.array(batch_paste.replace(",", " ").split(), dtype=float)
+                df = pd.DataFrame({fn.variables[0] if fn.variables else "x": values})
+            missing = [name for name in fn.variables if name not in df.columns]
+            if missing:
+                st.error(f"Missing column(s): {', '.join(missing)}")
+            else:
+                df["result"] = fn.evaluate_columns({name: df[name].to_numpy() for name in fn.variables})
+                st.session_state.batch_result = df
+        except Exception:
+            st.error("Invalid batch expression or data")
+    df = st.session_state.get("batch_result")
+    if df is not None:
+        st.caption(f"{len(df)} rows (showing the first 1000)")
+        st.dataframe(df.head(1000), use_container_width=True)
+        st.download_button("Download results (CSV)", df.to_csv(index=False).encode(), "batch_results.csv", "text/csv", key="batch_dl")
 
 # footer: small caption
 st.markdown('<div style="height:6px"></div>', unsafe_allow_html=True)
@@ -0,0 +1,93 @@
+import pytest
+
+from calc_core.basen import (UNBOUNDED, Word, basen_eval, convert_many, format_radix,
+                             parse_int, radix_source)
+from calc_core.errors import BudgetError, CalcError, ParseError
+
+
+@pytest.mark.parametrize("word, n, expected", [
+    (Word(8, True), 127, 127),
+    (Word(8, True), 128, -128),
+    (Word(8, True), -129, 127),
+    (Word(8, False), -1, 255),
+    (Word(16, False), 1 << 16, 0),
+    (Word(64, True), 1 << 63, -(1 << 63)),
+    (UNBOUNDED, -(1 << 100), -(1 << 100)),
+])
+def test_wrap(word, n, expected):
+    assert word.wrap(n) == expected
+
+
+@pytest.mark.parametrize("expr, radix, source", [
+    ("FF + 1", 16, "0xFF + 0x1"),
+    ("ff*Ans", 16, "0xff*Ans"),
+    ("1010 - 0x1", 2, "0b1010 - 0x1"),
+    ("and(17, 7)", 8, "and(0o17, 0o7)"),
+    ("12 + 3", 10, "12 + 3"),
+    ("ABC", 16, "0xABC"),   # a hex word, not a name
+])
+def test_radix_source(expr, radix, source):
+    assert radix_source(expr, radix) == source
+
+
+@pytest.mark.parametrize("expr, radix", [("102", 2), ("19", 8), ("1G", 16)])
+def test_radix_source_rejects_other_digits(expr, radix):
+    with pytest.raises(ParseError, match="is not a"):
+        radix_source(expr, radix)
+
+
+@pytest.mark.parametrize("expr, radix, word, expected", [
+    ("FF + 1", 16, Word(8, False), 0),
+    ("7F + 1", 16, Word(8, True), -128),
+    ("-7 / 2", 10, Word(), -3),             # truncates toward zero
+    ("-7 // 2", 10, Word(), -4),
+    ("2^40", 10, Word(32, True), 0),
+    ("2^100", 10, UNBOUNDED, 1 << 100),
+    ("not(0)", 10, Word(16, False), 0xFFFF),
+    ("xor(1100, 1010)", 2, Word(), 0b0110),
+    ("shl(1, 31)", 10, Word(32, True), -(1 << 31)),
+    ("shr(-8, 1)", 10, Word(32, True), -4),
+    ("shr(FFFFFFFF, 1C)", 16, Word(32, False), 0xF),
+    ("Ans + 1", 16, Word(), 11),
+])
+def test_evaluation(expr, radix, word, expected):
+    assert basen_eval(expr, radix, word, env={"Ans": 10}) == expected
+
+
+@pytest.mark.parametrize("expr, error, message", [
+    ("1.5 + 1", CalcError, "integers only"),
+    ("5!", CalcError, "factorial"),
+    ("2^-1", CalcError, "negative"),
+    ("shl(1, -1)", CalcError, "shift count"),
+    ("shl(1, 10^9)", BudgetError, "shift too large"),
+    ("1/0", CalcError, "division by zero"),
+    ("sin(1)", CalcError, "unknown name"),
+])
+def test_errors(expr, error, message):
+    with pytest.raises(error, match=message):
+        basen_eval(expr)
+
+
+def test_unsupported_word():
+    with pytest.raises(ValueError, match="unsupported word"):
+        basen_eval("1", word=Word(12, True))
+
+
+def test_format_and_parse_round_trip():
+    assert format_radix(-1, 16, Word(8, True)) == "FF"
+    assert format_radix(-5, 2) == "-101"
+    assert format_radix(-12, 10) == "-12"
+    big = 7 ** 20000  # beyond the int <-> str digit limit
+    assert parse_int(format_radix(big, 10)) == big
+    assert parse_int("-0x_ff") == -255
+    assert parse_int("1 0 1", 2) == 5
+    with pytest.raises(CalcError, match="not a HEX number"):
+        parse_int("xyz", 16)
+
+
+def test_convert_many_reports_bad_rows():
+    columns = convert_many(["FF", "", "zz", "-1"], 16, Word(8, True), targets=(10, 2))
+    assert columns["input"] == ["FF", "zz", "-1"]
+    assert columns["DEC"] == ["-1", "", "-1"]
+    assert columns["BIN"] == ["11111111", "", "11111111"]
+    assert columns["error"][0] == "" and "not a HEX number" in columns["error"][1]
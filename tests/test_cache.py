@@ -0,0 +1,47 @@
+import pytest
+
+from calc_core.cache import LRUCache, TTLCache
+
+
+def test_lru_evicts_the_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # "a" is now the most recent
+    cache.put("c", 3)
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 1, "misses": 0, "evictions": 1}
+
+
+def test_lru_counts_misses_and_clears():
+    cache = LRUCache(maxsize=4)
+    assert cache.get("x", "default") == "default"
+    cache.put("x", 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.stats()["misses"] == 0
+
+
+@pytest.mark.parametrize("cls, kwargs", [(LRUCache, {"maxsize": 0}), (TTLCache, {"ttl": 0})])
+def test_bad_limits(cls, kwargs):
+    with pytest.raises(ValueError):
+        cls(**kwargs)
+
+
+def test_ttl_entries_expire():
+    now = [0.0]
+    cache = TTLCache(maxsize=8, ttl=10.0, clock=lambda: now[0])
+    cache.put("a", 1)
+    now[0] = 5.0
+    assert cache.get("a") == 1
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.stats()["expired"] == 1
+
+
+def test_ttl_put_drops_a_stale_oldest_entry():
+    now = [0.0]
+    cache = TTLCache(maxsize=8, ttl=1.0, clock=lambda: now[0])
+    cache.put("old", 1)
+    now[0] = 2.0
+    cache.put("new", 2)
+    assert "old" not in cache and cache.get("new") == 2
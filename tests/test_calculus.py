@@ -0,0 +1,53 @@
+import math
+
+import pytest
+
+from calc_core.calculus import calculus_table, gauss_kronrod, ridders
+from calc_core.engine import compile_expression
+from calc_core.errors import CalcError
+from calc_core.evaluator import evaluate
+
+
+def run(expr, mode="RAD", env=None):
+    return evaluate(compile_expression(expr), calculus_table(mode), env)
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("integrate(x^2, 0, 3)", 9.0),
+    ("integrate(sin(x), 0, pi)", 2.0),
+    ("integrate(1/sqrt(x), 0, 1)", 2.0),
+    ("diff(x^3, 2)", 12.0),
+    ("diff(sin(x), 0)", 1.0),
+    ("diff(abs(x), -2)", -1.0),
+    ("diff(abs(x)^2, 0)", 0.0),
+    ("diff(7, 1)", 0.0),
+])
+def test_values(expr, expected):
+    assert run(expr) == pytest.approx(expected, abs=1e-8)
+
+
+def test_outer_names_are_bound():
+    assert run("diff(a*x^2, 1)", env={"a": 3}) == pytest.approx(6.0)
+
+
+def test_degree_mode_derivative():
+    assert run("diff(sin(x), 0)", "DEG") == pytest.approx(math.pi / 180)
+
+
+@pytest.mark.parametrize("expr", [
+    "diff(x!, 3)",
+    "diff(factorial(x), 3)",
+    "diff(abs(x), 0)",
+    "diff(abs(x-1), 1)",
+    "diff(sqrt(x), 0)",
+    "diff(x^2)",
+    "integrate(x, 0)",
+])
+def test_undefined_derivatives_and_bad_calls(expr):
+    with pytest.raises(CalcError):
+        run(expr)
+
+
+def test_building_blocks():
+    assert gauss_kronrod(lambda x: x ** 3, 0.0, 2.0).value == pytest.approx(4.0)
+    assert ridders(math.exp, 1.0) == pytest.approx(math.e, rel=1e-9)
@@ -0,0 +1,70 @@
+import io
+import json
+
+import pytest
+
+from calc_core.cli import evaluate_stream, evaluate_stream_pooled, main, read_records, write_results
+
+
+def rows(text, fmt, **kwargs):
+    return list(evaluate_stream(read_records(io.StringIO(text), fmt), **kwargs))
+
+
+def test_lines_skip_blanks_and_comments():
+    out = rows("1+1\n\n# note\nsin(30)\n", "lines")
+    assert [(r["row"], r["result"]) for r in out] == [(1, 2), (2, pytest.approx(0.5))]
+
+
+def test_bad_rows_become_error_rows():
+    out = rows("1+\nunknown(2)\n1/0\n2*3\n", "lines")
+    assert [bool(r["error"]) for r in out] == [True, True, True, False]
+    assert out[-1]["result"] == 6
+
+
+def test_jsonl_expressions_and_bindings():
+    text = '"2^10"\n{"expr": "x*y", "vars": {"x": 3, "y": 4}}\n{"x": 5}\nnot json\n[1]\n'
+    out = rows(text, "jsonl", expr="x+1")
+    assert [r["result"] for r in out] == [1024, 12, 6, None, None]
+    assert "invalid JSON" in out[3]["error"]
+
+
+def test_csv_bindings_with_a_fixed_expression():
+    out = rows("x,y\n1,2\n3,oops\n,4\n", "csv", expr="x*10+y")
+    assert out[0]["result"] == 12
+    assert "not a number" in out[1]["error"]
+    assert "unknown name 'x'" in out[2]["error"]
+
+
+def test_complex_results_are_rejected():
+    out = rows("sqrt(-1)\n", "lines")
+    assert out[0]["result"] is None and out[0]["error"]
+
+
+def test_write_results_counts_errors():
+    buf = io.StringIO()
+    assert write_results(rows("1\n1/0\n", "lines"), buf, "jsonl") == (2, 1)
+    assert [json.loads(line)["row"] for line in buf.getvalue().splitlines()] == [1, 2]
+
+
+def test_main_writes_csv(tmp_path, capsys):
+    src = tmp_path / "in.txt"
+    src.write_text("1+2\n2^8\n")
+    dst = tmp_path / "out.csv"
+    assert main([str(src), "-o", str(dst)]) == 0
+    assert dst.read_text().splitlines() == ["row,expr,result,error", "1,1+2,3,", "2,2^8,256,"]
+    assert "2 rows, 0 errors" in capsys.readouterr().err
+
+
+def test_pooled_stream_keeps_order_and_bad_rows():
+    records = read_records(io.StringIO('"1+1"\nnope\n"2*3"\n"1/0"\n'), "jsonl")
+    out = list(evaluate_stream_pooled(records, workers=2, block=2))
+    assert [r["row"] for r in out] == [1, 2, 3, 4]
+    assert [r["result"] for r in out] == [2, None, 6, None]
+
+
+def test_pooled_stream_survives_a_block_timeout():
+    slow = "+".join(f"({90000 + i}!*{80000 + i}!)" for i in range(6))
+    records = [("1+1", {}), (slow, {}), ("2+2", {}), ("3+3", {})]
+    out = list(evaluate_stream_pooled(records, workers=2, block=2, timeout=1.0))
+    assert all("timed out" in r["error"] for r in out[:2])
+    assert [r["result"] for r in out[2:]] == [4, 6]
@@ -0,0 +1,69 @@
+import math
+
+import pytest
+
+from calc_core.cmplx import complex_table, format_complex
+from calc_core.engine import compile_expression
+from calc_core.errors import CalcError
+from calc_core.evaluator import evaluate
+
+
+def run(expr, angle_mode="RAD"):
+    return complex(evaluate(compile_expression(expr), complex_table(angle_mode)))
+
+
+@pytest.mark.parametrize("z, text", [
+    (3 + 4j, "3+4i"),
+    (3 - 4j, "3-4i"),
+    (1j, "i"),
+    (-1j, "-i"),
+    (2 - 1j, "2-i"),
+    (-2.5j, "-2.5i"),
+    (5, "5"),
+    (-0.0, "0"),
+    (complex(-0.0, -0.0), "0"),
+    (1 / 3 + 0j, "0.333333333333333"),
+])
+def test_rectangular(z, text):
+    assert format_complex(z) == text
+
+
+def test_rounding_noise_is_dropped():
+    assert format_complex(run("e^(i*pi)")) == "-1"
+    assert format_complex(run("sqrt(-4)")) == "2i"
+    # a small part is kept when |z| is small too
+    assert format_complex(1e-20 + 1e-20j) == "1e-20+1e-20i"
+
+
+def test_infinite_parts():
+    assert format_complex(complex(math.inf, 1)) == "inf+i"
+    assert format_complex(complex(1, -math.inf)) == "1-infi"
+
+
+def test_polar():
+    assert format_complex(1j, polar=True, angle_mode="DEG") == "1∠90"
+    assert format_complex(-1, polar=True) == f"1∠{math.pi:.15g}"
+    assert format_complex(0, polar=True) == "0∠0"
+
+
+@pytest.mark.parametrize("expr, angle_mode, expected", [
+    ("(1+2*i)*(3-i)", "RAD", 5 + 5j),
+    ("conj(2+3*i) + re(4*i) + im(4*i)", "RAD", 6 - 3j),
+    ("abs(3+4*i)", "RAD", 5),
+    ("arg(i)", "DEG", 90),
+    ("rect(2, 90)", "DEG", 2j),
+    ("sin(90)", "DEG", 1),
+    ("ln(-1)", "RAD", math.pi * 1j),
+])
+def test_evaluation(expr, angle_mode, expected):
+    assert run(expr, angle_mode) == pytest.approx(expected, abs=1e-12)
+
+
+def test_errors():
+    with pytest.raises(ValueError, match="angle mode"):
+        complex_table("GRAD")
+    with pytest.raises(CalcError):
+        run("1/(0*i)")
+    # cmath has no complex factorial; callers report this like any bad argument
+    with pytest.raises(TypeError):
+        run("factorial(2*i)")
@@ -0,0 +1,136 @@
+import pytest
+
+from calc_core.definitions import Definitions, parse_definition
+from calc_core.engine import compile_expression
+from calc_core.errors import BudgetError, CalcError, ParseError
+from calc_core.evaluator import evaluate
+from calc_core.nodes import to_source
+from calc_core.tables import TABLES
+
+RAD = TABLES["RAD"]
+
+
+def define(defs, *texts):
+    for text in texts:
+        defs.define(parse_definition(text))
+    return defs
+
+
+def run(defs, expr, env=None):
+    defs.recalculate(lambda node, scope: evaluate(node, RAD, scope), env)
+    scope = {**(env or {}), **defs.values}
+    return evaluate(defs.expand(compile_expression(expr)), RAD, scope)
+
+
+def test_parse_definition():
+    assert parse_definition("1+2") is None
+    d = parse_definition("f(x, y) = x*y + 1")
+    assert (d.name, d.params, d.signature) == ("f", ("x", "y"), "f(x, y)")
+    assert str(parse_definition("A=3")) == "A = 3"
+
+
+@pytest.mark.parametrize("text, message", [
+    ("2=3", "must be a name"),
+    ("A=", "nothing to assign"),
+    ("f(1)=2", "must be names"),
+    ("f(x, x)=x", "repeated parameter"),
+    ("A==1", "must be a name"),   # "==" is not an assignment
+])
+def test_bad_definitions(text, message):
+    with pytest.raises(ParseError, match=message):
+        parse_definition(text)
+
+
+def test_variables_and_functions():
+    defs = define(Definitions(), "A=3", "f(x)=x^2+A", "B=f(A)")
+    assert run(defs, "f(2) + B") == 7 + 12
+    assert defs.values == {"A": 3, "B": 12}
+
+
+def test_parameters_are_not_captured():
+    defs = define(Definitions(), "B=10", "f(y)=y+B", "g(B)=f(B)")
+    assert run(defs, "g(1)") == 11
+    defs = define(Definitions(), "f(x, y)=x-y", "g(x, y)=f(y, x)")
+    assert run(defs, "g(1, 5)") == 4
+
+
+def test_redefining_invalidates_dependents_only():
+    defs = define(Definitions(), "A=1", "B=A+1", "C=B*2", "D=5")
+    run(defs, "0")
+    assert sorted(defs.define(parse_definition("A=10"))) == ["A", "B", "C"]
+    assert defs.values == {"D": 5}
+    assert run(defs, "C") == 22
+    assert sorted(defs.dependents("A")) == ["B", "C"]
+
+
+def test_recalculate_evaluates_only_what_changed():
+    defs = define(Definitions(), "A=M+1", "B=2")
+    calls = []
+
+    def counting(node, scope):
+        calls.append(node)
+        return evaluate(node, RAD, scope)
+
+    assert sorted(defs.recalculate(counting, {"M": 1})) == ["A", "B"]
+    assert defs.recalculate(counting, {"M": 1}) == []
+    assert defs.recalculate(counting, {"M": 2}) == ["A"] and defs.values["A"] == 3
+    assert sorted(defs.recalculate(counting, {"M": 2}, context="DEG")) == ["A", "B"]
+    assert len(calls) == 5
+
+
+def test_failures_are_recorded_per_variable():
+    defs = define(Definitions(), "A=1/0", "B=A+1", "C=2")
+    run(defs, "C")
+    assert "division by zero" in defs.errors["A"]
+    assert "B" in defs.errors and defs.values == {"C": 2}
+
+
+def test_remove():
+    defs = define(Definitions(), "A=1", "B=A+1")
+    assert defs.remove("A") == ["A", "B"]
+    assert defs.remove("A") == []
+    run(defs, "0")
+    assert "unknown name 'A'" in defs.errors["B"]
+
+
+@pytest.mark.parametrize("texts", [
+    ["A=A+1"],
+    ["A=B", "B=A"],
+    ["f(x)=g(x)", "g(x)=f(x)"],
+])
+def test_circular_definitions(texts):
+    defs = define(Definitions(), *texts[:-1])
+    with pytest.raises(CalcError, match="circular"):
+        define(defs, texts[-1])
+
+
+def test_reserved_names():
+    with pytest.raises(CalcError, match="built-in"):
+        define(Definitions(reserved=RAD), "sin(x)=x")
+
+
+def test_wrong_argument_count():
+    defs = define(Definitions(), "f(x, y)=x+y")
+    with pytest.raises(CalcError, match="takes 2 argument"):
+        run(defs, "f(1)")
+
+
+def test_expansion_limits():
+    defs = define(Definitions(), "f0(x)=x+1")
+    for i in range(1, 20):
+        define(defs, f"f{i}(x)=f{i - 1}(x)*f{i - 1}(x)")
+    with pytest.raises(BudgetError, match="too large"):
+        defs.expand(compile_expression("f19(2)"))
+    defs = define(Definitions(), "g0(x)=x+1")
+    for i in range(1, 300):
+        define(defs, f"g{i}(x)=g{i - 1}(x)+1")
+    with pytest.raises(BudgetError, match="nested too deeply"):
+        defs.expand(compile_expression("g299(1)"))
+
+
+def test_load_reports_rejected_rows():
+    defs = Definitions(reserved={"sin"})
+    assert defs.load([("A", "2"), ("f(x)", "x*A"), ("sin(x)", "x"), ("B", "1+")]) == ["sin(x)", "B"]
+    assert run(defs, "f(3)") == 6
+    assert defs.expand_source("1+2") == "1+2"
+    assert defs.expand_source("f(4)") == to_source(defs.expand(compile_expression("f(4)")))
@@ -0,0 +1,45 @@
+import pytest
+
+from calc_core.engine import COMPILE_CACHE, OPTIMIZED_CACHE, compile_expression, compile_optimized, normalize, safe_eval
+from calc_core.errors import CalcError, ParseError
+from calc_core.tables import TABLES
+
+
+def test_normalize_collapses_whitespace():
+    assert normalize("  2 +\t 3 ") == "2 + 3"
+
+
+def test_compile_is_cached_by_normalized_text():
+    node = compile_expression("1 +  2*x")
+    hits = COMPILE_CACHE.hits
+    assert compile_expression(" 1 + 2*x ") is node
+    assert COMPILE_CACHE.hits == hits + 1
+
+
+def test_optimized_cache_is_per_table():
+    deg = compile_optimized("sin(30) + y", TABLES["DEG"])
+    assert compile_optimized("sin(30) + y", TABLES["DEG"]) is deg
+    assert compile_optimized("sin(30) + y", TABLES["RAD"]) is not deg
+    assert ("sin(30) + y", id(TABLES["DEG"])) in OPTIMIZED_CACHE
+
+
+@pytest.mark.parametrize("expr, env, expected", [
+    ("2^10", None, 1024),
+    ("sin(30)", None, pytest.approx(0.5)),
+    ("x*2 + 1", {"x": 4}, 9),
+    ("pi", {"pi": 3}, 3),  # variables shadow table names
+])
+def test_safe_eval(expr, env, expected):
+    assert safe_eval(expr, TABLES["DEG"], env) == expected
+
+
+@pytest.mark.parametrize("expr, error", [
+    ("__import__('os')", CalcError),
+    ("().__class__", ParseError),
+    ("open", CalcError),
+    ("2 +", ParseError),
+    ("1 2", ParseError),
+])
+def test_only_whitelisted_names_are_reachable(expr, error):
+    with pytest.raises(error):
+        safe_eval(expr, TABLES["DEG"])
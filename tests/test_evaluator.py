@@ -0,0 +1,92 @@
+import pytest
+
+from calc_core.basen import basen_eval
+from calc_core.engine import compile_expression
+from calc_core.errors import BudgetError, CalcError, ParseError
+from calc_core.evaluator import Budget, evaluate
+from calc_core.precise import precise_eval
+from calc_core.tables import TABLES
+
+
+def run(expr, budget=Budget(), env=None):
+    return evaluate(compile_expression(expr), TABLES["RAD"], env, budget)
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("7//2 + 7%3", 4),
+    ("2^100", 2 ** 100),
+    ("-2^2", -4),
+    ("20!", 2432902008176640000),
+    ("factorial(5) / 4", 30.0),
+    ("sqrt(16) + abs(-3)", 7.0),
+])
+def test_arithmetic(expr, expected):
+    assert run(expr) == expected
+
+
+def test_variables_are_read_from_env():
+    assert run("a*b", env={"a": 6, "b": 7}) == 42
+
+
+@pytest.mark.parametrize("expr, budget", [
+    ("9^9^9", Budget()),
+    ("2^(10^7)", Budget()),
+    ("factorial(10^6)", Budget()),
+    ("200000!", Budget()),
+    ("(2^4000000)*(2^4000000)", Budget()),
+    ("2^100", Budget(max_int_bits=64)),
+    ("30!", Budget(max_factorial=20)),
+    ("pow(3, 2000000)", Budget()),
+])
+def test_budget_is_checked_before_the_work(expr, budget):
+    with pytest.raises(BudgetError):
+        run(expr, budget)
+
+
+@pytest.mark.parametrize("expr", ["1^(10^9)", "0^(10^9)", "(-1)^(10^9)"])
+def test_trivial_bases_ignore_the_exponent_limit(expr):
+    assert run(expr) in (0, 1)
+
+
+@pytest.mark.parametrize("expr", ["nosuch(1)", "nosuch + 1", "pi(2)"])
+def test_unknown_names_are_calc_errors(expr):
+    with pytest.raises(CalcError):
+        run(expr)
+
+
+def test_error_hierarchy():
+    assert issubclass(BudgetError, CalcError) and issubclass(ParseError, CalcError)
+    assert issubclass(CalcError, ValueError)
+
+
+@pytest.mark.parametrize("expr", [
+    "(16^1000000+1)%(5^900000+1)",
+    "(10^1000000)%(7^500000+1)",
+    "(16^1000000)//(5^900000)",
+])
+def test_long_division_is_checked_before_it_runs(expr):
+    with pytest.raises(BudgetError):
+        run(expr)
+
+
+def test_cheap_division_of_big_integers_is_allowed():
+    assert run("(10^100000)%7") == pow(10, 100000, 7)
+    assert run("100!//98!") == 9900
+
+
+@pytest.mark.parametrize("expr", ["1/0", "5//0", "5%0", "10^400/3", "2.0^5000"])
+def test_arithmetic_errors_are_calc_errors(expr):
+    with pytest.raises(CalcError):
+        run(expr)
+
+
+@pytest.mark.parametrize("expr", ["1/0", "7%0", "7//0"])
+def test_basen_division_by_zero(expr):
+    with pytest.raises(CalcError):
+        basen_eval(expr)
+
+
+@pytest.mark.parametrize("expr", ["1/0", "0/0"])
+def test_precise_division_by_zero(expr):
+    with pytest.raises(CalcError):
+        precise_eval(expr)
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from calc_core.errors import CalcError
+from calc_core.matrix import MatrixStore, matrix_eval
+
+
+@pytest.fixture
+def env():
+    store = MatrixStore()
+    store.set("MatA", [[1, 2], [3, 4]])
+    store.set("MatB", [[0, 1], [1, 0]])
+    return store.env()
+
+
+def test_matrix_product_and_functions(env):
+    assert np.array_equal(matrix_eval("MatA*MatB", env=env), [[2, 1], [4, 3]])
+    assert matrix_eval("det(MatA)", env=env) == pytest.approx(-2)
+    assert np.allclose(matrix_eval("MatA^-1*MatA", env=env), np.eye(2))
+
+
+def test_sums_need_equal_shapes():
+    store = MatrixStore()
+    store.set("MatA", [[1], [2], [3]])
+    store.set("MatB", [[1, 2, 3]])
+    env = store.env()
+    assert np.array_equal(matrix_eval("MatA+MatA-MatA", env=env), [[1], [2], [3]])
+    assert np.array_equal(matrix_eval("MatA+1", env=env), [[2], [3], [4]])
+    for expr in ("MatA+MatB", "MatB-MatA"):
+        with pytest.raises(CalcError):
+            matrix_eval(expr, env=env)
+
+
+@pytest.mark.parametrize("expr", ["sin(MatA)", "sqrt(MatB)", "det(MatA, MatB)", "det(2)", "MatA^0.5"])
+def test_bad_arguments_are_calc_errors(env, expr):
+    with pytest.raises(CalcError):
+        matrix_eval(expr, env=env)
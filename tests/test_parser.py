@@ -0,0 +1,69 @@
+import pytest
+
+from calc_core.errors import BudgetError, ParseError
+from calc_core.evaluator import Evaluator
+from calc_core.nodes import BinOp, Call, Factorial, Name, Num, Unary, height, to_source
+from calc_core.parser import MAX_HEIGHT, MAX_LENGTH, parse, tokenize
+from calc_core.tables import TABLES
+
+
+def test_tokens_keep_their_positions():
+    assert [(t.kind, t.text, t.pos) for t in tokenize("2**x_1 //0x1F")] == [
+        ("num", "2", 0), ("op", "**", 1), ("name", "x_1", 3), ("op", "//", 7),
+        ("num", "0x1F", 9), ("end", "", 13)]
+
+
+@pytest.mark.parametrize("text, value", [("12", 12), ("1.5e3", 1500.0), (".5", 0.5), ("0b101", 5), ("0o17", 15)])
+def test_number_literals(text, value):
+    node = parse(text)
+    assert node == Num(value, text) and type(node.value) is type(value)
+
+
+@pytest.mark.parametrize("expr, tree", [
+    ("1+2*3", BinOp("+", Num(1, "1"), BinOp("*", Num(2, "2"), Num(3, "3")))),
+    ("2^3^2", BinOp("**", Num(2, "2"), BinOp("**", Num(3, "3"), Num(2, "2")))),
+    ("-2^2", Unary("-", BinOp("**", Num(2, "2"), Num(2, "2")))),
+    ("3!^2", BinOp("**", Factorial(Num(3, "3")), Num(2, "2"))),
+    ("f(x, 1)", Call("f", (Name("x"), Num(1, "1")))),
+    ("g()", Call("g", ())),
+])
+def test_precedence(expr, tree):
+    assert parse(expr) == tree
+
+
+@pytest.mark.parametrize("expr", ["1-(2-3)", "-(x+1)^2", "(a+b)*(c-d)/e", "2^(3^2)!"])
+def test_to_source_round_trips(expr):
+    assert parse(to_source(parse(expr))) == parse(expr)
+
+
+@pytest.mark.parametrize("expr", ["", "1+", "(1", "1)", "f(1,", "1 $ 2", "2 3", ",", "x!y"])
+def test_syntax_errors(expr):
+    with pytest.raises(ParseError):
+        parse(expr)
+
+
+def test_input_length_is_limited():
+    with pytest.raises(ParseError):
+        tokenize("1" * (MAX_LENGTH + 1))
+
+
+@pytest.mark.parametrize("expr", ["1" + "+1" * 1000, "0" + "!" * 5000, "x" + "*x" * MAX_HEIGHT])
+def test_long_chains_are_a_budget_error(expr):
+    with pytest.raises(BudgetError):
+        parse(expr)
+
+
+def test_deep_nesting_is_a_parse_error():
+    with pytest.raises(ParseError):
+        parse("(" * 300 + "1" + ")" * 300)
+
+
+def test_chain_within_limit_evaluates():
+    node = parse("1" + "+1" * (MAX_HEIGHT - 1))
+    assert height(node) == MAX_HEIGHT
+    assert Evaluator(TABLES["RAD"]).evaluate(node) == MAX_HEIGHT
+
+
+def test_height_counts_levels():
+    assert height(parse("2")) == 1
+    assert height(parse("-(1+2)*3!")) == 4
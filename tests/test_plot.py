@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from calc_core.plot import DISPLAY_POINTS, minmax_downsample, plot_data
+
+
+@pytest.mark.parametrize("expr, a, b", [
+    ("tan(x)", -1e4, 1e4),
+    ("1/sin(x)", -1e3, 1e3),
+    ("sin(x)", -10, 10),
+])
+def test_plot_payload_is_bounded(expr, a, b):
+    x, y = plot_data(expr, a, b)
+    assert len(x) == len(y) <= DISPLAY_POINTS
+
+
+def test_downsample_keeps_gaps_bounded():
+    x = np.linspace(0, 1, 100_000)
+    y = np.where(np.arange(x.size) % 3 == 0, np.nan, x)
+    xs, ys = minmax_downsample(x, y, 500)
+    assert len(xs) <= 1000
+    assert np.isnan(ys).any()
+    assert not (np.isnan(ys[1:]) & np.isnan(ys[:-1])).any()
+
+
+def test_downsample_keeps_extremes():
+    x = np.linspace(0, 1, 10_000)
+    y = np.sin(40 * x)
+    xs, ys = minmax_downsample(x, y, 100)
+    assert len(xs) <= 200
+    assert ys.max() == y.max() and ys.min() == y.min()
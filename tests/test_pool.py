@@ -0,0 +1,55 @@
+from concurrent.futures import CancelledError
+
+import pytest
+
+from calc_core.engine import compile_expression
+from calc_core.errors import CalcError
+from calc_core.pool import INLINE_LIMIT, PooledEvaluator, estimate_cost
+
+
+@pytest.fixture(scope="module")
+def pool():
+    pool = PooledEvaluator(max_workers=1, timeout=60.0)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.parametrize("expr, heavy", [
+    ("1+2*3", False),
+    ("20!", False),
+    ("90000!", True),
+    ("factorial(90000)", True),
+    ("2^10000000", True),
+])
+def test_cost_estimate(expr, heavy):
+    assert (estimate_cost(compile_expression(expr)) > INLINE_LIMIT) is heavy
+
+
+def test_cheap_expressions_run_inline(pool):
+    assert not pool.is_heavy("sin(0)+1")
+    assert pool.evaluate("sin(0)+1") == 1
+
+
+def test_offloaded_expression_sees_the_calculus_table(pool):
+    expr = "90000!*0 + integrate(x^2, 0, 3) + diff(x^3, 2)"
+    assert pool.is_heavy(expr)
+    assert pool.evaluate(expr, "RAD") == pytest.approx(21.0)
+
+
+def test_worker_errors_propagate(pool):
+    with pytest.raises(CalcError):
+        pool.evaluate("90000! + nosuchname", "RAD")
+
+
+def test_cancel_stops_only_that_task(pool):
+    slow = pool.submit("(90000!*80000!)+(90001!*80001!)+(90002!*80002!)")
+    quick = pool.submit("90000!*0+1")
+    pool.cancel(slow)
+    with pytest.raises(CancelledError):
+        slow.result(timeout=30)
+    assert pool.wait(quick) == 1
+
+
+def test_batches(pool):
+    assert pool.evaluate_many(["1+1", ("x*2", {"x": 4}), "1/0"]) == [
+        (2, None), (8, None), (None, "division by zero")]
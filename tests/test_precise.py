@@ -0,0 +1,73 @@
+import math
+from decimal import Decimal
+
+import pytest
+
+from calc_core.errors import BudgetError, CalcError
+from calc_core.precise import FactorialTable, MAX_PRECISION, e_at, pi_at, precise_eval
+
+PI_40 = "3.141592653589793238462643383279502884197"
+
+
+def test_literals_are_read_exactly():
+    assert precise_eval("0.1+0.2", precision=30) == Decimal("0.3")
+
+
+def test_result_is_rounded_to_the_precision():
+    assert precise_eval("1/3", precision=20) == Decimal("0." + "3" * 20)
+    assert str(precise_eval("pi", precision=40)) == PI_40
+
+
+@pytest.mark.parametrize("expr, expected", [
+    ("sin(30)", "0.5"),
+    ("asin(1)", "90"),
+    ("tan(45)", "1"),
+    ("sqrt(2)^2", "2"),
+    ("ln(e)", "1"),
+    ("log10(1000)", "3"),
+])
+def test_functions_in_degree_mode(expr, expected):
+    assert abs(precise_eval(expr, "DEG", 30) - Decimal(expected)) < Decimal("1e-28")
+
+
+def test_radian_mode():
+    assert abs(precise_eval("sin(pi/6)", "RAD", 30) - Decimal("0.5")) < Decimal("1e-28")
+
+
+def test_exact_integers_stay_whole():
+    assert precise_eval("50!", precision=10) == math.factorial(50)
+    assert precise_eval("nCr(50, 25)") == math.comb(50, 25)
+    assert precise_eval("nPr(10, 3)") == 720
+
+
+def test_constants_are_cached():
+    assert pi_at(60) is pi_at(60)
+    assert str(e_at(20)).startswith("2.71828182845904523536")
+
+
+def test_factorial_table_steps_from_cached_values():
+    table = FactorialTable(size=4, max_step=8)
+    assert table.get(10) == math.factorial(10)
+    assert table.get(12) == math.factorial(12)
+    assert table.get(11) == math.factorial(11)
+    assert table.get(200) == math.factorial(200)
+    with pytest.raises(ValueError):
+        table.get(-1)
+
+
+@pytest.mark.parametrize("expr, error", [
+    ("2.5!", CalcError),
+    ("1/0", CalcError),
+    ("200000!", BudgetError),
+    ("nCr(10^6, 2)", BudgetError),
+    ("nosuch(1)", CalcError),
+])
+def test_errors(expr, error):
+    with pytest.raises(error):
+        precise_eval(expr)
+
+
+@pytest.mark.parametrize("precision", [0, MAX_PRECISION + 1])
+def test_precision_is_bounded(precision):
+    with pytest.raises(BudgetError):
+        precise_eval("1", precision=precision)
@@ -0,0 +1,72 @@
+import pytest
+
+from calc_core.preview import IncrementalPreview
+from calc_core.tables import TABLES
+
+DEG, RAD = TABLES["DEG"], TABLES["RAD"]
+
+
+def typed(preview, text, names=RAD, env=None):
+    """Feed ``text`` one keypress at a time and return every preview."""
+    return [preview.update(text[:i], names, env) for i in range(1, len(text) + 1)]
+
+
+def test_preview_while_typing():
+    assert typed(IncrementalPreview(), "12+3*4") == [1, 12, 12, 15, 15, 24]
+
+
+def test_dangling_operators_and_open_parens_are_completed():
+    preview = IncrementalPreview()
+    assert preview.update("2*(3+4", RAD) == 14
+    assert preview.update("2*(3+", RAD) == 6
+    assert preview.update("sqrt(", RAD) is None
+
+
+def test_resumes_from_checkpoints():
+    preview = IncrementalPreview()
+    preview.update("1+2+3+4", RAD)
+    assert preview._checkpoints
+    assert preview.update("1+2+3+4+5", RAD) == 15
+    assert preview.update("1+2+3+4+5*2", RAD) == 20
+
+
+def test_matches_a_fresh_parse_after_any_edit():
+    preview = IncrementalPreview()
+    for text in ["1+2*3", "1+2*3^2", "1+2", "1+2.5", "1+2.5e1", "1+2.5e-1", "(1+2)*3", "9-(1+2)*3"]:
+        assert preview.update(text, RAD) == IncrementalPreview().update(text, RAD), text
+
+
+def test_del_drops_tokens_past_the_edit():
+    preview = IncrementalPreview()
+    typed(preview, "123+45")
+    assert preview.update("123+4", RAD) == 127
+    assert preview.update("123+", RAD) == 123
+    assert preview.update("12", RAD) == 12
+    assert preview.update("", RAD) is None
+
+
+def test_angle_mode_and_env_changes_clear_the_memo():
+    preview = IncrementalPreview()
+    assert preview.update("cos(0)+ans", DEG, {"ans": 1}) == 2
+    assert preview.update("cos(0)+ans", DEG, {"ans": 2}) == 3
+    assert preview.update("sin(90)", DEG) == pytest.approx(1)
+    assert preview.update("sin(90)", RAD) == pytest.approx(0.8939966636)
+
+
+@pytest.mark.parametrize("text", [
+    "1/0",          # error
+    "2^100000",     # over the preview budget
+    "1+)",          # syntax error
+    "nosuch(2)",    # unknown function
+    "x+1",          # unknown variable
+])
+def test_no_preview_for_bad_input(text):
+    assert IncrementalPreview().update(text, RAD) is None
+
+
+def test_reset():
+    preview = IncrementalPreview()
+    preview.update("1+2+3", RAD)
+    preview.reset()
+    assert preview._tokens == [] and preview._checkpoints == []
+    assert preview.update("4", RAD) == 4
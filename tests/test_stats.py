@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+from calc_core.errors import CalcError
+from calc_core.stats import STAT_VARIABLES, StatAccumulator, accumulate
+
+
+def stats(x, y=None, chunk=None, **kwargs):
+    acc = StatAccumulator(paired=y is not None, **kwargs)
+    x = np.asarray(x, dtype=float)
+    y = None if y is None else np.asarray(y, dtype=float)
+    step = chunk or max(len(x), 1)
+    for i in range(0, len(x), step):
+        acc.update(x[i:i + step], None if y is None else y[i:i + step])
+    return acc.result()
+
+
+def test_single_variable():
+    s = stats([2, 4, 4, 4, 5, 5, 7, 9])
+    assert (s.n, s.mean_x, s.sigma_x) == (8, 5.0, 2.0)
+    assert s.s_x == pytest.approx(math.sqrt(32 / 7))
+    assert (s.sum_x, s.sum_x2, s.min_x, s.max_x) == (40, 232, 2, 9)
+    assert (s.q1, s.median, s.q3) == (4, 4.5, 5.5)
+    assert s.exact_quantiles and not s.paired
+
+
+def test_chunks_give_the_same_result():
+    rng = np.random.default_rng(1)
+    x = rng.normal(1e9, 3, 10_001)  # large offset: naive sums lose the variance
+    whole, chunked = stats(x), stats(x, chunk=997)
+    assert chunked.mean_x == pytest.approx(whole.mean_x, rel=1e-15)
+    assert chunked.sigma_x == pytest.approx(whole.sigma_x, rel=1e-9)
+    assert whole.sigma_x == pytest.approx(np.std(x), rel=1e-9)
+
+
+def test_missing_values_are_skipped():
+    s = stats([1, math.nan, 3, math.inf], [2, 5, 6, 1])
+    assert s.n == 2 and s.mean_y == 4
+
+
+def test_regressions():
+    x = np.arange(1.0, 11.0)
+    s = stats(x, 3 + 2 * x, chunk=3)
+    assert s.linear == pytest.approx((3, 2))
+    assert s.r == pytest.approx(1)
+    s = stats(x, 1 - x + 0.5 * x * x, chunk=4)
+    assert s.quadratic == pytest.approx((1, -1, 0.5))
+    s = stats(x, 2 * np.exp(0.3 * x))
+    assert s.exponential == pytest.approx((2, 0.3))
+
+
+def test_fits_that_do_not_exist_are_none():
+    s = stats([1, 1, 1], [1, 2, 3])        # vertical line
+    assert s.linear is None and s.r is None and s.quadratic is None
+    s = stats([1, 2, 3], [5, 5, 5])        # flat: no correlation
+    assert s.linear == pytest.approx((5, 0)) and s.r is None
+    s = stats([1, 2, 3], [1, 0, 2])        # y <= 0 has no logarithm
+    assert s.exponential is None
+    assert stats([1, 2], [1, 2]).quadratic is None
+
+
+def test_reservoir_bounds_quantile_memory():
+    s = stats(np.arange(10_000), reservoir=1000, seed=0)
+    assert not s.exact_quantiles
+    assert s.median == pytest.approx(5000, rel=0.1)
+    assert s.min_x == 0 and s.max_x == 9999
+
+
+def test_variables():
+    x = np.arange(1.0, 6.0)
+    names = stats(x, 1 + x).variables()
+    assert names["xbar"] == names["x̄"] == 3
+    assert (names["a"], names["b"]) == pytest.approx((1, 1))
+    assert "c" in stats(x, x * x).variables("quadratic")
+    assert "ybar" not in stats(x).variables()
+    assert set(names) <= STAT_VARIABLES
+
+
+def test_accumulate_reads_column_chunks():
+    chunks = [{"a": [1, 2], "b": [2, 4]}, {"a": [3], "b": [6]}]
+    assert accumulate(chunks, "a", "b").linear == pytest.approx((0, 2))
+    assert accumulate(chunks, "a").n == 3
+
+
+def test_errors():
+    with pytest.raises(CalcError, match="no data"):
+        StatAccumulator().result()
+    with pytest.raises(CalcError, match="no data"):
+        stats([math.nan])
+    acc = StatAccumulator(paired=True)
+    with pytest.raises(CalcError, match="y column"):
+        acc.update([1, 2])
+    with pytest.raises(CalcError, match="length"):
+        acc.update([1, 2], [1])
@@ -0,0 +1,99 @@
+import sqlite3
+from decimal import Decimal
+
+import pytest
+
+from calc_core.errors import CalcError
+from calc_core.store import Store, decode, encode
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = Store(str(tmp_path / "calc.db"), flush_interval=0.01)
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("value", [0, -1, 2.5, -0.0, 1 - 2j, Decimal("0.1000")])
+def test_register_values_round_trip(value):
+    back = decode(*encode(value))
+    assert back == value and type(back) is type(value)
+    assert str(back) == str(value)
+
+
+def test_huge_ints_are_stored_past_the_digit_limit():
+    value = -7 ** 30000
+    assert decode(*encode(value)) == value
+
+
+def test_unstorable_values():
+    assert encode(True) == ("int", "1")
+    with pytest.raises(CalcError, match="cannot store a str"):
+        encode("x")
+
+
+def test_history_is_per_user_and_newest_first(store):
+    for i in range(5):
+        store.add_history("ann", f"{i}+1", str(i + 1))
+    store.add_history("bob", "2*2", "4")
+    store.flush()
+    assert store.recent("ann", 2) == [("4+1", "5"), ("3+1", "4")]
+    assert store.recent("bob") == [("2*2", "4")]
+    store.clear_history("ann")
+    store.flush()
+    assert store.recent("ann") == []
+
+
+def test_history_is_pruned(tmp_path):
+    store = Store(str(tmp_path / "calc.db"), max_history=3)
+    for i in range(10):
+        store.add_history("ann", str(i), str(i))
+    store.flush()
+    assert [e for e, _ in store.recent("ann")] == ["9", "8", "7"]
+    store.close()
+
+
+def test_prefix_search(store):
+    for expr, result in [("sin(30)", "0.5"), ("sqrt(4)", "2"), ("sin(30)", "0.5"),
+                         ("sin(90)", "1"), ("cos(0)", "1")]:
+        store.add_history("ann", expr, result)
+    store.flush()
+    assert store.search("ann", "sin") == [("sin(30)", "0.5"), ("sin(90)", "1")]
+    assert store.search("ann", "s", limit=1) == [("sin(30)", "0.5")]
+    assert store.search("ann", "tan") == []
+    assert store.search("bob", "s") == []
+
+
+def test_registers_and_formulas(store):
+    store.set_register("ann", "A", 2 ** 100)
+    store.set_register("ann", "A", 3)
+    store.set_register("ann", "Ans", 1.5)
+    store.save_formula("ann", "area", "pi*r^2")
+    store.save_formula("ann", "old", "1")
+    store.delete_formula("ann", "old")
+    store.flush()
+    assert store.session("ann") == ([], {"A": 3, "Ans": 1.5}, [("area", "pi*r^2")])
+    with pytest.raises(CalcError, match="unknown register"):
+        store.set_register("ann", "Q", 1)
+
+
+def test_data_survives_a_restart(tmp_path):
+    path = str(tmp_path / "calc.db")
+    store = Store(path)
+    store.add_history("ann", "1+1", "2")
+    store.close()
+    store = Store(path)
+    assert store.recent("ann") == [("1+1", "2")]
+    store.close()
+
+
+def test_failed_write_is_counted_and_the_writer_keeps_going(store):
+    conn = sqlite3.connect(store.path)
+    conn.execute("DROP TABLE formulas")
+    conn.close()
+    store.save_formula("ann", "f", "1")
+    store.flush()
+    assert store.errors == 1 and "formulas" in store.last_error
+    store.add_history("ann", "1+1", "2")
+    store.flush()
+    assert store.recent("ann") == [("1+1", "2")]
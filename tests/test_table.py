@@ -0,0 +1,31 @@
+import io
+
+import pytest
+
+from calc_core.errors import CalcError
+from calc_core.table import ValueTable, row_count
+from calc_core.tables import TABLES
+
+
+def test_rows_are_computed_from_the_index():
+    table = ValueTable("x^2", TABLES["RAD"], 0, 1, 0.1, "1/x")
+    assert len(table) == 11
+    assert table.page(0, 2) == [(0.0, 0.0, None), (0.1, pytest.approx(0.01), pytest.approx(10.0))]
+
+
+@pytest.mark.parametrize("start, end, step", [(0, 1, 0), (0, 1, -1), (0, float("inf"), 1)])
+def test_bad_ranges(start, end, step):
+    with pytest.raises(CalcError):
+        row_count(start, end, step)
+
+
+def test_export_writes_every_row():
+    out = io.StringIO(newline="")
+    assert ValueTable("2*x", TABLES["RAD"], 1, 3, 1).write_csv(out) == 3
+    assert out.getvalue().splitlines() == ["x,f(x)", "1,2", "2,4", "3,6"]
+
+
+def test_export_is_capped():
+    table = ValueTable("x", TABLES["RAD"], 1, 1000, 1)
+    with pytest.raises(CalcError):
+        table.write_csv(io.StringIO(), max_rows=999)
@@ -0,0 +1,35 @@
+import math
+
+import pytest
+
+from calc_core.errors import ParseError
+from calc_core.units import quantity_eval
+
+
+def close(a, b):
+    return math.isclose(a, b, rel_tol=1e-12)
+
+
+@pytest.mark.parametrize("expr, unit, expected", [
+    ("3 m^2", "m2", 3.0),
+    ("2 km^2", "m2", 2e6),
+    ("10 m^3", "L", 10_000.0),
+    ("sqrt(4 m^2)", "m", 2.0),
+    ("3 m^2 + 1 m^2", "m2", 4.0),
+    ("(3 m)^2", "m2", 9.0),
+    ("6 m^2 / 2 m", "m", 3.0),
+    ("1 m^-1 * 2 m", None, 2.0),
+])
+def test_unit_binds_tighter_than_number(expr, unit, expected):
+    q = quantity_eval(expr)
+    assert close(q.to(unit) if unit else q.value, expected)
+
+
+def test_area_and_volume_dimensions():
+    assert quantity_eval("2 km^2").dim == quantity_eval("1 acre").dim
+    assert quantity_eval("10 m^3").dim == quantity_eval("1 L").dim
+
+
+def test_mixed_dimensions_rejected():
+    with pytest.raises(ParseError):
+        quantity_eval("3 m^2 + 1 m")